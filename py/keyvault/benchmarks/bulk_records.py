@@ -0,0 +1,80 @@
+import argparse
+import os
+import random
+import sys
+import time
+
+from keyvault.crytpography import Algorithm
+
+ALGORITHMS = ['A128CBC', 'A256CBC', 'A128GCM', 'A256GCM', 'A128CBC-HS256', 'A256CBC-HS512']
+
+
+def _loop_encrypt(algorithm, key, records, iv_size, authenticated):
+    results = []
+    for record in records:
+        iv = os.urandom(iv_size)
+        if authenticated:
+            encryptor = algorithm.create_encryptor(key, iv, b'column')
+            results.append((iv, encryptor.transform(record), bytes(encryptor.tag())))
+        else:
+            results.append((iv, algorithm.create_encryptor(key, iv).transform(record), None))
+    return results
+
+
+def _loop_decrypt(algorithm, key, encrypted, authenticated):
+    if authenticated:
+        return [algorithm.create_decryptor(key, iv, b'column', tag).transform(cipher_text)
+                for iv, cipher_text, tag in encrypted]
+    return [algorithm.create_decryptor(key, iv).transform(cipher_text) for iv, cipher_text, _ in encrypted]
+
+
+def _records_per_sec(func, count, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return count / best, result
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument('--count', type=int, default=100000)
+    parser.add_argument('--min-size', type=int, default=16)
+    parser.add_argument('--max-size', type=int, default=512)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--algorithms', nargs='+', default=ALGORITHMS)
+
+    return parser.parse_args(argv)
+
+
+def main(argv):
+    args = _parse_args(argv[1:])
+    records = [os.urandom(random.randint(args.min_size, args.max_size)) for _ in range(args.count)]
+
+    print('%-16s %14s %14s %8s %14s %14s %8s' % ('algorithm', 'loop enc/s', 'bulk enc/s', 'speedup',
+                                                 'loop dec/s', 'bulk dec/s', 'speedup'))
+    for name in args.algorithms:
+        algorithm = Algorithm.resolve(name)
+        key = os.urandom(algorithm.key_size_in_bytes)
+        authenticated = hasattr(algorithm, 'tag_size_in_bytes')
+        iv_size = getattr(algorithm, 'iv_size_in_bytes', 16)
+        auth_args = (b'column',) if authenticated else ()
+
+        loop_enc, encrypted = _records_per_sec(
+            lambda: _loop_encrypt(algorithm, key, records, iv_size, authenticated), args.count, args.repeat)
+        bulk_enc, batch = _records_per_sec(
+            lambda: algorithm.encrypt_records(key, records, *auth_args), args.count, args.repeat)
+        loop_dec, _ = _records_per_sec(
+            lambda: _loop_decrypt(algorithm, key, encrypted, authenticated), args.count, args.repeat)
+        bulk_dec, _ = _records_per_sec(
+            lambda: algorithm.decrypt_records(key, batch, *auth_args), args.count, args.repeat)
+
+        print('%-16s %14.0f %14.0f %8.2f %14.0f %14.0f %8.2f' % (name, loop_enc, bulk_enc, bulk_enc / loop_enc,
+                                                                 loop_dec, bulk_dec, bulk_dec / loop_dec))
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,60 @@
+import argparse
+import os
+import sys
+import time
+
+from keyvault.crytpography import EcKey, RsaKey
+
+# the curve and rsa key size with roughly equivalent strength for each security level in bits, NIST SP 800-57
+SECURITY_LEVELS = {
+    112: ('P-256', 2048),
+    128: ('P-256', 3072),
+    192: ('P-384', 7680),
+    256: ('P-521', 15360)
+}
+
+
+def _ops_per_sec(func, duration):
+    func()
+    count = 0
+    start = time.perf_counter()
+    while True:
+        func()
+        count += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= duration:
+            return count / elapsed
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument('--levels', type=int, nargs='+', default=[112, 128, 192], choices=sorted(SECURITY_LEVELS),
+                        help='security levels to compare, rsa keys above 7680 bits take minutes to generate')
+    parser.add_argument('--message-size', type=int, default=256)
+    parser.add_argument('--duration', type=float, default=1.0, help='seconds to run each operation for')
+
+    return parser.parse_args(argv)
+
+
+def main(argv):
+    args = _parse_args(argv[1:])
+    data = os.urandom(args.message_size)
+
+    print('%6s %-10s %12s %12s %12s %8s' % ('level', 'key', 'generate s', 'sign/s', 'verify/s', 'sig B'))
+    for level in args.levels:
+        crv, rsa_size = SECURITY_LEVELS[level]
+        for name, generate in [(crv, lambda: EcKey.generate(crv=crv)),
+                               ('RSA-%d' % rsa_size, lambda: RsaKey.generate(size=rsa_size))]:
+            start = time.perf_counter()
+            key = generate()
+            generate_s = time.perf_counter() - start
+
+            signature = key.sign(data)
+            sign = _ops_per_sec(lambda: key.sign(data), args.duration)
+            verify = _ops_per_sec(lambda: key.verify(signature, data), args.duration)
+            print('%6d %-10s %12.3f %12.0f %12.0f %8d' % (level, name, generate_s, sign, verify, len(signature)))
+
+
+if __name__ == '__main__':
+    main(sys.argv)
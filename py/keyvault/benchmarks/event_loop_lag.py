@@ -0,0 +1,83 @@
+import argparse
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from keyvault.crytpography import AsyncKey, RsaKey
+
+
+async def _measure_lag(interval, stop, lags):
+    # the lag is how late each tick wakes up past its scheduled interval
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - start - interval)
+
+
+async def _run(key, op, count, interval):
+    lags = []
+    stop = asyncio.Event()
+    ticker = asyncio.ensure_future(_measure_lag(interval, stop, lags))
+    await asyncio.sleep(0)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(op(key) for _ in range(count)))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await ticker
+    return elapsed, sorted(lags) or [0.0]
+
+
+def _percentile(values, p):
+    return values[min(int(len(values) * p), len(values) - 1)]
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument('--count', type=int, default=2000, help='the number of concurrent operations')
+    parser.add_argument('--size', type=int, default=2048, help='the rsa key size')
+    parser.add_argument('--op', choices=['sign', 'unwrap_key'], default='sign')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--max-concurrency', type=int, default=16)
+    parser.add_argument('--interval', type=float, default=0.001, help='the lag probe interval in seconds')
+
+    return parser.parse_args(argv)
+
+
+def main(argv):
+    args = _parse_args(argv[1:])
+    key = RsaKey.generate(size=args.size)
+    data = os.urandom(32)
+    arg = key.wrap_key(data) if args.op == 'unwrap_key' else data
+
+    class _BlockingKey(object):
+        # calls the synchronous key directly on the event loop, as a coroutine would without the facade
+        async def sign(self, data):
+            return key.sign(data)
+
+        async def unwrap_key(self, encrypted_key):
+            return key.unwrap_key(encrypted_key)
+
+    def op(k):
+        return getattr(k, args.op)(arg)
+
+    print('%-10s %10s %12s %12s %12s' % ('mode', 'op/s', 'p50 lag ms', 'p99 lag ms', 'max lag ms'))
+    with ThreadPoolExecutor(args.workers) as threads, \
+            AsyncKey(key, processes=args.workers, max_concurrency=args.max_concurrency) as process_key:
+        modes = [
+            ('blocking', _BlockingKey()),
+            ('thread', AsyncKey(key, executor=threads, max_concurrency=args.max_concurrency)),
+            ('process', process_key)
+        ]
+        for name, async_key in modes:
+            elapsed, lags = asyncio.run(_run(async_key, op, args.count, args.interval))
+            print('%-10s %10.0f %12.3f %12.3f %12.3f' % (name, args.count / elapsed, _percentile(lags, 0.5) * 1e3,
+                                                         _percentile(lags, 0.99) * 1e3, lags[-1] * 1e3))
+
+
+if __name__ == '__main__':
+    main(sys.argv)
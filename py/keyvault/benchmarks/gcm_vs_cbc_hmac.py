@@ -0,0 +1,63 @@
+import argparse
+import itertools
+import os
+import sys
+import time
+
+from keyvault.crytpography import Algorithm
+
+ALGORITHMS = ['A128GCM', 'A128CBC-HS256', 'A192GCM', 'A192CBC-HS384', 'A256GCM', 'A256CBC-HS512']
+SIZES = [1024, 1024 * 1024, 1024 * 1024 * 1024]
+_CHUNK_SIZE = 1024 * 1024
+
+
+class _NullSink(object):
+    def write(self, data):
+        pass
+
+
+def _encrypt(algorithm, key, iv, data, size):
+    encryptor = algorithm.create_encryptor(key, iv, b'')
+    if size <= _CHUNK_SIZE:
+        encryptor.transform(data[:size])
+    else:
+        # large payloads are streamed from a repeated chunk so the benchmark doesn't need the payload in memory
+        chunks = itertools.repeat(data, size // _CHUNK_SIZE)
+        encryptor.transform_stream(chunks, _NullSink(), _CHUNK_SIZE, zero_copy=True)
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES, help='payload sizes in bytes')
+    parser.add_argument('--algorithms', nargs='+', default=ALGORITHMS)
+    parser.add_argument('--min-time', type=float, default=1.0, help='minimum seconds to run each measurement')
+
+    return parser.parse_args(argv)
+
+
+def main(argv):
+    args = _parse_args(argv[1:])
+    data = os.urandom(_CHUNK_SIZE)
+
+    print('%-16s %12s %10s %12s' % ('algorithm', 'size', 'MB/s', 'ops/s'))
+    for size in args.sizes:
+        for name in args.algorithms:
+            algorithm = Algorithm.resolve(name)
+            key = os.urandom(algorithm.key_size_in_bytes)
+            iv = os.urandom(algorithm.iv_size_in_bytes)
+
+            count = 0
+            start = time.perf_counter()
+            while True:
+                _encrypt(algorithm, key, iv, data, size)
+                count += 1
+                elapsed = time.perf_counter() - start
+                if elapsed >= args.min_time:
+                    break
+
+            print('%-16s %12d %10.1f %12.1f' % (name, size, size * count / elapsed / 1024 / 1024, count / elapsed))
+
+
+if __name__ == '__main__':
+    main(sys.argv)
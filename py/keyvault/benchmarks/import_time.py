@@ -0,0 +1,90 @@
+import argparse
+import os
+import subprocess
+import sys
+
+SCENARIOS = [
+    ('import package', 'import keyvault.crytpography'),
+    ('resolve A128CBC', 'from keyvault.crytpography import Algorithm; Algorithm.resolve("A128CBC")'),
+    ('resolve A256GCM', 'from keyvault.crytpography import Algorithm; Algorithm.resolve("A256GCM")'),
+    ('resolve RS256', 'from keyvault.crytpography import Algorithm; Algorithm.resolve("RS256")'),
+    ('RsaKey', 'from keyvault.crytpography import RsaKey'),
+    ('all exports', 'from keyvault.crytpography import *')
+]
+
+# times the statement and reports the algorithm modules it loaded, in a fresh interpreter so nothing is cached
+_TIMED = """
+import sys, time
+start = time.perf_counter()
+%s
+elapsed = time.perf_counter() - start
+print(elapsed * 1000.0)
+print(' '.join(m.rsplit('.', 1)[1] for m in sys.modules if '.crytpography.algorithms.' in m))
+"""
+
+
+def _run(args, statement):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [_root(), os.environ.get('PYTHONPATH')])))
+    return subprocess.run([sys.executable] + args + ['-c', statement], env=env, check=True, stdout=subprocess.PIPE,
+                          stderr=subprocess.PIPE, universal_newlines=True)
+
+
+def _import_time(statement):
+    # returns the milliseconds taken to run statement in a fresh interpreter and the algorithm modules it loaded
+    elapsed, algorithms = _run([], _TIMED % statement).stdout.splitlines()
+    return float(elapsed), algorithms.split()
+
+
+def _print_importtime(statement, count):
+    # prints the modules with the largest self import time reported by python -X importtime. modules imported with
+    # importlib, as the package's lazy exports and Algorithm.resolve do, are timed but not listed by -X importtime
+    modules = []
+    for line in _run(['-X', 'importtime'], statement).stderr.splitlines():
+        parts = line.split('|')
+        if len(parts) == 3 and parts[0].split(':')[-1].strip().isdigit():
+            modules.append((int(parts[0].split(':')[-1]), int(parts[1]), parts[2].strip()))
+    print('\n%s' % statement)
+    print('%10s %12s  %s' % ('self us', 'cumulative', 'module'))
+    for self_us, cumulative_us, module in sorted(modules, reverse=True)[:count]:
+        print('%10d %12d  %s' % (self_us, cumulative_us, module))
+
+
+def _root():
+    return os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument('--repeat', type=int, default=5, help='the best of repeat runs is reported')
+    parser.add_argument('--detail', type=int, default=0, help='list the slowest modules imported by each scenario')
+    parser.add_argument('--max-ms', type=float, default=None,
+                        help='exit with an error if importing the package alone takes longer than this')
+
+    return parser.parse_args(argv)
+
+
+def main(argv):
+    args = _parse_args(argv[1:])
+
+    print('%-20s %10s  %s' % ('scenario', 'import ms', 'algorithm modules loaded'))
+    package_ms = None
+    for name, statement in SCENARIOS:
+        runs = [_import_time(statement) for _ in range(args.repeat)]
+        best_ms = min(ms for ms, _ in runs)
+        if package_ms is None:
+            package_ms = best_ms
+        print('%-20s %10.1f  %s' % (name, best_ms, ', '.join(sorted(runs[0][1])) or '-'))
+
+    if args.detail:
+        for _, statement in SCENARIOS:
+            _print_importtime(statement, args.detail)
+
+    if args.max_ms is not None and package_ms > args.max_ms:
+        print('importing the package took %.1fms, more than the %.1fms limit' % (package_ms, args.max_ms))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
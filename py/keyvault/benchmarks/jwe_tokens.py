@@ -0,0 +1,56 @@
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from keyvault.crytpography import JweDecoder, JweEncoder, RsaKey
+
+ENCRYPTION_ALGORITHMS = ['A128CBC-HS256', 'A256CBC-HS512', 'A128GCM', 'A256GCM']
+
+
+def _tokens_per_sec(func, count):
+    start = time.perf_counter()
+    func()
+    return count / (time.perf_counter() - start)
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument('--count', type=int, default=20000)
+    parser.add_argument('--payload-size', type=int, default=128)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--enc', nargs='+', default=ENCRYPTION_ALGORITHMS)
+
+    return parser.parse_args(argv)
+
+
+def main(argv):
+    args = _parse_args(argv[1:])
+    payloads = [os.urandom(args.payload_size) for _ in range(args.count)]
+    keys = [('A256KW', os.urandom(32)), ('RSA-OAEP', RsaKey.generate(kid='rsa'))]
+
+    print('%-10s %-14s %12s %12s %12s %12s' % ('alg', 'enc', 'encode/s', 'decode/s', 'cached/s', 'many/s'))
+    for alg, key in keys:
+        # rsa private key operations are slow, so fewer tokens are used to keep the run time reasonable
+        count = args.count if alg != 'RSA-OAEP' else max(1, args.count // 20)
+        for enc in args.enc:
+            encoder = JweEncoder(key, alg, enc, kid='kek')
+            tokens = []
+            encode = _tokens_per_sec(lambda: tokens.extend(encoder.encode_many(payloads[:count])), count)
+
+            # a fresh decoder has to unwrap each content encryption key, decoding the same tokens again hits the cache
+            decoder = JweDecoder({'kek': key})
+            decode = _tokens_per_sec(lambda: [decoder.decode(token) for token in tokens], count)
+            cached = _tokens_per_sec(lambda: [decoder.decode(token) for token in tokens], count)
+
+            with ThreadPoolExecutor(args.workers) as executor:
+                decoder = JweDecoder({'kek': key})
+                many = _tokens_per_sec(lambda: decoder.decode_many(tokens, executor), count)
+
+            print('%-10s %-14s %12.0f %12.0f %12.0f %12.0f' % (alg, enc, encode, decode, cached, many))
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,53 @@
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+from itertools import islice
+
+from keyvault.crytpography import Algorithm, KekRotation, RsaKey, read_wrapped_keys, write_wrapped_keys
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument('--count', type=int, default=200000)
+    parser.add_argument('--rsa-count', type=int, default=5000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, os.cpu_count() or 1])
+    parser.add_argument('--batch-size', type=int, default=1024)
+
+    return parser.parse_args(argv)
+
+
+def main(argv):
+    args = _parse_args(argv[1:])
+    directory = tempfile.mkdtemp()
+    try:
+        old_kek = os.urandom(32)
+        wrap = Algorithm.resolve('A256KW').create_encryptor(old_kek).transform
+        source = os.path.join(directory, 'wrapped')
+        write_wrapped_keys(source, (wrap(os.urandom(32)) for _ in range(max(args.count, args.rsa_count))))
+
+        rotations = [('A256KW -> A256KW', os.urandom(32), args.count),
+                     ('A256KW -> RSA-OAEP', RsaKey.generate(), args.rsa_count)]
+
+        print('%-20s %8s %10s %12s %10s' % ('rotation', 'workers', 'keys', 'keys/s', 'seconds'))
+        for name, new_kek, count in rotations:
+            for workers in sorted(set(args.workers)):
+                output = os.path.join(directory, 'rotated')
+                checkpoint = output + '.checkpoint'
+                for path in (output, checkpoint):
+                    if os.path.exists(path):
+                        os.remove(path)
+
+                keys = islice(read_wrapped_keys(source), count)
+                rotation = KekRotation(old_kek, new_kek, checkpoint, max_workers=workers, batch_size=args.batch_size)
+                stats = rotation.run(keys, output)
+                print('%-20s %8d %10d %12.0f %10.2f' % (name, workers, stats['processed'], stats['keys_per_sec'],
+                                                         stats['elapsed']))
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,70 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+from keyvault.crytpography import Algorithm, RsaKey, metrics
+
+
+def _per_op_us(func, count):
+    start = time.perf_counter()
+    for _ in range(count):
+        func()
+    return (time.perf_counter() - start) / count * 1e6
+
+
+def _operations(message_size):
+    data = os.urandom(message_size)
+    iv = os.urandom(16)
+    rsa_key = RsaKey.generate()
+    signature = rsa_key.sign(data)
+
+    aes_cbc = Algorithm.resolve('A128CBC')
+    aes_key = os.urandom(aes_cbc.key_size_in_bytes)
+    cbc_hmac = Algorithm.resolve('A128CBC-HS256')
+    cbc_hmac_key = os.urandom(cbc_hmac.key_size_in_bytes)
+    gcm = Algorithm.resolve('A128GCM')
+    gcm_key = os.urandom(gcm.key_size_in_bytes)
+
+    return [
+        ('A128CBC encrypt', lambda: aes_cbc.create_encryptor(aes_key, iv).transform(data)),
+        ('A128CBC-HS256 encrypt', lambda: cbc_hmac.create_encryptor(cbc_hmac_key, iv, b'header').transform(data)),
+        ('A128GCM encrypt', lambda: gcm.create_encryptor(gcm_key, iv[:12], b'header').transform(data)),
+        ('RS256 sign', lambda: rsa_key.sign(data)),
+        ('RS256 verify', lambda: rsa_key.verify(signature, data))
+    ]
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument('--count', type=int, default=20000)
+    parser.add_argument('--message-size', type=int, default=200)
+    parser.add_argument('--snapshot', action='store_true', help='print the metrics snapshot when done')
+
+    return parser.parse_args(argv)
+
+
+def main(argv):
+    args = _parse_args(argv[1:])
+
+    print('%-24s %12s %12s %12s %10s' % ('operation', 'disabled us', 'enabled us', 'overhead us', 'overhead'))
+    for name, op in _operations(args.message_size):
+        count = args.count // 20 if name.startswith('RS256 sign') else args.count
+        op()
+        disabled = _per_op_us(op, count)
+        metrics.enable()
+        try:
+            enabled = _per_op_us(op, count)
+        finally:
+            metrics.disable()
+        print('%-24s %12.2f %12.2f %12.2f %9.1f%%' % (name, disabled, enabled, enabled - disabled,
+                                                      (enabled - disabled) / disabled * 100))
+
+    if args.snapshot:
+        print(json.dumps(metrics.snapshot(), indent=2))
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,47 @@
+import argparse
+import os
+import sys
+import time
+
+from keyvault.crytpography import Algorithm
+
+
+def _time(func, *args, **kwargs):
+    start = time.perf_counter()
+    func(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument('--size', type=int, default=256, help='payload size in MB')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8, 16])
+    parser.add_argument('--algorithm', default='A256CBC-HS512')
+
+    return parser.parse_args(argv)
+
+
+def main(argv):
+    args = _parse_args(argv[1:])
+    algorithm = Algorithm.resolve(args.algorithm)
+    key = os.urandom(algorithm.key_size_in_bytes)
+    iv = os.urandom(16)
+    authenticated = args.algorithm.find('-HS') > 0
+    create_args = (key, iv, b'') if authenticated else (key, iv)
+
+    encryptor = algorithm.create_encryptor(*create_args)
+    cipher_text = encryptor.transform(os.urandom(args.size * 1024 * 1024))
+    if authenticated:
+        create_args += (bytes(encryptor.tag()),)
+
+    serial = _time(algorithm.create_decryptor(*create_args).transform, cipher_text)
+    print('%-8s %10s %10s' % ('workers', 'MB/s', 'speedup'))
+    print('%-8s %10.1f %10.2f' % ('serial', args.size / serial, 1.0))
+    for workers in args.workers:
+        elapsed = _time(algorithm.create_decryptor(*create_args).transform_parallel, cipher_text, max_workers=workers)
+        print('%-8d %10.1f %10.2f' % (workers, args.size / elapsed, serial / elapsed))
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,217 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+import cryptography
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives.asymmetric import ec
+
+from keyvault.crytpography import RsaKey, SymmetricEncryptionAlgorithm, AuthenticatedSymmetricEncryptionAlgorithm, \
+    SignatureAlgorithm
+from keyvault.crytpography.algorithm import _load_all
+
+SIZES = [64, 1024, 16 * 1024, 1024 * 1024]
+RSA_SIZES = [2048, 3072, 4096]
+_CURVES = {32: ec.SECP256R1, 48: ec.SECP384R1, 64: ec.SECP521R1}
+
+
+def _measure(func, min_time, latencies=False):
+    # runs func repeatedly for at least min_time seconds, returning ops/s and optionally the p50 and p99 latency in us
+    samples = []
+    start = time.perf_counter()
+    elapsed = 0
+    while elapsed < min_time or len(samples) < 3:
+        op_start = time.perf_counter()
+        func()
+        now = time.perf_counter()
+        samples.append(now - op_start)
+        elapsed = now - start
+
+    result = {'ops_per_sec': len(samples) / elapsed}
+    if latencies:
+        samples.sort()
+        result['p50_us'] = samples[len(samples) // 2] * 1e6
+        result['p99_us'] = samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1e6
+    return result
+
+
+def _throughput(func, size, min_time):
+    result = _measure(func, min_time)
+    result['mb_per_sec'] = result['ops_per_sec'] * size / 1024 / 1024
+    return result
+
+
+def _bench_symmetric(algorithm, args, results):
+    name = algorithm.name()
+    key = os.urandom(algorithm.key_size_in_bytes)
+    iv = os.urandom(getattr(algorithm, 'iv_size_in_bytes', 16))
+    authenticated = isinstance(algorithm, AuthenticatedSymmetricEncryptionAlgorithm)
+    create_args = (key, iv, b'') if authenticated else (key, iv)
+
+    results['%s/create_encryptor' % name] = _measure(lambda: algorithm.create_encryptor(*create_args),
+                                                     args.min_time, latencies=True)
+
+    for size in args.sizes:
+        data = os.urandom(size)
+        results['%s/encrypt/%d' % (name, size)] = _throughput(
+            lambda: algorithm.create_encryptor(*create_args).transform(data), size, args.min_time)
+
+        encryptor = algorithm.create_encryptor(*create_args)
+        cipher_text = encryptor.transform(data)
+        decrypt_args = create_args + (bytes(encryptor.tag()),) if authenticated else create_args
+        results['%s/decrypt/%d' % (name, size)] = _throughput(
+            lambda: algorithm.create_decryptor(*decrypt_args).transform(cipher_text), size, args.min_time)
+
+
+def _bench_key_wrap(algorithm, args, results):
+    name = algorithm.name()
+    key = os.urandom(algorithm.key_size_in_bytes)
+    data_key = os.urandom(32)
+    wrapped = algorithm.create_encryptor(key).transform(data_key)
+
+    results['%s/wrap' % name] = _measure(lambda: algorithm.create_encryptor(key).transform(data_key),
+                                         args.min_time, latencies=True)
+    results['%s/unwrap' % name] = _measure(lambda: algorithm.create_decryptor(key).transform(wrapped),
+                                           args.min_time, latencies=True)
+
+
+def _bench_rsa(algorithm, rsa_keys, args, results):
+    name = algorithm.name()
+    data = os.urandom(32)
+    for size, key in sorted(rsa_keys.items()):
+        if isinstance(algorithm, SignatureAlgorithm):
+            signature = key.sign(data, algorithm=name)
+            results['%s/sign/%d' % (name, size)] = _measure(lambda: key.sign(data, algorithm=name),
+                                                            args.min_time, latencies=True)
+            results['%s/verify/%d' % (name, size)] = _measure(lambda: key.verify(signature, data, algorithm=name),
+                                                              args.min_time, latencies=True)
+        else:
+            wrapped = key.wrap_key(data, algorithm=name)
+            results['%s/wrap/%d' % (name, size)] = _measure(lambda: key.wrap_key(data, algorithm=name),
+                                                            args.min_time, latencies=True)
+            results['%s/unwrap/%d' % (name, size)] = _measure(lambda: key.unwrap_key(wrapped, algorithm=name),
+                                                              args.min_time, latencies=True)
+
+
+def _bench_ecdsa(algorithm, args, results):
+    name = algorithm.name()
+    curve = _CURVES[algorithm._hash_algo.digest_size]
+    key = ec.generate_private_key(curve(), default_backend())
+    data = os.urandom(32)
+    signer = algorithm.create_signature_transform(key)
+    verifier = algorithm.create_signature_transform(key.public_key())
+    signature = signer.sign(data)
+
+    results['%s/sign' % name] = _measure(lambda: signer.sign(data), args.min_time, latencies=True)
+    results['%s/verify' % name] = _measure(lambda: verifier.verify(signature, data), args.min_time, latencies=True)
+
+
+def run(args):
+    rsa_keys = dict((size, RsaKey.generate(size=size)) for size in args.rsa_sizes)
+    results = {}
+
+    for name, cls in sorted(_load_all().items()):
+        if args.algorithms and name not in args.algorithms:
+            continue
+
+        algorithm = cls()
+        if isinstance(algorithm, (SymmetricEncryptionAlgorithm, AuthenticatedSymmetricEncryptionAlgorithm)):
+            _bench_symmetric(algorithm, args, results)
+        elif name in RsaKey._supported_encryption_algorithms + RsaKey._supported_signature_algorithms:
+            _bench_rsa(algorithm, rsa_keys, args, results)
+        elif isinstance(algorithm, SignatureAlgorithm):
+            _bench_ecdsa(algorithm, args, results)
+        else:
+            _bench_key_wrap(algorithm, args, results)
+
+        sys.stderr.write('%s done\n' % name)
+
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cryptography': cryptography.__version__,
+            'time': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+        },
+        'results': results
+    }
+
+
+def compare(baseline, current, threshold):
+    # returns the benchmarks whose ops/s dropped by more than threshold, a fraction, relative to the baseline
+    regressions = []
+    for name, result in sorted(current['results'].items()):
+        base = baseline['results'].get(name)
+        if not base:
+            continue
+        change = result['ops_per_sec'] / base['ops_per_sec'] - 1
+        if change < -threshold:
+            regressions.append((name, base['ops_per_sec'], result['ops_per_sec'], change))
+    return regressions
+
+
+def _print_results(results):
+    print('%-40s %14s %12s %12s %12s' % ('benchmark', 'ops/s', 'MB/s', 'p50 us', 'p99 us'))
+    for name, result in sorted(results['results'].items()):
+        print('%-40s %14.1f %12s %12s %12s' % (name, result['ops_per_sec'],
+                                               '%.1f' % result['mb_per_sec'] if 'mb_per_sec' in result else '',
+                                               '%.1f' % result['p50_us'] if 'p50_us' in result else '',
+                                               '%.1f' % result['p99_us'] if 'p99_us' in result else ''))
+
+
+def _print_regressions(regressions, threshold):
+    if not regressions:
+        print('no regressions beyond %.0f%%' % (threshold * 100))
+        return
+    print('%-40s %14s %14s %8s' % ('regression', 'baseline ops/s', 'current ops/s', 'change'))
+    for name, base, current, change in regressions:
+        print('%-40s %14.1f %14.1f %7.1f%%' % (name, base, current, change * 100))
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser()
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+
+    run_parser = commands.add_parser('run', help='run the benchmarks for every registered algorithm')
+    run_parser.add_argument('--output', type=argparse.FileType('w'), help='the file to write the json results to')
+    run_parser.add_argument('--baseline', type=argparse.FileType('r'), help='json results to compare against')
+    run_parser.add_argument('--threshold', type=float, default=0.1, help='the fractional slowdown to flag')
+    run_parser.add_argument('--sizes', type=int, nargs='+', default=SIZES, help='payload sizes in bytes')
+    run_parser.add_argument('--rsa-sizes', type=int, nargs='+', default=RSA_SIZES)
+    run_parser.add_argument('--algorithms', nargs='+', help='limit the run to these algorithms')
+    run_parser.add_argument('--min-time', type=float, default=0.5, help='minimum seconds to run each benchmark')
+
+    compare_parser = commands.add_parser('compare', help='compare two sets of json results')
+    compare_parser.add_argument('baseline', type=argparse.FileType('r'))
+    compare_parser.add_argument('current', type=argparse.FileType('r'))
+    compare_parser.add_argument('--threshold', type=float, default=0.1, help='the fractional slowdown to flag')
+
+    return parser.parse_args(argv)
+
+
+def main(argv):
+    args = _parse_args(argv[1:])
+
+    if args.command == 'run':
+        results = run(args)
+        _print_results(results)
+        if args.output:
+            json.dump(results, args.output, indent=2, sort_keys=True)
+        if not args.baseline:
+            return 0
+        baseline = json.load(args.baseline)
+    else:
+        baseline = json.load(args.baseline)
+        results = json.load(args.current)
+
+    regressions = compare(baseline, results, args.threshold)
+    _print_regressions(regressions, args.threshold)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -0,0 +1,45 @@
+import argparse
+import os
+import sys
+import time
+
+from keyvault.crytpography import RsaKey
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument('--count', type=int, default=10000, help='the number of data keys to wrap and unwrap')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--size', type=int, default=2048, help='the rsa key size')
+
+    return parser.parse_args(argv)
+
+
+def main(argv):
+    args = _parse_args(argv[1:])
+    key = RsaKey.generate(size=args.size)
+    data_keys = [os.urandom(32) for _ in range(args.count)]
+    wrapped = [key.wrap_key(k) for k in data_keys]
+
+    start = time.perf_counter()
+    for w in wrapped:
+        key.unwrap_key(w)
+    elapsed = time.perf_counter() - start
+
+    print('%-8s %12s %12s' % ('workers', 'unwrap op/s', 'wrap op/s'))
+    print('%-8s %12.0f %12s' % ('single', args.count / elapsed, '-'))
+    for workers in args.workers:
+        start = time.perf_counter()
+        list(key.unwrap_keys(wrapped, max_workers=workers))
+        unwrap = time.perf_counter() - start
+
+        start = time.perf_counter()
+        list(key.wrap_keys(data_keys, max_workers=workers))
+        wrap = time.perf_counter() - start
+
+        print('%-8d %12.0f %12.0f' % (workers, args.count / unwrap, args.count / wrap))
+
+
+if __name__ == '__main__':
+    main(sys.argv)
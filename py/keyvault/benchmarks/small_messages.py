@@ -0,0 +1,48 @@
+import argparse
+import os
+import sys
+import time
+
+from keyvault.crytpography import Algorithm
+
+
+def _per_message_us(func, count):
+    start = time.perf_counter()
+    for _ in range(count):
+        func()
+    return (time.perf_counter() - start) / count * 1e6
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument('--count', type=int, default=100000)
+    parser.add_argument('--message-size', type=int, default=200)
+    parser.add_argument('--algorithms', nargs='+',
+                        default=['A128CBC', 'A256CBC', 'A128CBC-HS256', 'A192CBC-HS384', 'A256CBC-HS512'])
+
+    return parser.parse_args(argv)
+
+
+def main(argv):
+    args = _parse_args(argv[1:])
+    data = os.urandom(args.message_size)
+    iv = os.urandom(16)
+    auth_data = b'header'
+
+    print('%-16s %14s %14s %8s' % ('algorithm', 'uncached us', 'cached us', 'speedup'))
+    for name in args.algorithms:
+        algorithm = Algorithm.resolve(name)
+        key = os.urandom(algorithm.key_size_in_bytes)
+        create_args = (key, iv, auth_data) if '-HS' in name else (key, iv)
+
+        # resolving the algorithm for every message creates a new, empty, context cache each time as before
+        uncached = _per_message_us(lambda: Algorithm.resolve(name).create_encryptor(*create_args).transform(data),
+                                   args.count)
+        cached = _per_message_us(lambda: algorithm.create_encryptor(*create_args).transform(data), args.count)
+
+        print('%-16s %14.2f %14.2f %8.2f' % (name, uncached, cached, uncached / cached))
+
+
+if __name__ == '__main__':
+    main(sys.argv)
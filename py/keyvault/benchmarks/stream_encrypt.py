@@ -0,0 +1,66 @@
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+
+from keyvault.crytpography import Algorithm
+
+ALGORITHMS = ['A128CBC-HS256', 'A192CBC-HS384', 'A256CBC-HS512']
+SIZES_MB = [1, 16, 128, 512]
+
+
+def _write_input(path, size, chunk_size=1024 * 1024):
+    with open(path, 'wb') as f:
+        remaining = size
+        while remaining:
+            n = min(chunk_size, remaining)
+            f.write(os.urandom(n))
+            remaining -= n
+
+
+def _run(alg_name, path, chunk_size):
+    algorithm = Algorithm.resolve(alg_name)
+    key = os.urandom(algorithm.key_size_in_bytes)
+    iv = os.urandom(16)
+    encryptor = algorithm.create_encryptor(key, iv, b'')
+
+    start = time.perf_counter()
+    with open(path, 'rb') as f_in, open(os.devnull, 'wb') as f_out:
+        encryptor.transform_stream(f_in, f_out, chunk_size, zero_copy=True)
+    elapsed = time.perf_counter() - start
+
+    # ru_maxrss is reported in kilobytes on linux, this is run in a fresh process so the peak is for this run only
+    return elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES_MB, help='input sizes in MB')
+    parser.add_argument('--chunk-size', type=int, default=64 * 1024, help='chunk size in bytes')
+    parser.add_argument('--algorithms', nargs='+', default=ALGORITHMS)
+
+    return parser.parse_args(argv)
+
+
+def main(argv):
+    args = _parse_args(argv[1:])
+    ctx = multiprocessing.get_context('spawn')
+
+    print('%-16s %10s %10s %12s' % ('algorithm', 'size MB', 'MB/s', 'peak RSS KB'))
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            path = os.path.join(tmp, 'input_%d' % size)
+            _write_input(path, size * 1024 * 1024)
+            for alg_name in args.algorithms:
+                with ctx.Pool(1) as pool:
+                    elapsed, rss = pool.apply(_run, (alg_name, path, args.chunk_size))
+                print('%-16s %10d %10.1f %12d' % (alg_name, size, size / elapsed, rss))
+            os.remove(path)
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,73 @@
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from keyvault.crytpography import RsaKey
+
+
+def _read_and_sign(key, path):
+    with open(path, 'rb') as f:
+        return key.sign(f.read())
+
+
+def _measure(func, repeat):
+    func()
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    elapsed = (time.perf_counter() - start) / repeat
+
+    # the peak traced memory is what's allocated to sign, memory mapped pages are backed by the file not the heap
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument('--size', type=int, default=256, help='the size of each file to sign in MB')
+    parser.add_argument('--files', type=int, default=8, help='the number of files signed at once by sign_streams')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, os.cpu_count() or 1])
+    parser.add_argument('--repeat', type=int, default=3)
+
+    return parser.parse_args(argv)
+
+
+def main(argv):
+    args = _parse_args(argv[1:])
+    key = RsaKey.generate()
+    directory = tempfile.mkdtemp()
+    try:
+        paths = []
+        for i in range(args.files):
+            path = os.path.join(directory, 'artifact%d' % i)
+            with open(path, 'wb') as f:
+                for _ in range(args.size):
+                    f.write(os.urandom(1024 * 1024))
+            paths.append(path)
+
+        gb = args.size / 1024.0
+        print('%-32s %10s %14s' % ('operation', 'GB/s', 'peak alloc MB'))
+        for name, func in [('read + sign', lambda: _read_and_sign(key, paths[0])),
+                           ('sign_stream', lambda: key.sign_stream(paths[0]))]:
+            elapsed, peak = _measure(func, args.repeat)
+            print('%-32s %10.2f %14.1f' % (name, gb / elapsed, peak / 1024.0 / 1024.0))
+
+        for workers in sorted(set(args.workers)):
+            elapsed, peak = _measure(lambda: key.sign_streams(paths, max_workers=workers), args.repeat)
+            print('%-32s %10.2f %14.1f' % ('sign_streams %d files %d workers' % (args.files, workers),
+                                           gb * args.files / elapsed, peak / 1024.0 / 1024.0))
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,49 @@
+import argparse
+import os
+import sys
+import time
+
+from keyvault.crytpography import SymmetricKey
+
+
+def _us_per_op(func, count):
+    func()
+    start = time.perf_counter()
+    for _ in range(count):
+        func()
+    return (time.perf_counter() - start) / count * 1e6
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument('--count', type=int, default=20000)
+    parser.add_argument('--message-size', type=int, default=256)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[128, 192, 256, 384, 512], help='key sizes in bits')
+
+    return parser.parse_args(argv)
+
+
+def main(argv):
+    args = _parse_args(argv[1:])
+    data = os.urandom(args.message_size)
+    data_key = os.urandom(32)
+
+    print('%-16s %-6s %12s %12s' % ('algorithm', 'key', 'encrypt us', 'decrypt us'))
+    for size in args.sizes:
+        key = SymmetricKey.generate(size=size)
+        for algorithm in key.supported_encryption_algorithms:
+            cipher_text = key.encrypt(data, algorithm=algorithm)
+            encrypt = _us_per_op(lambda: key.encrypt(data, algorithm=algorithm), args.count)
+            decrypt = _us_per_op(lambda: key.decrypt(cipher_text, algorithm=algorithm), args.count)
+            print('%-16s %-6d %12.2f %12.2f' % (algorithm, size, encrypt, decrypt))
+
+        for algorithm in key.supported_key_wrap_algorithms:
+            wrapped = key.wrap_key(data_key, algorithm=algorithm)
+            wrap = _us_per_op(lambda: key.wrap_key(data_key, algorithm=algorithm), args.count)
+            unwrap = _us_per_op(lambda: key.unwrap_key(wrapped, algorithm=algorithm), args.count)
+            print('%-16s %-6d %12.2f %12.2f' % (algorithm, size, wrap, unwrap))
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,84 @@
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+from keyvault.crytpography import Algorithm
+
+ALGORITHMS = ['A128CBC', 'A256CBC', 'A128CBC-HS256', 'A256CBC-HS512']
+
+
+def _update(encryptor, chunks, out, results):
+    # the outputs are kept in results, so they're still allocated when the allocations are counted
+    results[:] = [encryptor.update(chunk) for chunk in chunks]
+    results.append(encryptor.finalize())
+
+
+def _update_into(encryptor, chunks, out, results):
+    for chunk in chunks:
+        encryptor.update_into(chunk, out)
+    encryptor.finalize_into(out)
+
+
+def _measure(func, create_encryptor, chunks, out, repeat):
+    func(create_encryptor(), chunks, out, [])
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(create_encryptor(), chunks, out, [])
+    elapsed = time.perf_counter() - start
+
+    # the blocks traced after the calls but not before are the allocations the calls made for their output, counted
+    # from the snapshot statistics and averaged over the update and finalize calls
+    tracemalloc.start()
+    encryptor = create_encryptor()
+    results = []
+    before = tracemalloc.take_snapshot()
+    func(encryptor, chunks, out, results)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocations = sum(stat.count_diff for stat in after.compare_to(before, 'filename'))
+    return elapsed, allocations / (len(chunks) + 1.0)
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument('--size', type=int, default=16, help='the size of the data to encrypt in MB')
+    parser.add_argument('--chunk-sizes', type=int, nargs='+', default=[4096, 64 * 1024, 1024 * 1024])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--algorithms', nargs='+', default=ALGORITHMS)
+
+    return parser.parse_args(argv)
+
+
+def main(argv):
+    args = _parse_args(argv[1:])
+    size = args.size * 1024 * 1024
+    data = memoryview(os.urandom(size))
+    iv = os.urandom(16)
+
+    print('%-16s %10s %12s %12s %18s %18s' % ('algorithm', 'chunk', 'update MB/s', 'into MB/s', 'update allocs/call',
+                                              'into allocs/call'))
+    for name in args.algorithms:
+        algorithm = Algorithm.resolve(name)
+        key = os.urandom(algorithm.key_size_in_bytes)
+        create_args = (key, iv, b'header') if '-HS' in name else (key, iv)
+
+        def create_encryptor():
+            return algorithm.create_encryptor(*create_args)
+
+        for chunk_size in args.chunk_sizes:
+            chunks = [data[i:i + chunk_size] for i in range(0, size, chunk_size)]
+            out = bytearray(chunk_size + 2 * algorithm.block_size_in_bytes)
+
+            update, update_allocations = _measure(_update, create_encryptor, chunks, out, args.repeat)
+            into, into_allocations = _measure(_update_into, create_encryptor, chunks, out, args.repeat)
+            mb = args.size * args.repeat
+            print('%-16s %10d %12.1f %12.1f %18.2f %18.2f' % (name, chunk_size, mb / update, mb / into,
+                                                              update_allocations, into_allocations))
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -1,12 +1,55 @@
-from .algorithm import Algorithm, EncryptionAlgorithm, SymmetricEncryptionAlgorithm, \
-    AuthenticatedSymmetricEncryptionAlgorithm, SignatureAlgorithm
-from .key import Key
-from .rsa_key import RsaKey
-from .transform import CryptoTransform, BlockCryptoTransform, AuthenticatedCryptoTransform, SignatureTransform
+import importlib
 
-__all__ = {
+
+# the public names and the modules defining them. a module is only imported when one of its names is first used, so
+# short lived processes which only need a few algorithms don't pay to import the whole package
+_EXPORTS = {
+    'Key': '.key',
+    'RsaKey': '.rsa_key',
+    'EcKey': '.ec_key',
+    'SymmetricKey': '.symmetric_key',
+    'JsonWebKey': '.jwk',
+    'Algorithm': '.algorithm',
+    'EncryptionAlgorithm': '.algorithm',
+    'SymmetricEncryptionAlgorithm': '.algorithm',
+    'AuthenticatedCryptoTransform': '.transform',
+    'SignatureAlgorithm': '.algorithm',
+    'CryptoTransform': '.transform',
+    'BlockCryptoTransform': '.transform',
+    'AuthenticatedSymmetricEncryptionAlgorithm': '.algorithm',
+    'SignatureTransform': '.transform',
+    'SegmentedReader': '.container',
+    'encrypt_segmented': '.container',
+    'decrypt_segmented': '.container',
+    'EnvelopeEncryptor': '.envelope',
+    'EnvelopeDecryptor': '.envelope',
+    'WrappedDataKey': '.envelope',
+    'UnwrappedKeyCache': '.key_cache',
+    'KeyRing': '.keyring',
+    'KeyRingWriter': '.keyring',
+    'JwksCache': '.jws',
+    'JwsVerifier': '.jws',
+    'parse_jws': '.jws',
+    'JweEncoder': '.jwe',
+    'JweDecoder': '.jwe',
+    'parse_jwe': '.jwe',
+    'KekRotation': '.rotation',
+    'read_wrapped_keys': '.rotation',
+    'write_wrapped_keys': '.rotation',
+    'RsaKeyPool': '.key_pool',
+    'AsyncKey': '.aio',
+    'Records': '.records',
+    'EncryptedRecords': '.records',
+    'hash_stream': '.hashing',
+    'metrics': '.metrics'
+}
+
+__all__ = [
     'Key',
     'RsaKey',
+    'EcKey',
+    'SymmetricKey',
+    'JsonWebKey',
     'Algorithm',
     'EncryptionAlgorithm',
     'SymmetricEncryptionAlgorithm',
@@ -15,5 +58,43 @@ __all__ = {
     'CryptoTransform',
     'BlockCryptoTransform',
     'AuthenticatedSymmetricEncryptionAlgorithm',
-    'SignatureTransform'
-}
+    'SignatureTransform',
+    'SegmentedReader',
+    'encrypt_segmented',
+    'decrypt_segmented',
+    'EnvelopeEncryptor',
+    'EnvelopeDecryptor',
+    'WrappedDataKey',
+    'UnwrappedKeyCache',
+    'KeyRing',
+    'KeyRingWriter',
+    'JwksCache',
+    'JwsVerifier',
+    'parse_jws',
+    'JweEncoder',
+    'JweDecoder',
+    'parse_jwe',
+    'KekRotation',
+    'read_wrapped_keys',
+    'write_wrapped_keys',
+    'RsaKeyPool',
+    'AsyncKey',
+    'Records',
+    'EncryptedRecords',
+    'hash_stream',
+    'metrics'
+]
+
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError('module %r has no attribute %r' % (__name__, name))
+    module = importlib.import_module(module_name, __name__)
+    value = module if module_name == '.' + name else getattr(module, name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
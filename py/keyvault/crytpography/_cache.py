@@ -0,0 +1,35 @@
+import threading
+from collections import OrderedDict
+
+
+class LruCache(object):
+    # a thread safe cache which holds at most capacity items, evicting the least recently used item when full
+    def __init__(self, capacity):
+        self._capacity = capacity
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._items)
+
+    def get_or_add(self, key, factory):
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+                return value
+
+        # create the value outside the lock, if two threads race the last one to finish wins which is harmless
+        value = factory()
+
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self._capacity:
+                self._items.popitem(last=False)
+
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
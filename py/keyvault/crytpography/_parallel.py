@@ -0,0 +1,56 @@
+import os
+from collections import deque
+
+
+def bounded_map(executor, func, args_iter, window):
+    # like executor.map, but only keeps window calls in flight at a time so that arguments are read from args_iter
+    # as results are consumed, keeping memory bounded for inputs which are too large to submit all at once
+    # if no executor is specified the calls are made inline
+    if executor is None:
+        for args in args_iter:
+            yield func(*args)
+        return
+
+    pending = deque()
+    for args in args_iter:
+        pending.append(executor.submit(func, *args))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+
+    while pending:
+        yield pending.popleft().result()
+
+
+def default_window(executor):
+    # keep enough work queued to saturate the executor without reading the whole input ahead
+    return 2 * (getattr(executor, '_max_workers', None) or os.cpu_count() or 1)
+
+
+def chunks(items, size):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def pairs(first, second):
+    # zips two sequences which must be the same length, raising ValueError rather than silently truncating the longer.
+    # sized sequences are checked up front, others when the shorter one runs out
+    if hasattr(first, '__len__') and hasattr(second, '__len__') and len(first) != len(second):
+        raise ValueError('expected the same number of items, got %d and %d' % (len(first), len(second)))
+    return _pairs(iter(first), iter(second))
+
+
+def _pairs(first, second):
+    missing = object()
+    for item in first:
+        other = next(second, missing)
+        if other is missing:
+            raise ValueError('expected the same number of items')
+        yield item, other
+    if next(second, missing) is not missing:
+        raise ValueError('expected the same number of items')
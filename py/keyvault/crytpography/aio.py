@@ -0,0 +1,128 @@
+import asyncio
+import functools
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+
+# the key of a worker process in an AsyncKey's own process pool, set once by _init_worker when the process starts
+_worker_key = None
+
+# the thread pool used by keys which aren't given an executor, created on first use
+_default_executor = None
+_default_executor_lock = threading.Lock()
+
+
+def _init_worker(key_type, jwk):
+    global _worker_key
+    _worker_key = key_type.from_jwk(jwk)
+
+
+def _call_worker_key(method, args, kwargs):
+    return getattr(_worker_key, method)(*args, **kwargs)
+
+
+def _call_in_worker(key_type, jwk, method, args, kwargs):
+    # key objects can't be pickled so the workers of a process pool the key doesn't own import the key from its jwk on
+    # every call, key types which cache the imported key material only pay for constructing the key the first time
+    key = key_type.from_jwk(jwk)
+    return getattr(key, method)(*args, **kwargs)
+
+
+def _get_default_executor():
+    global _default_executor
+    with _default_executor_lock:
+        if _default_executor is None:
+            _default_executor = ThreadPoolExecutor(thread_name_prefix='AsyncKey')
+        return _default_executor
+
+
+class AsyncKey(object):
+    # an asyncio facade over a Key which runs each operation on executor, a thread pool shared by all keys when not
+    # specified, so cpu bound crypto doesn't block the event loop. alternatively processes creates a process pool of
+    # that many workers owned by the key, each of which imports the key once when it starts, and which is shut down by
+    # close. at most max_concurrency operations are in the executor at a time. cancelling an operation which hasn't
+    # started running cancels it outright, one which is already running completes in the background, holding its
+    # concurrency slot until it does, and its result is discarded
+    def __init__(self, key, executor=None, max_concurrency=None, processes=None):
+        if executor is not None and processes:
+            raise ValueError('specify either executor or processes')
+
+        self._key = key
+        self._semaphore = asyncio.Semaphore(max_concurrency) if max_concurrency else None
+        self._owns_executor = bool(processes)
+        self._jwk = None
+        if processes:
+            executor = ProcessPoolExecutor(processes, initializer=_init_worker,
+                                           initargs=(type(key), key.to_jwk(include_private=True)))
+        elif isinstance(executor, ProcessPoolExecutor):
+            self._jwk = key.to_jwk(include_private=True)
+        self._executor = executor
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def key(self):
+        return self._key
+
+    @property
+    def kid(self):
+        return self._key.kid
+
+    def close(self):
+        if self._owns_executor:
+            self._executor.shutdown()
+
+    async def encrypt(self, plain_text, **kwargs):
+        return await self._run('encrypt', plain_text, **kwargs)
+
+    async def decrypt(self, cipher_text, **kwargs):
+        return await self._run('decrypt', cipher_text, **kwargs)
+
+    async def wrap_key(self, key, **kwargs):
+        return await self._run('wrap_key', key, **kwargs)
+
+    async def unwrap_key(self, encrypted_key, **kwargs):
+        return await self._run('unwrap_key', encrypted_key, **kwargs)
+
+    async def sign(self, data, **kwargs):
+        return await self._run('sign', data, **kwargs)
+
+    async def verify(self, signature, data, **kwargs):
+        return await self._run('verify', signature, data, **kwargs)
+
+    async def _run(self, method, *args, **kwargs):
+        if self._semaphore is None:
+            return await asyncio.wrap_future(self._submit(method, args, kwargs))
+
+        # the slot is released when the executor's future completes rather than when the awaiting task does, so a
+        # cancelled operation which is still running keeps counting against max_concurrency
+        await self._semaphore.acquire()
+        try:
+            future = self._submit(method, args, kwargs)
+        except BaseException:
+            self._semaphore.release()
+            raise
+
+        loop = asyncio.get_running_loop()
+        future.add_done_callback(lambda _: self._release(loop))
+        return await asyncio.wrap_future(future)
+
+    def _release(self, loop):
+        try:
+            loop.call_soon_threadsafe(self._semaphore.release)
+        except RuntimeError:
+            # the loop has closed, so nothing is waiting for the slot
+            pass
+
+    def _submit(self, method, args, kwargs):
+        if self._owns_executor:
+            func = functools.partial(_call_worker_key, method, args, kwargs)
+        elif self._jwk is not None:
+            func = functools.partial(_call_in_worker, type(self._key), self._jwk, method, args, kwargs)
+        else:
+            func = functools.partial(getattr(self._key, method), *args, **kwargs)
+        return (self._executor or _get_default_executor()).submit(func)
@@ -1,13 +1,93 @@
+import importlib
+import sys
+import threading
 from abc import ABCMeta, abstractmethod
 from six import with_metaclass
 
 
 _alg_registry = {}
 
+# the modules defining the built in algorithms, keyed by algorithm name. a module is only imported, registering its
+# algorithms, the first time one of them is resolved so processes only load the primitives they use
+_ALGORITHM_MODULES = {
+    'A128CBC': '.algorithms.aes_cbc',
+    'A192CBC': '.algorithms.aes_cbc',
+    'A256CBC': '.algorithms.aes_cbc',
+    'A128CBC-HS256': '.algorithms.aes_cbc_hmac',
+    'A192CBC-HS384': '.algorithms.aes_cbc_hmac',
+    'A256CBC-HS512': '.algorithms.aes_cbc_hmac',
+    'A128GCM': '.algorithms.aes_gcm',
+    'A192GCM': '.algorithms.aes_gcm',
+    'A256GCM': '.algorithms.aes_gcm',
+    'A128KW': '.algorithms.aes_kw',
+    'A192KW': '.algorithms.aes_kw',
+    'A256KW': '.algorithms.aes_kw',
+    'ECDSA256': '.algorithms.ecdsa',
+    'ES256': '.algorithms.ecdsa',
+    'ES384': '.algorithms.ecdsa',
+    'ES512': '.algorithms.ecdsa',
+    'RS256': '.algorithms.rs_256',
+    'RSA-OAEP': '.algorithms.rsa_oaep'
+}
+
+
+def _load_all():
+    # imports every built in algorithm module and returns the registry, for callers which enumerate the algorithms
+    # rather than resolving them by name
+    for module in sorted(set(_ALGORITHM_MODULES.values())):
+        importlib.import_module(module, __package__)
+    return _alg_registry
+
+
+# the number of items handed to an executor at a time by the batch signature operations
+_BATCH_CHUNK_SIZE = 64
+
+
+def _sign_chunk(transform, chunk):
+    # signatures which fail are returned as the raised exception rather than aborting the chunk
+    results = []
+    for data in chunk:
+        try:
+            results.append(transform.sign(data))
+        except Exception as e:
+            results.append(e)
+    return results
+
+
+def _verify_chunk(transform, chunk):
+    flags = bytearray(len(chunk))
+    for i, (signature, data) in enumerate(chunk):
+        try:
+            flags[i] = transform.verify(signature, data) is not False
+        except Exception:
+            pass
+    return flags
+
+
+def _sign_stream(transform, source, chunk_size):
+    try:
+        return transform.sign_stream(source, chunk_size)
+    except Exception as e:
+        return e
+
+
+def _verify_stream(transform, signature, source, chunk_size):
+    try:
+        return transform.verify_stream(signature, source, chunk_size) is not False
+    except Exception:
+        return False
+
 
 class Algorithm(object):
     _name = None
 
+    def __init_subclass__(cls, **kwargs):
+        super(Algorithm, cls).__init_subclass__(**kwargs)
+        # metrics can only be enabled once its module is imported, and enable instruments the classes defined before
+        metrics = sys.modules.get(__package__ + '.metrics')
+        if metrics is not None:
+            metrics._instrument_class(cls)
+
     @classmethod
     def name(cls):
         return cls._name
@@ -18,7 +98,14 @@ class Algorithm(object):
 
     @staticmethod
     def resolve(name):
-        return _alg_registry[name]()
+        cls = _alg_registry.get(name)
+        if cls is None:
+            module = _ALGORITHM_MODULES.get(name)
+            if module is None:
+                raise KeyError(name)
+            importlib.import_module(module, __package__)
+            cls = _alg_registry[name]
+        return cls()
 
 
 class EncryptionAlgorithm(with_metaclass(ABCMeta, Algorithm)):
@@ -59,3 +146,58 @@ class SignatureAlgorithm(Algorithm):
     @abstractmethod
     def create_signature_transform(self, key):
         raise NotImplementedError()
+
+    # sign_many and verify_many run over executor when one is specified, the key object isn't serialized so this
+    # should be a thread pool, each thread creates a single transform which it reuses for all its chunks.
+    # sign_many returns a list of signatures with the exception in place of any which failed, verify_many returns
+    # a bytearray with a flag for each signature which is 1 if it is valid and 0 otherwise. ValueError is raised if
+    # signatures and data differ in length
+    def sign_many(self, key, data, executor=None):
+        from ._parallel import bounded_map, default_window, chunks
+        sign_chunk = self._create_chunk_func(key, _sign_chunk)
+        signatures = []
+        for results in bounded_map(executor, sign_chunk, ((c,) for c in chunks(data, _BATCH_CHUNK_SIZE)),
+                                   default_window(executor)):
+            signatures.extend(results)
+        return signatures
+
+    def verify_many(self, key, signatures, data, executor=None):
+        from ._parallel import bounded_map, default_window, chunks, pairs
+        verify_chunk = self._create_chunk_func(key, _verify_chunk)
+        flags = bytearray()
+        for results in bounded_map(executor, verify_chunk, ((c,) for c in chunks(pairs(signatures, data),
+                                                                                  _BATCH_CHUNK_SIZE)),
+                                   default_window(executor)):
+            flags.extend(results)
+        return flags
+
+    # sign_streams and verify_streams hash each source, a path, file like object or iterable of chunks, and sign or
+    # verify its digest over executor, which should be a thread pool as hashing releases the gil. sources are
+    # hashed incrementally so memory doesn't grow with their size, the results are as for sign_many and verify_many.
+    # chunk_size defaults to the hashing module's DEFAULT_HASH_CHUNK_SIZE
+    def sign_streams(self, key, sources, executor=None, chunk_size=None):
+        from ._parallel import bounded_map, default_window
+        from .hashing import DEFAULT_HASH_CHUNK_SIZE
+        chunk_size = chunk_size or DEFAULT_HASH_CHUNK_SIZE
+        sign_stream = self._create_chunk_func(key, _sign_stream)
+        args = ((source, chunk_size) for source in sources)
+        return list(bounded_map(executor, sign_stream, args, default_window(executor)))
+
+    def verify_streams(self, key, signatures, sources, executor=None, chunk_size=None):
+        from ._parallel import bounded_map, default_window, pairs
+        from .hashing import DEFAULT_HASH_CHUNK_SIZE
+        chunk_size = chunk_size or DEFAULT_HASH_CHUNK_SIZE
+        verify_stream = self._create_chunk_func(key, _verify_stream)
+        args = ((signature, source, chunk_size) for signature, source in pairs(signatures, sources))
+        return bytearray(bounded_map(executor, verify_stream, args, default_window(executor)))
+
+    def _create_chunk_func(self, key, func):
+        local = threading.local()
+
+        def chunk_func(*args):
+            transform = getattr(local, 'transform', None)
+            if transform is None:
+                transform = local.transform = self.create_signature_transform(key)
+            return func(transform, *args)
+
+        return chunk_func
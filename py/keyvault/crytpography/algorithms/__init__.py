@@ -1,9 +1,28 @@
-from .aes_cbc import Aes128Cbc, Aes192Cbc, Aes256Cbc
-from .aes_cbc_hmac import Aes128CbcHmacSha256, Aes192CbcHmacSha384, Aes256CbcHmacSha512
-from .aes_kw import AesKw128, AesKw192, AesKw256
-from .ecdsa import Ecdsa256, Es256, Es384, Es512
-from .rs_256 import Rs256
-from .rsa_oaep import RsaOaep
+import importlib
+
+
+# the algorithm classes and the modules defining them, a module is only imported when one of its classes is first
+# used, see Algorithm.resolve
+_EXPORTS = {
+    'Aes128Cbc': '.aes_cbc',
+    'Aes192Cbc': '.aes_cbc',
+    'Aes256Cbc': '.aes_cbc',
+    'Aes128CbcHmacSha256': '.aes_cbc_hmac',
+    'Aes192CbcHmacSha384': '.aes_cbc_hmac',
+    'Aes256CbcHmacSha512': '.aes_cbc_hmac',
+    'Aes128Gcm': '.aes_gcm',
+    'Aes192Gcm': '.aes_gcm',
+    'Aes256Gcm': '.aes_gcm',
+    'AesKw128': '.aes_kw',
+    'AesKw192': '.aes_kw',
+    'AesKw256': '.aes_kw',
+    'Ecdsa256': '.ecdsa',
+    'Es256': '.ecdsa',
+    'Es384': '.ecdsa',
+    'Es512': '.ecdsa',
+    'Rs256': '.rs_256',
+    'RsaOaep': '.rsa_oaep'
+}
 
 __all__ = [
     'Aes128Cbc',
@@ -12,6 +31,9 @@ __all__ = [
     'Aes128CbcHmacSha256',
     'Aes192CbcHmacSha384',
     'Aes256CbcHmacSha512',
+    'Aes128Gcm',
+    'Aes192Gcm',
+    'Aes256Gcm',
     'AesKw128',
     'AesKw192',
     'AesKw256',
@@ -21,4 +43,17 @@ __all__ = [
     'Es512',
     'Rs256',
     'RsaOaep'
-]
\ No newline at end of file
+]
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError('module %r has no attribute %r' % (__name__, name))
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
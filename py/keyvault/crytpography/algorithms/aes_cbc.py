@@ -1,90 +1,288 @@
+import os
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from itertools import accumulate
 from ..algorithm import SymmetricEncryptionAlgorithm, Algorithm
 from .. transform import BlockCryptoTransform
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 from cryptography.hazmat.backends import default_backend
-from cryptography.hazmat.primitives import padding
+from cryptography.hazmat.primitives import constant_time, padding
+from .._cache import LruCache
+from ..records import EncryptedRecords, Records, _record_list, _split
+
+
+# slices smaller than this aren't worth handing to another thread
+_MIN_PARALLEL_SLICE_SIZE = 1024 * 1024
+
+_BLOCK_SIZE_IN_BYTES = 16
+
+# the pkcs7 padding for each padding length
+_PADDING = [bytes((i,)) * i for i in range(_BLOCK_SIZE_IN_BYTES + 1)]
+
+
+def _unpadded_length(block):
+    # returns the number of plain text bytes in the final decrypted block, raising ValueError if the padding is invalid.
+    # the padding is checked by cryptography's pkcs7 unpadder, which doesn't branch on the padding bytes
+    unpadder = padding.PKCS7(_BLOCK_SIZE_IN_BYTES * 8).unpadder()
+    return len(unpadder.update(bytes(block)) + unpadder.finalize())
+
+
+def _unpad(padded):
+    if not padded or len(padded) % _BLOCK_SIZE_IN_BYTES:
+        raise ValueError('Invalid padding bytes.')
+    return padded[:len(padded) - _BLOCK_SIZE_IN_BYTES + _unpadded_length(padded[-_BLOCK_SIZE_IN_BYTES:])]
+
+
+def _cbc_encrypt_records(aes, records):
+    # each record is prefixed with a random block and all the records are encrypted as a single cbc stream, the cipher
+    # text of the random block is then the iv of the record's cipher text, as in the tls 1.1 explicit iv construction,
+    # so every record is an independent cbc cipher text under an unpredictable iv. returns the packed cipher texts,
+    # their offsets and the packed ivs
+    block = _BLOCK_SIZE_IN_BYTES
+    randoms = os.urandom(block * len(records))
+    paddings = [_PADDING[block - len(record) % block] for record in records]
+    parts = [part for i, record in enumerate(records)
+             for part in (randoms[i * block:(i + 1) * block], record, paddings[i])]
+
+    encryptor = Cipher(aes, modes.CBC(os.urandom(block)), backend=default_backend()).encryptor()
+    stream = encryptor.update(b''.join(parts))
+
+    # the record cipher texts follow their iv blocks, so skipping the ivs packs them with the same sizes as the stream
+    sizes = [len(record) + len(padding) for record, padding in zip(records, paddings)]
+    starts = list(accumulate([block + size for size in sizes], initial=0))
+    ivs = b''.join([stream[pos:pos + block] for pos in starts[:-1]])
+    data = b''.join([stream[pos + block:end] for pos, end in zip(starts, starts[1:])])
+    return data, array('Q', accumulate(sizes, initial=0)), ivs
+
+
+def _cbc_decrypt_records(aes, data, offsets, ivs):
+    # the inverse of _cbc_encrypt_records, each record's cipher text is preceded by its iv and all the records are
+    # decrypted as a single cbc stream. the output for the iv blocks is discarded, every other block is decrypted using
+    # the preceding cipher text block, or the record's iv, as required. returns the packed plain texts and offsets
+    block = _BLOCK_SIZE_IN_BYTES
+    count = len(offsets) - 1
+    offsets = list(offsets)
+    if len(ivs) != count * block:
+        raise ValueError('ivs must hold an iv for each record')
+    if offsets[0] < 0 or offsets[-1] > len(data):
+        raise ValueError('offsets must lie within data')
+    base = offsets[0]
+    if any((offset - base) % block for offset in offsets) or any(a >= b for a, b in zip(offsets, offsets[1:])):
+        raise ValueError('Invalid padding bytes.')
+
+    view = memoryview(data)
+    parts = [None] * (2 * count)
+    parts[0::2] = _split(ivs, block)
+    parts[1::2] = [view[start:end] for start, end in zip(offsets, offsets[1:])]
+    decryptor = Cipher(aes, modes.CBC(bytes(block)), backend=default_backend()).decryptor()
+    padded = decryptor.update(b''.join(parts))
+    decryptor.finalize()
+
+    # each record's plain text follows the discarded output of its iv block, the padding of every record is then
+    # checked with a single comparison
+    ends = [offset - base + block * i for i, offset in enumerate(offsets)]
+    starts = [end + block for end in ends[:-1]]
+    del ends[0]
+    pads = [padded[end - 1] for end in ends]
+    if pads and (min(pads) < 1 or max(pads) > block):
+        raise ValueError('Invalid padding bytes.')
+    if not constant_time.bytes_eq(b''.join([padded[end - pad:end] for end, pad in zip(ends, pads)]),
+                                  b''.join([_PADDING[pad] for pad in pads])):
+        raise ValueError('Invalid padding bytes.')
+
+    sizes = [end - start - pad for start, end, pad in zip(starts, ends, pads)]
+    plain_text = b''.join([padded[start:start + size] for start, size in zip(starts, sizes)])
+    return plain_text, array('Q', accumulate(sizes, initial=0))
+
+
+def _cbc_decrypt_slice(key, iv, data):
+    return Cipher(algorithms.AES(key), modes.CBC(iv), backend=default_backend()).decryptor().update(data)
+
+
+def _cbc_decrypt_parallel(key, iv, data, executor=None, max_workers=None):
+    # each cbc block only depends on the previous cipher text block, so the data can be cut on block boundaries
+    # and each slice decrypted independently using the last cipher text block of the preceding slice as its iv
+    # returns the padded plain text, callers are responsible for removing the padding
+    view = memoryview(data)
+    if len(view) % 16:
+        raise ValueError('data must be a multiple of the block size')
+
+    max_workers = max_workers or os.cpu_count() or 1
+    slice_count = max(1, min(max_workers, len(view) // _MIN_PARALLEL_SLICE_SIZE))
+    if slice_count == 1:
+        return _cbc_decrypt_slice(key, iv, view)
+
+    slice_size = -(-len(view) // slice_count // 16) * 16
+    ivs = [iv] + [view[i - 16:i].tobytes() for i in range(slice_size, len(view), slice_size)]
+    slices = [view[i:i + slice_size] for i in range(0, len(view), slice_size)]
+
+    if executor:
+        return b''.join(executor.map(_cbc_decrypt_slice, [key] * len(slices), ivs, slices))
+
+    with ThreadPoolExecutor(max_workers) as executor:
+        return b''.join(executor.map(_cbc_decrypt_slice, [key] * len(slices), ivs, slices))
 
 
 class _AesCbcCryptoTransform(BlockCryptoTransform):
-    def __init__(self, key, iv):
-        self._cipher = Cipher(algorithms.AES(key), modes.CBC(iv), backend=default_backend())
+    def __init__(self, key, iv, aes=None):
+        self._key = key
+        self._iv = iv
+        self._cipher = Cipher(aes or algorithms.AES(key), modes.CBC(iv), backend=default_backend())
 
     @property
     def block_size(self):
-        return self._cipher.block_size
-
-    def transform(self, data):
-        return self.update(data) + self.finalize()
+        return self._cipher.algorithm.block_size
 
 
 class _AesCbcDecryptor(_AesCbcCryptoTransform):
-    def __init__(self, key, iv):
-        super(_AesCbcDecryptor, self).__init__(key, iv)
+    def __init__(self, key, iv, aes=None):
+        super(_AesCbcDecryptor, self).__init__(key, iv, aes)
         self._ctx = self._cipher.decryptor()
-        self._padder = padding.PKCS7(self.block_size).unpadder()
+        # the last decrypted block can't be released until finalize as it may hold the padding
+        self._last_block = bytearray(_BLOCK_SIZE_IN_BYTES)
+        self._holding = False
 
     def update(self, data):
+        out = bytearray(len(data) + 2 * _BLOCK_SIZE_IN_BYTES - 1)
+        return bytes(memoryview(out)[:self.update_into(data, out)])
+
+    def update_into(self, data, out_buffer):
+        out = memoryview(out_buffer)
+        start = 0
+        if self._holding:
+            out[:_BLOCK_SIZE_IN_BYTES] = self._last_block
+            start = _BLOCK_SIZE_IN_BYTES
+
+        end = start + self._ctx.update_into(data, out[start:])
+        if not end:
+            return 0
+
+        self._last_block[:] = out[end - _BLOCK_SIZE_IN_BYTES:end]
+        self._holding = True
+        return end - _BLOCK_SIZE_IN_BYTES
+
+    def finalize(self):
+        out = bytearray(_BLOCK_SIZE_IN_BYTES)
+        return bytes(memoryview(out)[:self.finalize_into(out)])
+
+    def finalize_into(self, out_buffer):
+        self._ctx.finalize()
+        if not self._holding:
+            raise ValueError('Invalid padding bytes.')
+        n = _unpadded_length(self._last_block)
+        memoryview(out_buffer)[:n] = memoryview(self._last_block)[:n]
+        return n
+
+    def transform(self, data):
+        if self._holding:
+            return self.update(data) + self.finalize()
         padded = self._ctx.update(data)
-        return self._padder.update(padded)
+        self._ctx.finalize()
+        return _unpad(padded)
 
-    def finalize(self, data):
-        padded = self._ctx.finalize()
-        return self._padder.update(padded) + self._padder.finalize()
+    # decrypts the entire buffer across a pool of threads, the output is identical to transform
+    def transform_parallel(self, data, executor=None, max_workers=None):
+        return _unpad(_cbc_decrypt_parallel(self._key, self._iv, data, executor, max_workers))
 
 
 class _AesCbcEncryptor(_AesCbcCryptoTransform):
-    def __init__(self, key, iv):
-        super(_AesCbcEncryptor, self).__init__(key, iv)
+    def __init__(self, key, iv, aes=None):
+        super(_AesCbcEncryptor, self).__init__(key, iv, aes)
         self._ctx = self._cipher.encryptor()
-        self._padder = padding.PKCS7(self.block_size).padder()
+        self._length = 0
 
     def update(self, data):
-        padded = self._padder.update(data)
-        return self._ctx.update(padded)
+        self._length += len(data)
+        return self._ctx.update(data)
+
+    def update_into(self, data, out_buffer):
+        self._length += len(data)
+        return self._ctx.update_into(data, out_buffer)
 
-    def finalize(self, data):
-        padded = self._padder.finalize()
-        return self._ctx.update(padded) + self._ctx.finalize()
+    def finalize(self):
+        return self._ctx.update(self._padding()) + self._ctx.finalize()
+
+    def finalize_into(self, out_buffer):
+        n = self._ctx.update_into(self._padding(), out_buffer)
+        self._ctx.finalize()
+        return n
+
+    # the data and padding are encrypted with a single update as one shot transforms are mostly small messages
+    def transform(self, data):
+        self._length += len(data)
+        return self._ctx.update(bytes(data) + self._padding())
+
+    def _padding(self):
+        return _PADDING[_BLOCK_SIZE_IN_BYTES - self._length % _BLOCK_SIZE_IN_BYTES]
 
 
 class _AesCbc(SymmetricEncryptionAlgorithm):
     _key_size = 256
     _block_size = 128
+    _context_cache_size = 32
 
+    def __init__(self):
+        self._contexts = LruCache(self._context_cache_size)
+
+    @property
     def block_size(self):
         return self._block_size
 
+    @property
     def block_size_in_bytes(self):
         return self._block_size >> 3
 
+    @property
     def key_size(self):
         return self._key_size
 
+    @property
     def key_size_in_bytes(self):
         return self._key_size >> 3
 
     def create_encryptor(self, key, iv):
         key, iv = self._validate_input(key, iv)
 
-        return _AesCbcEncryptor(key, iv)
+        return _AesCbcEncryptor(key, iv, self._get_context(key))
 
     def create_decryptor(self, key, iv):
         key, iv = self._validate_input(key, iv)
 
-        return _AesCbcDecryptor(key, iv)
+        return _AesCbcDecryptor(key, iv, self._get_context(key))
 
-    def _validate_input(self, key, iv):
+    # the bulk record apis encrypt every record under key with a random iv, records is a sequence of bytes like
+    # objects, a buffer of fixed width records of record_size bytes or a numpy array of records. the output is
+    # packed into an EncryptedRecords, which decrypt_records takes back, see records.py
+    def encrypt_records(self, key, records, record_size=None):
+        key = self._validate_key(key)
+        data, offsets, ivs = _cbc_encrypt_records(self._get_context(key), _record_list(records, record_size))
+        return EncryptedRecords(data, offsets, ivs, b'')
+
+    def decrypt_records(self, key, records):
+        key = self._validate_key(key)
+        return Records(*_cbc_decrypt_records(self._get_context(key), records.data, records.offsets, records.ivs))
+
+    def _get_context(self, key):
+        key = bytes(key)
+        return self._contexts.get_or_add(key, lambda: algorithms.AES(key))
+
+    def _validate_key(self, key):
         if not key:
             raise ValueError('key')
-        if len(key) < self.key_size_in_bytes():
+        if len(key) < self.key_size_in_bytes:
             raise ValueError('key must be at least %d bits' % self.key_size)
 
+        return key[:self.key_size_in_bytes]
+
+    def _validate_input(self, key, iv):
+        key = self._validate_key(key)
+
         if not iv:
             raise ValueError('iv')
         if not len(iv) == self.block_size_in_bytes:
             raise ValueError('iv must be %d bits' % self.block_size)
 
-        return key[:self.key_size_in_bytes], iv
+        return key, iv
 
 
 class Aes128Cbc(_AesCbc):
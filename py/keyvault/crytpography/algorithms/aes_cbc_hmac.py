@@ -1,10 +1,20 @@
 from ..algorithm import Algorithm, AuthenticatedSymmetricEncryptionAlgorithm
-from ..transform import AuthenticatedCryptoTransform, BlockCryptoTransform
+from ..transform import AuthenticatedCryptoTransform, BlockCryptoTransform, DEFAULT_CHUNK_SIZE, _chunk_writer, \
+    _fileno, _iter_chunks, _seekable
+from .aes_cbc import _AesCbcDecryptor, _AesCbcEncryptor, _cbc_decrypt_parallel, _cbc_decrypt_records, \
+    _cbc_encrypt_records, _unpad
+from .._cache import LruCache
+from ..records import EncryptedRecords, Records, _record_list, _split
 from abc import abstractmethod
 import codecs
-from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+import io
+import mmap
+import os
+from concurrent.futures import ThreadPoolExecutor
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives.ciphers import algorithms
 from cryptography.hazmat.backends import default_backend
-from cryptography.hazmat.primitives import padding, hashes, hmac
+from cryptography.hazmat.primitives import hashes, hmac, constant_time
 
 
 def _int_to_bytes(i):
@@ -25,30 +35,62 @@ def _int_to_bigendian_8_bytes(i):
     return b
 
 
-class _AesCbcHmacCryptoTransform(BlockCryptoTransform, AuthenticatedCryptoTransform):
-    def __init__(self, key, iv, auth_data, auth_tag):
-        self._aes_key = key[:len(key) // 2]
-        self._hmac_key = key[len(key) // 2:]
+def _slices(view, size):
+    return (view[i:i + size] for i in range(0, len(view), size))
+
+
+class _AesCbcHmacContext(object):
+    # the per key state which doesn't depend on the iv, the hmac is primed with the auth data and must only be copied
+    def __init__(self, key, auth_data):
+        self.aes_key = key[:len(key) // 2]
+        self.hmac_key = key[len(key) // 2:]
         hash_algo = {
             256: hashes.SHA256(),
             384: hashes.SHA384(),
             512: hashes.SHA512()
         }[len(key) * 8]
 
-        self._cipher = Cipher(algorithms.AES(self._aes_key), modes.CBC(iv), backend=default_backend())
+        self.aes = algorithms.AES(self.aes_key)
+        self.hmac = hmac.HMAC(self.hmac_key, hash_algo, backend=default_backend())
+        self.hmac.update(auth_data)
+        self.auth_data_length = _int_to_bigendian_8_bytes(len(auth_data) * 8)
+
+    def record_tags(self, data, offsets, ivs):
+        # the tag of each of the packed cipher texts
+        view = memoryview(data)
+        offsets = list(offsets)
+        tag_size = len(self.hmac_key)
+        tags = []
+        for iv, start, end in zip(_split(ivs, 16), offsets, offsets[1:]):
+            mac = self.hmac.copy()
+            mac.update(iv)
+            mac.update(view[start:end])
+            mac.update(self.auth_data_length)
+            tags.append(mac.finalize()[:tag_size])
+        return tags
+
+
+class _AesCbcHmacCryptoTransform(BlockCryptoTransform, AuthenticatedCryptoTransform):
+    def __init__(self, key, iv, auth_data, auth_tag, context=None):
+        context = context or _AesCbcHmacContext(key, auth_data)
+        self._aes_key = context.aes_key
+        self._hmac_key = context.hmac_key
+        self._aes = context.aes
+
+        self._iv = iv
         self._tag = auth_tag or bytearray()
-        self._hmac = hmac.HMAC(self._hmac_key, hash_algo, backend=default_backend())
-        self._auth_data_length = _int_to_bigendian_8_bytes(len(auth_data) * 8)
+        self._hmac = context.hmac.copy()
+        self._auth_data_length = context.auth_data_length
 
         # prime the hash
-        self._hmac.update(auth_data)
         self._hmac.update(iv)
 
     def tag(self):
         return self._tag
 
+    @property
     def block_size(self):
-        return self._cipher.block_size
+        return self._aes.block_size
 
     @abstractmethod
     def update(self, data):
@@ -63,55 +105,174 @@ class _AesCbcHmacCryptoTransform(BlockCryptoTransform, AuthenticatedCryptoTransf
 
 
 class _AesCbcHmacEncryptor(_AesCbcHmacCryptoTransform):
-    def __init__(self, key, iv, auth_data, auth_tag):
-        super(_AesCbcHmacEncryptor, self).__init__(key, iv, auth_data, auth_tag)
-        self._ctx = self._cipher.encryptor()
-        self._padder = padding.PKCS7(self.block_size).padder()
+    def __init__(self, key, iv, auth_data, auth_tag, context=None):
+        super(_AesCbcHmacEncryptor, self).__init__(key, iv, auth_data, auth_tag, context)
+        self._cbc = _AesCbcEncryptor(self._aes_key, iv, self._aes)
         self._tag[:] = []
 
     def update(self, data):
-        padded = self._padder.update(data)
-        cipher_text = self._ctx.update(padded)
+        cipher_text = self._cbc.update(data)
         self._hmac.update(cipher_text)
         return cipher_text
 
+    def update_into(self, data, out_buffer):
+        n = self._cbc.update_into(data, out_buffer)
+        self._hmac.update(memoryview(out_buffer)[:n])
+        return n
+
     def finalize(self):
-        padded = self._padder.finalize()
-        cipher_text = self._ctx.update(padded) + self._ctx.finalize()
+        cipher_text = self._cbc.finalize()
         self._hmac.update(cipher_text)
-        self._hmac.update(self._auth_data_length)
-        self._tag.extend(hmac.finalize()[:len(self._hmac_key)])
+        self._finalize_tag()
         return cipher_text
 
+    def finalize_into(self, out_buffer):
+        n = self._cbc.finalize_into(out_buffer)
+        self._hmac.update(memoryview(out_buffer)[:n])
+        self._finalize_tag()
+        return n
+
+    def transform(self, data):
+        cipher_text = self._cbc.transform(data)
+        self._hmac.update(cipher_text)
+        self._finalize_tag()
+        return cipher_text
+
+    def _finalize_tag(self):
+        self._hmac.update(self._auth_data_length)
+        self._tag.extend(self._hmac.finalize()[:len(self._hmac_key)])
+
 
 class _AesCbcHmacDecryptor(_AesCbcHmacCryptoTransform):
-    def __init__(self, key, iv, auth_data, auth_tag):
-        super(_AesCbcHmacDecryptor, self).__init__(key, iv, auth_data, auth_tag)
-        self._ctx = self._cipher.decryptor()
-        self._padder = padding.PKCS7(self.block_size).unpadder()
+    def __init__(self, key, iv, auth_data, auth_tag, context=None):
+        super(_AesCbcHmacDecryptor, self).__init__(key, iv, auth_data, auth_tag, context)
+        self._cbc = _AesCbcDecryptor(self._aes_key, iv, self._aes)
 
     def update(self, data):
         self._hmac.update(data)
-        padded = self._ctx.update(data)
-        return self._padder.update(padded)
+        return self._cbc.update(data)
+
+    def update_into(self, data, out_buffer):
+        self._hmac.update(data)
+        return self._cbc.update_into(data, out_buffer)
 
     def finalize(self):
-        self._hmac.update(self._auth_data_length)
-        self._hmac.verify(self.tag)
-        padded = self._ctx.finalize()
-        return self._padder.update(padded) + self._padder.finalize()
+        self._verify_tag()
+        return self._cbc.finalize()
+
+    def finalize_into(self, out_buffer):
+        self._verify_tag()
+        return self._cbc.finalize_into(out_buffer)
 
     # override transform from the base so we can verify the entire hash before we start decrypting
     def transform(self, data):
         self._hmac.update(data)
+        self._verify_tag()
+        return self._cbc.transform(data)
+
+    # decrypts the buffer across a pool of threads while the tag is computed on its own thread, the plain text is
+    # only returned once the tag has been verified and is identical to the output of transform
+    def transform_parallel(self, data, executor=None, max_workers=None):
+        with ThreadPoolExecutor(1) as hmac_executor:
+            hmac_future = hmac_executor.submit(self._hmac.update, data)
+            padded = _cbc_decrypt_parallel(self._aes_key, self._iv, data, executor, max_workers)
+            hmac_future.result()
+        self._verify_tag()
+        return _unpad(padded)
+
+    # the tag is verified before any plain text is written to sink, so the cipher text is read twice. files are memory
+    # mapped by transform_file, in memory files are read through their buffer and other seekable file like objects are
+    # read, rewound and read again. sources which can't be read twice, such as pipes, sockets or iterables of chunks,
+    # raise ValueError unless allow_unverified is set, in which case plain text is written to sink as it's decrypted
+    # and InvalidSignature is only raised once all of the source has been read
+    def transform_stream(self, source, sink, chunk_size=DEFAULT_CHUNK_SIZE, zero_copy=False, allow_unverified=False):
+        if _fileno(source) is not None:
+            return self.transform_file(source, sink, chunk_size, zero_copy)
+
+        write = _chunk_writer(sink, zero_copy)
+        getbuffer = getattr(source, 'getbuffer', None)
+        if getbuffer is not None:
+            start = source.tell()
+            with getbuffer() as buffer, buffer[start:] as view:
+                written = self._transform_verified(lambda: _slices(view, chunk_size), write, chunk_size)
+            source.seek(0, io.SEEK_END)
+            return written
+
+        if _seekable(source):
+            start = source.tell()
+
+            def chunks():
+                source.seek(start)
+                return _iter_chunks(source, chunk_size)
+
+            return self._transform_verified(chunks, write, chunk_size)
+
+        if not allow_unverified:
+            raise ValueError('the tag can only be verified before decrypting a source which can be read twice, '
+                             'set allow_unverified to decrypt the source as it is read')
+        return super(_AesCbcHmacDecryptor, self).transform_stream(source, sink, chunk_size, zero_copy)
+
+    def transform_file(self, source, sink, chunk_size=DEFAULT_CHUNK_SIZE, zero_copy=False):
+        # the cipher text from the current position of source to the end of the file is memory mapped and read twice,
+        # first to verify the tag and then to decrypt into sink, so no plain text is written unless the cipher text is
+        # authentic and memory use is bounded by chunk_size. source is left positioned at the end of the file. sink is
+        # written to as for transform_stream
+        write = _chunk_writer(sink, zero_copy)
+        start = source.tell()
+        size = os.fstat(source.fileno()).st_size
+        if size <= start:
+            raise InvalidSignature()
+
+        mapped = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            with memoryview(mapped) as view, view[start:size] as cipher_text:
+                written = self._transform_verified(lambda: _slices(cipher_text, chunk_size), write, chunk_size)
+        finally:
+            mapped.close()
+
+        source.seek(size)
+        return written
+
+    def _transform_verified(self, chunks, write, chunk_size):
+        # chunks returns a new iterator over the cipher text each time it's called, the first pass verifies the tag
+        # and the second decrypts. each pass is its own method so no slice of the cipher text outlives it, and a
+        # memory mapped source can be closed when the tag doesn't match
+        self._update_hmac(chunks())
+        self._verify_tag()
+
+        out = bytearray(chunk_size + 2 * (self.block_size // 8))
+        out_view = memoryview(out)
+        written = self._decrypt_chunks(chunks(), write, out, out_view)
+        n = self._cbc.finalize_into(out)
+        if n:
+            write(out_view[:n])
+        return written + n
+
+    def _update_hmac(self, chunks):
+        for chunk in chunks:
+            self._hmac.update(chunk)
+
+    def _decrypt_chunks(self, chunks, write, out, out_view):
+        written = 0
+        for chunk in chunks:
+            n = self._cbc.update_into(chunk, out)
+            if n:
+                write(out_view[:n])
+                written += n
+        return written
+
+    def _verify_tag(self):
         self._hmac.update(self._auth_data_length)
-        self._hmac.verify(self.tag)
-        padded = self._ctx.update(data) + self._ctx.finalize()
-        return self._padder.update(padded) + self._padder.finalize()
+        if not constant_time.bytes_eq(self._hmac.finalize()[:len(self._hmac_key)], bytes(self._tag)):
+            raise InvalidSignature()
 
 
 class _AesCbcHmac(AuthenticatedSymmetricEncryptionAlgorithm):
     _key_size = 256
+    _context_cache_size = 32
+
+    def __init__(self):
+        self._contexts = LruCache(self._context_cache_size)
 
     @property
     def block_size(self):
@@ -129,11 +290,56 @@ class _AesCbcHmac(AuthenticatedSymmetricEncryptionAlgorithm):
     def key_size_in_bytes(self):
         return self._key_size >> 3
 
+    @property
+    def iv_size_in_bytes(self):
+        return 16
+
+    @property
+    def tag_size_in_bytes(self):
+        return self.key_size_in_bytes // 2
+
+    def cipher_text_size(self, plain_text_size):
+        # pkcs7 always adds between 1 and 16 bytes of padding
+        return (plain_text_size // 16 + 1) * 16
+
     def create_encryptor(self, key, iv, auth_data, auth_tag=None):
-        return _AesCbcHmacEncryptor(key, iv, auth_data, auth_tag)
+        return _AesCbcHmacEncryptor(key, iv, auth_data, auth_tag, self._get_context(key, auth_data))
 
     def create_decryptor(self, key, iv, auth_data, auth_tag):
-        return _AesCbcHmacDecryptor(key, iv, auth_data, auth_tag)
+        return _AesCbcHmacDecryptor(key, iv, auth_data, auth_tag, self._get_context(key, auth_data))
+
+    # the bulk record apis encrypt every record under key with a random iv, see _cbc_encrypt_records.
+    # decrypt_records verifies the tags of all the records, raising InvalidSignature if any fail, before decrypting
+    def encrypt_records(self, key, records, auth_data=b'', record_size=None):
+        context = self._get_context(self._validate_key(key), auth_data)
+        data, offsets, ivs = _cbc_encrypt_records(context.aes, _record_list(records, record_size))
+        return EncryptedRecords(data, offsets, ivs, b''.join(context.record_tags(data, offsets, ivs)))
+
+    def decrypt_records(self, key, records, auth_data=b''):
+        context = self._get_context(self._validate_key(key), auth_data)
+        tags = bytes(records.tags)
+        if len(tags) != (len(records.offsets) - 1) * self.tag_size_in_bytes:
+            raise InvalidSignature()
+
+        # all the tags are checked with a single comparison so the time taken doesn't depend on which records failed
+        expected = b''.join(context.record_tags(records.data, records.offsets, records.ivs))
+        if not constant_time.bytes_eq(expected, tags):
+            raise InvalidSignature()
+
+        return Records(*_cbc_decrypt_records(context.aes, records.data, records.offsets, records.ivs))
+
+    # repeated operations with the same key and auth data reuse the cipher key and a copy of the primed hmac
+    def _get_context(self, key, auth_data):
+        key, auth_data = bytes(key), bytes(auth_data)
+        return self._contexts.get_or_add((key, auth_data), lambda: _AesCbcHmacContext(key, auth_data))
+
+    def _validate_key(self, key):
+        if not key:
+            raise ValueError('key')
+        if len(key) < self.key_size_in_bytes:
+            raise ValueError('key must be at least %d bits' % self.key_size)
+
+        return key[:self.key_size_in_bytes]
 
 
 class Aes128CbcHmacSha256(_AesCbcHmac):
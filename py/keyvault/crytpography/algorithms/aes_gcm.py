@@ -0,0 +1,178 @@
+import os
+from ..algorithm import AuthenticatedSymmetricEncryptionAlgorithm
+from ..transform import AuthenticatedCryptoTransform, BlockCryptoTransform
+from .._cache import LruCache
+from ..records import EncryptedRecords, Records, _pack, _record_list, _split
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.backends import default_backend
+
+
+class _AesGcmCryptoTransform(BlockCryptoTransform, AuthenticatedCryptoTransform):
+    def __init__(self, key, iv, auth_tag, aes=None):
+        self._aes = aes or algorithms.AES(key)
+        self._tag = auth_tag or bytearray()
+
+    def tag(self):
+        return self._tag
+
+    @property
+    def block_size(self):
+        return self._aes.block_size
+
+    def update(self, data):
+        return self._ctx.update(data)
+
+    def transform(self, data):
+        return self.update(data) + self.finalize()
+
+
+class _AesGcmEncryptor(_AesGcmCryptoTransform):
+    def __init__(self, key, iv, auth_data, auth_tag, aes=None):
+        super(_AesGcmEncryptor, self).__init__(key, iv, auth_tag, aes)
+        self._ctx = Cipher(self._aes, modes.GCM(iv), backend=default_backend()).encryptor()
+        self._ctx.authenticate_additional_data(auth_data)
+        self._tag[:] = []
+
+    def finalize(self):
+        cipher_text = self._ctx.finalize()
+        self._tag.extend(self._ctx.tag)
+        return cipher_text
+
+
+class _AesGcmDecryptor(_AesGcmCryptoTransform):
+    def __init__(self, key, iv, auth_data, auth_tag, aes=None):
+        super(_AesGcmDecryptor, self).__init__(key, iv, auth_tag, aes)
+        self._ctx = Cipher(self._aes, modes.GCM(iv, bytes(self._tag)), backend=default_backend()).decryptor()
+        self._ctx.authenticate_additional_data(auth_data)
+
+    # the tag is verified by finalize which raises InvalidTag if the cipher text or auth data have been altered
+    def finalize(self):
+        return self._ctx.finalize()
+
+
+class _AesGcm(AuthenticatedSymmetricEncryptionAlgorithm):
+    _key_size = 256
+    _block_size = 128
+    _iv_size = 96
+    _context_cache_size = 32
+
+    def __init__(self):
+        self._contexts = LruCache(self._context_cache_size)
+        self._aeads = LruCache(self._context_cache_size)
+
+    @property
+    def block_size(self):
+        return self._block_size
+
+    @property
+    def block_size_in_bytes(self):
+        return self._block_size >> 3
+
+    @property
+    def iv_size(self):
+        return self._iv_size
+
+    @property
+    def iv_size_in_bytes(self):
+        return self._iv_size >> 3
+
+    @property
+    def key_size(self):
+        return self._key_size
+
+    @property
+    def key_size_in_bytes(self):
+        return self._key_size >> 3
+
+    @property
+    def tag_size_in_bytes(self):
+        return 16
+
+    def cipher_text_size(self, plain_text_size):
+        return plain_text_size
+
+    def create_encryptor(self, key, iv, auth_data, auth_tag=None):
+        key, iv = self._validate_input(key, iv)
+
+        return _AesGcmEncryptor(key, iv, auth_data, auth_tag, self._get_context(key))
+
+    def create_decryptor(self, key, iv, auth_data, auth_tag):
+        key, iv = self._validate_input(key, iv)
+        if not auth_tag:
+            raise ValueError('auth_tag')
+
+        return _AesGcmDecryptor(key, iv, auth_data, auth_tag, self._get_context(key))
+
+    # the bulk record apis encrypt every record under key with a random iv, using the one shot aead so there's no
+    # per record cipher context. decrypt_records raises InvalidTag if any of the records fail to authenticate
+    def encrypt_records(self, key, records, auth_data=b'', record_size=None):
+        encrypt = self._get_aead(self._validate_key(key)).encrypt
+        records = _record_list(records, record_size)
+        iv_size, tag_size = self.iv_size_in_bytes, self.tag_size_in_bytes
+        ivs = os.urandom(iv_size * len(records))
+        outputs = [encrypt(iv, record, auth_data) for iv, record in zip(_split(ivs, iv_size), records)]
+
+        data, offsets = _pack([output[:-tag_size] for output in outputs],
+                              [len(output) - tag_size for output in outputs])
+        return EncryptedRecords(data, offsets, ivs, b''.join([output[-tag_size:] for output in outputs]))
+
+    def decrypt_records(self, key, records, auth_data=b''):
+        decrypt = self._get_aead(self._validate_key(key)).decrypt
+        view = memoryview(records.data)
+        offsets = list(records.offsets)
+        count = len(offsets) - 1
+        if len(records.ivs) != count * self.iv_size_in_bytes or len(records.tags) != count * self.tag_size_in_bytes:
+            raise ValueError('ivs and tags must hold an iv and tag for each record')
+
+        plain_texts = [decrypt(iv, b''.join((view[start:end], tag)), auth_data)
+                       for iv, tag, start, end in zip(_split(records.ivs, self.iv_size_in_bytes),
+                                                      _split(records.tags, self.tag_size_in_bytes),
+                                                      offsets, offsets[1:])]
+        return Records(*_pack(plain_texts, [len(plain_text) for plain_text in plain_texts]))
+
+    def _get_context(self, key):
+        key = bytes(key)
+        return self._contexts.get_or_add(key, lambda: algorithms.AES(key))
+
+    def _get_aead(self, key):
+        key = bytes(key)
+        return self._aeads.get_or_add(key, lambda: AESGCM(key))
+
+    def _validate_key(self, key):
+        if not key:
+            raise ValueError('key')
+        if len(key) < self.key_size_in_bytes:
+            raise ValueError('key must be at least %d bits' % self.key_size)
+
+        return key[:self.key_size_in_bytes]
+
+    def _validate_input(self, key, iv):
+        key = self._validate_key(key)
+
+        if not iv:
+            raise ValueError('iv')
+        if not len(iv) == self.iv_size_in_bytes:
+            raise ValueError('iv must be %d bits' % self.iv_size)
+
+        return key, iv
+
+
+class Aes128Gcm(_AesGcm):
+    _name = 'A128GCM'
+    _key_size = 128
+
+
+class Aes192Gcm(_AesGcm):
+    _name = 'A192GCM'
+    _key_size = 192
+
+
+class Aes256Gcm(_AesGcm):
+    _name = 'A256GCM'
+    _key_size = 256
+
+
+Aes128Gcm.register()
+Aes192Gcm.register()
+Aes256Gcm.register()
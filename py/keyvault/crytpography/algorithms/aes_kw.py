@@ -9,7 +9,7 @@ class _AesKeyWrapTransform(CryptoTransform):
         self._key = key
 
     def transform(self, data):
-        aes_key_wrap(self._key, data, default_backend())
+        return aes_key_wrap(self._key, data, default_backend())
 
 
 class _AesKeyUnwrapTransform(CryptoTransform):
@@ -17,7 +17,7 @@ class _AesKeyUnwrapTransform(CryptoTransform):
         self._key = key
 
     def transform(self, data):
-        aes_key_unwrap(self._key, data, default_backend())
+        return aes_key_unwrap(self._key, data, default_backend())
 
 
 class _AesKeyWrap(EncryptionAlgorithm):
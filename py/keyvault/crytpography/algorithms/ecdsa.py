@@ -1,7 +1,7 @@
 from ..algorithm import Algorithm, SignatureAlgorithm
 from ..transform import SignatureTransform
 from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.hazmat.primitives.asymmetric import ec, utils
 
 
 class _EcdsaSignatureTransform(SignatureTransform):
@@ -15,6 +15,16 @@ class _EcdsaSignatureTransform(SignatureTransform):
     def verify(self, signature, data):
         return self._key.verify(signature, data, ec.ECDSA(self._hash_algo))
 
+    @property
+    def hash_algorithm(self):
+        return self._hash_algo
+
+    def sign_digest(self, digest):
+        return self._key.sign(digest, ec.ECDSA(utils.Prehashed(self._hash_algo)))
+
+    def verify_digest(self, signature, digest):
+        return self._key.verify(signature, digest, ec.ECDSA(utils.Prehashed(self._hash_algo)))
+
     def dispose(self):
         self._key = None
         self._hash_algo = None
@@ -1,6 +1,7 @@
 from ..algorithm import Algorithm, SignatureAlgorithm
 from ..transform import SignatureTransform
-from cryptography.hazmat.primitives import padding, hashes
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import padding, utils
 
 
 class _Rs256SignatureTransform(SignatureTransform):
@@ -15,6 +16,16 @@ class _Rs256SignatureTransform(SignatureTransform):
     def verify(self, signature, data):
         return self._key.verify(signature, data, self._padding, self._hash_algo)
 
+    @property
+    def hash_algorithm(self):
+        return self._hash_algo
+
+    def sign_digest(self, digest):
+        return self._key.sign(digest, self._padding, utils.Prehashed(self._hash_algo))
+
+    def verify_digest(self, signature, digest):
+        return self._key.verify(signature, digest, self._padding, utils.Prehashed(self._hash_algo))
+
     def dispose(self):
         self._key = None
         self._padding = None
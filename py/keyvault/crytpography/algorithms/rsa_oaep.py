@@ -19,19 +19,19 @@ class _RsaCryptoTransform(CryptoTransform):
 
 class _RsaOaepDecryptor(_RsaCryptoTransform):
     def transform(self, data, **kwargs):
-        self._key.decrypt(data, _default_encryption_padding())
+        return self._key.decrypt(data, _default_encryption_padding())
 
 
 class _RsaOaepEncryptor(_RsaCryptoTransform):
     def transform(self, data, **kwargs):
-        self._key.encrypt(data, _default_encryption_padding())
+        return self._key.encrypt(data, _default_encryption_padding())
 
 
 class RsaOaep(EncryptionAlgorithm):
     _name = 'RSA-OAEP'
 
     def create_encryptor(self, key):
-        return _RsaCryptoTransform(key)
+        return _RsaOaepEncryptor(key)
 
     def create_decryptor(self, key):
         return _RsaOaepDecryptor(key)
@@ -0,0 +1,213 @@
+import mmap
+import os
+import struct
+from .algorithm import Algorithm, AuthenticatedSymmetricEncryptionAlgorithm
+from ._parallel import bounded_map, default_window
+from .transform import _fileno
+
+
+# container layout, all integers are big endian
+#
+#   header:  magic (4) | version (1) | algorithm name length (1) | algorithm name | segment size (4)
+#            | plain text size (8) | segment count (4)
+#   index:   segment count * (segment offset (8) | segment length (4))
+#   segment: iv | cipher text | tag
+#
+# every segment is encrypted with its own iv, and the header along with the segment number is passed as the
+# auth data so segments can't be reordered or moved between containers
+_MAGIC = b'KVSC'
+_VERSION = 1
+_HEADER_FORMAT = '>4sBB'
+_SIZES_FORMAT = '>IQI'
+_INDEX_ENTRY_FORMAT = '>QI'
+
+DEFAULT_SEGMENT_SIZE = 1024 * 1024
+
+
+def _resolve_algorithm(name):
+    algorithm = Algorithm.resolve(name)
+    if not isinstance(algorithm, AuthenticatedSymmetricEncryptionAlgorithm):
+        raise ValueError('%s is not an authenticated symmetric encryption algorithm' % name)
+    return algorithm
+
+
+def _validate_key(algorithm, key):
+    if not key or len(key) < algorithm.key_size_in_bytes:
+        raise ValueError('key must be at least %d bits' % algorithm.key_size)
+    return bytes(key[:algorithm.key_size_in_bytes])
+
+
+def _segment_auth_data(header, index):
+    return header + struct.pack('>Q', index)
+
+
+def _encrypt_segment(algorithm_name, key, auth_data, data):
+    algorithm = Algorithm.resolve(algorithm_name)
+    iv = os.urandom(algorithm.iv_size_in_bytes)
+    encryptor = algorithm.create_encryptor(key, iv, auth_data)
+    cipher_text = encryptor.transform(data)
+    return iv + cipher_text + bytes(encryptor.tag())
+
+
+def _decrypt_segment(algorithm_name, key, auth_data, segment):
+    algorithm = Algorithm.resolve(algorithm_name)
+    iv_size, tag_size = algorithm.iv_size_in_bytes, algorithm.tag_size_in_bytes
+    if len(segment) < iv_size + tag_size:
+        raise ValueError('invalid segment')
+    iv = segment[:iv_size]
+    tag = segment[len(segment) - tag_size:]
+    decryptor = algorithm.create_decryptor(key, iv, auth_data, tag)
+    return decryptor.transform(segment[iv_size:len(segment) - tag_size])
+
+
+def encrypt_segmented(source, sink, key, algorithm='A256CBC-HS512', segment_size=DEFAULT_SEGMENT_SIZE,
+                      executor=None):
+    # encrypts source, a seekable file like object or a bytes like object, into sink as a segmented container
+    # segments are encrypted using executor if one is specified, a ProcessPoolExecutor spreads them across processes
+    alg = _resolve_algorithm(algorithm)
+    key = _validate_key(alg, key)
+
+    if hasattr(source, 'read'):
+        start = source.tell()
+        size = source.seek(0, os.SEEK_END) - start
+        source.seek(start)
+        segments = iter(lambda: source.read(segment_size), b'')
+    else:
+        view = memoryview(source)
+        size = len(view)
+        segments = (view[i:i + segment_size].tobytes() for i in range(0, size, segment_size))
+
+    count = -(-size // segment_size) or 1
+    name = algorithm.encode('ascii')
+    header = struct.pack(_HEADER_FORMAT, _MAGIC, _VERSION, len(name)) + name + \
+        struct.pack(_SIZES_FORMAT, segment_size, size, count)
+
+    # the cipher text length of every segment is known up front so the index can be written before the segments
+    overhead = alg.iv_size_in_bytes + alg.tag_size_in_bytes
+    offset = len(header) + count * struct.calcsize(_INDEX_ENTRY_FORMAT)
+    index = []
+    for i in range(count):
+        plain_size = min(segment_size, size - i * segment_size)
+        length = overhead + alg.cipher_text_size(plain_size)
+        index.append(struct.pack(_INDEX_ENTRY_FORMAT, offset, length))
+        offset += length
+
+    sink.write(header)
+    sink.write(b''.join(index))
+
+    # an empty payload is still stored as a single padded segment
+    if not size:
+        segments = iter([b''])
+
+    args = ((algorithm, key, _segment_auth_data(header, i), data) for i, data in enumerate(segments))
+    for segment in bounded_map(executor, _encrypt_segment, args, default_window(executor)):
+        sink.write(segment)
+
+    return offset
+
+
+def decrypt_segmented(source, sink, key, executor=None):
+    # decrypts an entire segmented container into sink, decrypting segments using executor if one is specified
+    with SegmentedReader(source, key) as reader:
+        args = ((reader.algorithm, reader._key, reader._auth_data(i), reader._segment(i).tobytes())
+                for i in range(reader.segment_count))
+        for data in bounded_map(executor, _decrypt_segment, args, default_window(executor)):
+            sink.write(data)
+    return reader.size
+
+
+class SegmentedReader(object):
+    # provides random access reads over a segmented container, only the segments covering the requested range
+    # are decrypted. the container starts at the current position of file sources, which are memory mapped rather
+    # than read into memory when they have a file descriptor
+    def __init__(self, source, key):
+        self._mmap = None
+        self._mapped_view = None
+        fileno = _fileno(source)
+        if fileno is not None:
+            start = source.tell()
+            if os.fstat(fileno).st_size <= start:
+                raise ValueError('invalid segmented container header')
+            self._mmap = mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+            self._mapped_view = memoryview(self._mmap)
+            self._view = self._mapped_view[start:]
+        elif hasattr(source, 'read'):
+            self._view = memoryview(source.read())
+        else:
+            self._view = memoryview(source)
+
+        # the algorithm is named in the header, so the mapping is released if it or the key turn out to be invalid
+        try:
+            try:
+                self._read_header()
+            except (struct.error, UnicodeDecodeError):
+                raise ValueError('invalid segmented container header')
+            self._key = _validate_key(_resolve_algorithm(self.algorithm), key)
+        except BaseException:
+            self.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __len__(self):
+        return self.size
+
+    def read(self, offset=0, length=None):
+        if offset < 0:
+            raise ValueError('offset')
+        end = self.size if length is None else min(self.size, offset + length)
+        if end <= offset:
+            return b''
+
+        first = offset // self.segment_size
+        last = (end - 1) // self.segment_size
+        data = b''.join(self.read_segment(i) for i in range(first, last + 1))
+        start = offset - first * self.segment_size
+        return data[start:start + end - offset]
+
+    def read_segment(self, index):
+        return _decrypt_segment(self.algorithm, self._key, self._auth_data(index), self._segment(index))
+
+    def close(self):
+        if self._view is not None:
+            self._view.release()
+            self._view = None
+        if self._mapped_view is not None:
+            self._mapped_view.release()
+            self._mapped_view = None
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def _read_header(self):
+        view = self._view
+        magic, version, name_length = struct.unpack_from(_HEADER_FORMAT, view, 0)
+        if magic != _MAGIC or version != _VERSION:
+            raise struct.error()
+
+        pos = struct.calcsize(_HEADER_FORMAT)
+        self.algorithm = view[pos:pos + name_length].tobytes().decode('ascii')
+        pos += name_length
+        self.segment_size, self.size, self.segment_count = struct.unpack_from(_SIZES_FORMAT, view, pos)
+        pos += struct.calcsize(_SIZES_FORMAT)
+
+        self._header = view[:pos].tobytes()
+        self._index_offset = pos
+        if len(view) < pos + self.segment_count * struct.calcsize(_INDEX_ENTRY_FORMAT):
+            raise struct.error()
+
+    def _auth_data(self, index):
+        return _segment_auth_data(self._header, index)
+
+    def _segment(self, index):
+        if index < 0 or index >= self.segment_count:
+            raise IndexError('segment index out of range')
+        pos = self._index_offset + index * struct.calcsize(_INDEX_ENTRY_FORMAT)
+        offset, length = struct.unpack_from(_INDEX_ENTRY_FORMAT, self._view, pos)
+        if offset + length > len(self._view):
+            raise ValueError('invalid segmented container index')
+        return self._view[offset:offset + length]
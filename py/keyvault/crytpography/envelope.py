@@ -0,0 +1,154 @@
+import os
+import struct
+import threading
+import time
+from collections import namedtuple
+from cryptography.exceptions import InvalidSignature
+from .algorithm import Algorithm, AuthenticatedSymmetricEncryptionAlgorithm
+from ._cache import LruCache
+from .key_cache import UnwrappedKeyCache
+
+
+# message layout, all integers are big endian
+#
+#   header:  magic (4) | version (1) | data key id (16) | algorithm name length (1) | algorithm name | iv
+#   body:    cipher text | tag
+#
+# the header is included in the auth data so it can't be altered without failing to decrypt. the data key id
+# identifies the WrappedDataKey in the wrapped key store which holds the data key encrypted under the kek
+_MAGIC = b'KVEN'
+_VERSION = 1
+_KEY_ID_SIZE = 16
+
+# the number of resolved algorithms a decryptor keeps, messages normally use one or two
+_ALGORITHM_CACHE_SIZE = 16
+
+WrappedDataKey = namedtuple('WrappedDataKey', ['kid', 'algorithm', 'encrypted_key'])
+
+
+def _resolve_algorithm(name):
+    algorithm = Algorithm.resolve(name)
+    if not isinstance(algorithm, AuthenticatedSymmetricEncryptionAlgorithm):
+        raise ValueError('%s is not an authenticated symmetric encryption algorithm' % name)
+    return algorithm
+
+
+class EnvelopeEncryptor(object):
+    # encrypts messages under a data key which is wrapped once under kek, any Key implementation, and reused until
+    # max_messages messages, max_bytes bytes of plain text or max_age seconds have been encrypted with it, whichever
+    # comes first. a limit of None is unbounded. wrapped data keys are added to wrapped_keys, a mutable mapping of
+    # data key id to WrappedDataKey which the decryptor needs to recover the data keys
+    def __init__(self, kek, wrapped_keys, algorithm='A256CBC-HS512', key_wrap_algorithm=None,
+                 max_messages=2 ** 20, max_bytes=2 ** 32, max_age=3600):
+        self._kek = kek
+        self._wrapped_keys = wrapped_keys
+        self._algorithm_name = algorithm
+        self._algorithm = _resolve_algorithm(algorithm)
+        self._key_wrap_algorithm = key_wrap_algorithm or kek.default_key_wrap_algorithm
+        self._max_messages = max_messages
+        self._max_bytes = max_bytes
+        self._max_age = max_age
+        self._lock = threading.Lock()
+        self._data_key = None
+        self._data_key_id = None
+        self._created = 0
+        self._messages = 0
+        self._bytes = 0
+        self.rotations = 0
+
+    @property
+    def data_key_id(self):
+        return self._data_key_id
+
+    def rotate(self):
+        data_key = os.urandom(self._algorithm.key_size_in_bytes)
+        data_key_id = os.urandom(_KEY_ID_SIZE)
+        encrypted_key = self._kek.wrap_key(data_key, algorithm=self._key_wrap_algorithm)
+        self._wrapped_keys[data_key_id] = WrappedDataKey(self._kek.kid, self._key_wrap_algorithm, encrypted_key)
+
+        self._data_key = data_key
+        self._data_key_id = data_key_id
+        self._created = time.monotonic()
+        self._messages = 0
+        self._bytes = 0
+        self.rotations += 1
+
+    def encrypt(self, plain_text, auth_data=b''):
+        with self._lock:
+            if self._should_rotate(len(plain_text)):
+                self.rotate()
+            self._messages += 1
+            self._bytes += len(plain_text)
+            data_key, data_key_id = self._data_key, self._data_key_id
+
+        name = self._algorithm_name.encode('ascii')
+        iv = os.urandom(self._algorithm.iv_size_in_bytes)
+        header = struct.pack('>4sB', _MAGIC, _VERSION) + data_key_id + struct.pack('>B', len(name)) + name + iv
+
+        encryptor = self._algorithm.create_encryptor(data_key, iv, header + auth_data)
+        cipher_text = encryptor.transform(plain_text)
+        return header + cipher_text + bytes(encryptor.tag())
+
+    def _should_rotate(self, size):
+        if self._data_key is None:
+            return True
+        if self._max_messages is not None and self._messages >= self._max_messages:
+            return True
+        if self._max_bytes is not None and self._bytes + size > self._max_bytes:
+            return True
+        return self._max_age is not None and time.monotonic() - self._created >= self._max_age
+
+
+class EnvelopeDecryptor(object):
+    # decrypts messages created by EnvelopeEncryptor. keks is either a Key, or a callable which returns the Key for a
+    # kid. unwrapped data keys are kept in key_cache, which may be shared between decryptors, so each data key is only
+    # unwrapped once while it's in use
+    def __init__(self, keks, wrapped_keys, key_cache=None):
+        self._keks = keks
+        self._wrapped_keys = wrapped_keys
+        self._key_cache = key_cache if key_cache is not None else UnwrappedKeyCache()
+        self._algorithms = LruCache(_ALGORITHM_CACHE_SIZE)
+
+    def decrypt(self, message, auth_data=b''):
+        view = memoryview(message)
+        try:
+            magic, version = struct.unpack_from('>4sB', view, 0)
+            pos = struct.calcsize('>4sB')
+            data_key_id = view[pos:pos + _KEY_ID_SIZE].tobytes()
+            pos += _KEY_ID_SIZE
+            name_length, = struct.unpack_from('>B', view, pos)
+            pos += 1
+            name = view[pos:pos + name_length].tobytes().decode('ascii')
+            pos += name_length
+        except (struct.error, UnicodeDecodeError):
+            raise ValueError('invalid envelope header')
+
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError('invalid envelope header')
+
+        # the resolved algorithm is reused across messages along with the per key contexts it caches
+        try:
+            algorithm = self._algorithms.get_or_add(name, lambda: _resolve_algorithm(name))
+        except KeyError:
+            raise ValueError('invalid envelope header')
+        iv_size, tag_size = algorithm.iv_size_in_bytes, algorithm.tag_size_in_bytes
+        iv = view[pos:pos + iv_size].tobytes()
+        header = view[:pos + iv_size].tobytes()
+        if len(view) < len(header) + tag_size:
+            raise InvalidSignature()
+
+        data_key = self._get_data_key(data_key_id)
+        decryptor = algorithm.create_decryptor(data_key, iv, header + auth_data, view[len(view) - tag_size:])
+        return decryptor.transform(view[len(header):len(view) - tag_size])
+
+    def _get_data_key(self, data_key_id):
+        try:
+            wrapped = self._wrapped_keys[data_key_id]
+        except KeyError:
+            raise ValueError('invalid envelope header')
+
+        def unwrap():
+            kek = self._keks(wrapped.kid) if callable(self._keks) else self._keks
+            return kek.unwrap_key(wrapped.encrypted_key, algorithm=wrapped.algorithm)
+
+        return self._key_cache.get_or_unwrap(wrapped.kid, wrapped.algorithm, wrapped.encrypted_key, unwrap)
@@ -0,0 +1,118 @@
+import hashlib
+import mmap
+import os
+import queue
+import threading
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives import hashes
+
+
+# hashlib releases the gil while hashing large buffers, so bigger chunks let other threads read or hash meanwhile
+DEFAULT_HASH_CHUNK_SIZE = 1024 * 1024
+
+# the number of buffers read ahead of the one being hashed when reading a file which can't be memory mapped
+_READ_AHEAD_DEPTH = 2
+
+
+def hash_stream(source, hash_algorithm, chunk_size=DEFAULT_HASH_CHUNK_SIZE):
+    # returns the digest of source, which is either a path, a file like object or an iterable of chunks, hashed with
+    # hash_algorithm, a cryptography HashAlgorithm. files are memory mapped, other file like objects are read into
+    # fixed size buffers on a background thread, so the memory used doesn't depend on the size of the input and
+    # reading overlaps hashing
+    digest = _create_hash(hash_algorithm)
+    if isinstance(source, (str, bytes, os.PathLike)):
+        with open(source, 'rb') as f:
+            _hash_file(digest, f, chunk_size)
+    elif hasattr(source, 'readinto') or hasattr(source, 'read'):
+        _hash_file(digest, source, chunk_size)
+    else:
+        for chunk in source:
+            digest.update(chunk)
+    return digest.digest() if hasattr(digest, 'digest') else digest.finalize()
+
+
+def _create_hash(hash_algorithm):
+    try:
+        return hashlib.new(hash_algorithm.name)
+    except ValueError:
+        return hashes.Hash(hash_algorithm, backend=default_backend())
+
+
+def _hash_file(digest, f, chunk_size):
+    mapped = _map(f)
+    if mapped is None:
+        for chunk in _read_ahead(f, chunk_size):
+            digest.update(chunk)
+        return
+
+    try:
+        view = memoryview(mapped)
+        try:
+            for i in range(0, len(view), chunk_size):
+                digest.update(view[i:i + chunk_size])
+        finally:
+            view.release()
+    finally:
+        mapped.close()
+
+
+def _map(f):
+    # maps the rest of a regular file, returning None for anything which can't be mapped such as pipes or in memory
+    # files. the file is read sequentially so the kernel is asked to read ahead aggressively
+    try:
+        fileno = f.fileno()
+        offset = f.tell()
+        size = os.fstat(fileno).st_size
+    except (AttributeError, OSError, ValueError):
+        return None
+    if size <= offset or offset % mmap.ALLOCATIONGRANULARITY:
+        return None
+
+    mapped = mmap.mmap(fileno, size - offset, access=mmap.ACCESS_READ, offset=offset)
+    if hasattr(mapped, 'madvise') and hasattr(mmap, 'MADV_SEQUENTIAL'):
+        mapped.madvise(mmap.MADV_SEQUENTIAL)
+    return mapped
+
+
+def _read_ahead(f, chunk_size):
+    # yields chunks of f read on a background thread into a fixed set of buffers which are reused once the consumer
+    # moves on to the next chunk, each chunk is only valid until the next one is requested
+    readinto = getattr(f, 'readinto', None)
+    if readinto is None:
+        def readinto(buffer):
+            data = f.read(len(buffer))
+            buffer[:len(data)] = data
+            return len(data)
+
+    free = queue.Queue()
+    filled = queue.Queue()
+    for _ in range(_READ_AHEAD_DEPTH + 1):
+        free.put(bytearray(chunk_size))
+
+    def read():
+        try:
+            while True:
+                buffer = free.get()
+                if buffer is None:
+                    return
+                n = readinto(buffer)
+                filled.put((buffer, n))
+                if not n:
+                    return
+        except BaseException as e:
+            filled.put((e, None))
+
+    reader = threading.Thread(target=read, name='hash_stream-reader')
+    reader.daemon = True
+    reader.start()
+    try:
+        while True:
+            buffer, n = filled.get()
+            if n is None:
+                raise buffer
+            if not n:
+                return
+            yield memoryview(buffer)[:n]
+            free.put(buffer)
+    finally:
+        free.put(None)
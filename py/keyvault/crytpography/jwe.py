@@ -0,0 +1,194 @@
+import json
+import os
+from .algorithm import Algorithm
+from .jwk import _b64_decode, _b64_encode
+from .key import Key
+from .key_cache import UnwrappedKeyCache
+from ._cache import LruCache
+from ._parallel import bounded_map, default_window, chunks
+
+
+KEY_MANAGEMENT_ALGORITHMS = ('RSA-OAEP', 'A128KW', 'A192KW', 'A256KW')
+
+CONTENT_ENCRYPTION_ALGORITHMS = ('A128CBC-HS256', 'A192CBC-HS384', 'A256CBC-HS512', 'A128GCM', 'A192GCM', 'A256GCM')
+
+# tokens issued by the same party share a handful of protected headers, so the parsed header of each distinct encoded
+# header is cached process wide rather than decoding and parsing the json for every token
+_HEADER_CACHE_SIZE = 1024
+_headers = LruCache(_HEADER_CACHE_SIZE)
+
+# only keys unwrapped with a private key operation are worth caching, an aes key unwrap is cheaper than a lookup
+_CACHED_ALGORITHMS = frozenset(('RSA-OAEP',))
+
+# the number of tokens handed to an executor at a time by decode_many
+_BATCH_CHUNK_SIZE = 64
+
+
+def _parse_header(protected):
+    try:
+        header = json.loads(_b64_decode(protected).decode('utf-8'))
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError('invalid compact jwe header')
+    if not isinstance(header, dict):
+        raise ValueError('invalid compact jwe header')
+    if header.get('alg') not in KEY_MANAGEMENT_ALGORITHMS:
+        raise ValueError('unsupported algorithm %s' % header.get('alg'))
+    if header.get('enc') not in CONTENT_ENCRYPTION_ALGORITHMS:
+        raise ValueError('unsupported content encryption algorithm %s' % header.get('enc'))
+    if 'zip' in header or 'crit' in header:
+        raise ValueError('unsupported jwe header parameter')
+
+    # the additional authenticated data is the ascii encoded protected header as it appears in the token
+    return header, protected
+
+
+def _parse(token):
+    # splits a compact jwe returning the shared cached header, which must not be modified, the aad and the decoded
+    # encrypted key, iv, cipher text and tag
+    if isinstance(token, str):
+        token = token.encode('ascii')
+    parts = token.split(b'.')
+    if len(parts) != 5:
+        raise ValueError('invalid compact jwe')
+
+    header, aad = _headers.get_or_add(parts[0], lambda: _parse_header(parts[0]))
+    try:
+        encrypted_key, iv, cipher_text, tag = [_b64_decode(part) for part in parts[1:]]
+    except ValueError:
+        raise ValueError('invalid compact jwe')
+    return header, aad, encrypted_key, iv, cipher_text, tag
+
+
+def parse_jwe(token):
+    # splits a compact jwe into its decoded header, encrypted key, iv, cipher text and tag
+    header, _, encrypted_key, iv, cipher_text, tag = _parse(token)
+    return dict(header), encrypted_key, iv, cipher_text, tag
+
+
+def _content_key(enc, cek):
+    # RFC 7518 puts the mac key in the first half of the cbc hmac key, the registered algorithms expect the aes key
+    # first, so the halves are swapped rather than changing the key layout of data already encrypted by them
+    if '-HS' in enc.name():
+        half = len(cek) // 2
+        return cek[half:] + cek[:half]
+    return cek
+
+
+def _wrap_key(key, alg, cek):
+    # key is either a Key or the raw bytes of a symmetric key encryption key
+    if isinstance(key, Key):
+        return key.wrap_key(cek, algorithm=alg)
+    return Algorithm.resolve(alg).create_encryptor(key).transform(cek)
+
+
+def _unwrap_key(key, alg, encrypted_key):
+    if isinstance(key, Key):
+        return key.unwrap_key(encrypted_key, algorithm=alg)
+    return Algorithm.resolve(alg).create_decryptor(key).transform(encrypted_key)
+
+
+class JweEncoder(object):
+    # encrypts payloads to compact jwe tokens for a single recipient key. the protected header is serialized and encoded
+    # once, each token gets a random content encryption key and iv. key is a Key or the bytes of an AES key encryption
+    # key, alg defaults to the key's default key wrap algorithm
+    def __init__(self, key, alg=None, enc='A128CBC-HS256', kid=None, header=None):
+        alg = alg or key.default_key_wrap_algorithm
+        if alg not in KEY_MANAGEMENT_ALGORITHMS:
+            raise ValueError('unsupported algorithm %s' % alg)
+        if enc not in CONTENT_ENCRYPTION_ALGORITHMS:
+            raise ValueError('unsupported content encryption algorithm %s' % enc)
+
+        self._key = key
+        self._alg = alg
+        self._enc = Algorithm.resolve(enc)
+
+        protected = dict(header or {}, alg=alg, enc=enc)
+        kid = kid or getattr(key, 'kid', None)
+        if kid:
+            protected['kid'] = kid
+        self._protected = _b64_encode(json.dumps(protected, separators=(',', ':')).encode('utf-8')).encode('ascii')
+
+    def encode(self, payload):
+        if isinstance(payload, str):
+            payload = payload.encode('utf-8')
+
+        cek = os.urandom(self._enc.key_size_in_bytes)
+        iv = os.urandom(self._enc.iv_size_in_bytes)
+        encrypted_key = _wrap_key(self._key, self._alg, cek)
+        encryptor = self._enc.create_encryptor(_content_key(self._enc, cek), iv, self._protected)
+        cipher_text = encryptor.transform(payload)
+
+        return '.'.join((self._protected.decode('ascii'), _b64_encode(encrypted_key), _b64_encode(iv),
+                         _b64_encode(cipher_text), _b64_encode(bytes(encryptor.tag()))))
+
+    def encode_many(self, payloads):
+        return [self.encode(payload) for payload in payloads]
+
+
+class JweDecoder(object):
+    # decrypts compact jwe tokens with the keys in keys, which is anything with a get(kid) method returning a Key or the
+    # bytes of an AES key encryption key, such as a KeyRing or a dict. unwrapped content encryption keys are kept in
+    # cek_cache so a repeated token doesn't need another unwrap, which for RSA-OAEP is a private key operation
+    def __init__(self, keys, cek_cache=None, algorithms=KEY_MANAGEMENT_ALGORITHMS):
+        self._keys = keys
+        self._cek_cache = cek_cache if cek_cache is not None else UnwrappedKeyCache()
+        self._algorithms = frozenset(algorithms)
+        self.decoded = 0
+        self.failed = 0
+
+    def decode(self, token):
+        # returns the header and payload of the token, raising InvalidSignature or InvalidTag if it isn't authentic
+        try:
+            header, payload = self._decode(token)
+        except Exception:
+            self.failed += 1
+            raise
+        self.decoded += 1
+        return dict(header), payload
+
+    # decodes the tokens over executor, which should be a thread pool as the key objects aren't serialized, returning
+    # a list of (header, payload) with the exception in place of any token which failed
+    def decode_many(self, tokens, executor=None):
+        results = []
+        args = ((chunk,) for chunk in chunks(tokens, _BATCH_CHUNK_SIZE))
+        for chunk_results in bounded_map(executor, self._decode_chunk, args, default_window(executor)):
+            results.extend(chunk_results)
+        return results
+
+    def _decode_chunk(self, chunk):
+        results = []
+        for token in chunk:
+            try:
+                results.append(self.decode(token))
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def _decode(self, token):
+        header, aad, encrypted_key, iv, cipher_text, tag = _parse(token)
+        alg = header['alg']
+        if alg not in self._algorithms:
+            raise ValueError('unsupported algorithm %s' % alg)
+
+        kid = header.get('kid')
+        key = self._keys.get(kid)
+        if key is None:
+            raise ValueError('unknown kid %s' % kid)
+
+        enc = Algorithm.resolve(header['enc'])
+        cached = alg in _CACHED_ALGORITHMS
+        cek = self._cek_cache.get(kid, alg, encrypted_key) if cached else None
+        if cek is None:
+            try:
+                cek = _unwrap_key(key, alg, encrypted_key)
+                if cached:
+                    self._cek_cache.put(kid, alg, encrypted_key, cek)
+            except Exception:
+                # as RFC 7516 recommends, a key which fails to unwrap is replaced with a random one so the failure
+                # surfaces as an authentication failure which can't be distinguished from a bad tag
+                cek = os.urandom(enc.key_size_in_bytes)
+
+        if len(cek) != enc.key_size_in_bytes:
+            cek = os.urandom(enc.key_size_in_bytes)
+        decryptor = enc.create_decryptor(_content_key(enc, cek), iv, aad, tag)
+        return header, decryptor.transform(cipher_text)
@@ -0,0 +1,56 @@
+import base64
+import json
+
+
+def _b64_encode(b):
+    return base64.urlsafe_b64encode(b).rstrip(b'=').decode('ascii')
+
+
+def _b64_decode(s):
+    if isinstance(s, str):
+        s = s.encode('ascii')
+    return base64.urlsafe_b64decode(s + b'=' * (-len(s) % 4))
+
+
+def _int_to_bytes(i, size=None):
+    # the minimal big endian encoding of i, or exactly size bytes for fixed width values such as ec coordinates
+    return i.to_bytes(size or (i.bit_length() + 7) // 8 or 1, 'big')
+
+
+def _bytes_to_int(b):
+    return int.from_bytes(b, 'big')
+
+
+class JsonWebKey(object):
+    # a json web key (RFC 7517), the key material fields hold the raw bytes of the base64url encoded json values
+    _FIELDS = ('kid', 'kty', 'key_ops', 'crv', 'n', 'e', 'd', 'dp', 'dq', 'qi', 'p', 'q', 'k', 'x', 'y')
+    _BYTES_FIELDS = frozenset(('n', 'e', 'd', 'dp', 'dq', 'qi', 'p', 'q', 'k', 'x', 'y'))
+
+    def __init__(self, **kwargs):
+        for field in self._FIELDS:
+            setattr(self, field, kwargs.get(field))
+
+    @staticmethod
+    def from_dict(d):
+        jwk = JsonWebKey()
+        for field in JsonWebKey._FIELDS:
+            value = d.get(field)
+            if value is not None and field in JsonWebKey._BYTES_FIELDS:
+                value = _b64_decode(value)
+            setattr(jwk, field, value)
+        return jwk
+
+    @staticmethod
+    def from_json(s):
+        return JsonWebKey.from_dict(json.loads(s))
+
+    def to_dict(self):
+        d = {}
+        for field in self._FIELDS:
+            value = getattr(self, field)
+            if value is not None:
+                d[field] = _b64_encode(value) if field in self._BYTES_FIELDS else value
+        return d
+
+    def to_json(self):
+        return json.dumps(self.to_dict())
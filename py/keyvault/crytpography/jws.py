@@ -0,0 +1,198 @@
+import hashlib
+import json
+import threading
+import time
+from cryptography.exceptions import InvalidSignature
+from .jwk import JsonWebKey, _b64_decode
+from .rsa_key import RsaKey
+from .ec_key import EcKey
+from ._cache import LruCache
+
+
+DEFAULT_ALGORITHMS = ('RS256', 'ES256', 'ES384', 'ES512')
+
+
+def _materialize(jwk):
+    if jwk.kty in ('RSA', 'RSA-HSM'):
+        return RsaKey.from_jwk(jwk)
+    if jwk.kty in ('EC', 'EC-HSM'):
+        return EcKey.from_jwk(jwk)
+    return None
+
+
+def parse_jws(token):
+    # splits a compact jws into its decoded header, payload and signature along with the signing input
+    if isinstance(token, str):
+        token = token.encode('ascii')
+    parts = token.split(b'.')
+    if len(parts) != 3:
+        raise ValueError('invalid compact jws')
+    try:
+        header = json.loads(_b64_decode(parts[0]).decode('utf-8'))
+        payload = _b64_decode(parts[1])
+        signature = _b64_decode(parts[2])
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError('invalid compact jws')
+    if not isinstance(header, dict):
+        raise ValueError('invalid compact jws header')
+    return header, payload, signature, token[:len(parts[0]) + 1 + len(parts[1])]
+
+
+class JwksCache(object):
+    # a kid indexed cache of the keys in a json web key set. fetch is a callable returning the jwks as a dict, it's
+    # called when the cache is older than refresh_interval seconds, or when an unknown kid is requested, but no more
+    # often than min_refresh_interval seconds so unknown kids can't be used to hammer the jwks endpoint
+    def __init__(self, fetch, refresh_interval=3600, min_refresh_interval=30):
+        self._fetch = fetch
+        self._refresh_interval = refresh_interval
+        self._min_refresh_interval = min_refresh_interval
+        self._lock = threading.Lock()
+        self._keys = {}
+        self._jwks = {}
+        self._refreshed = None
+        self.refreshes = 0
+        self.version = 0
+
+    def get(self, kid):
+        if self._needs_refresh(kid):
+            # the check is repeated under the lock so callers which waited for another's refresh use its result
+            with self._lock:
+                if self._needs_refresh(kid):
+                    self._refresh()
+        return self._keys.get(kid)
+
+    def refresh(self):
+        with self._lock:
+            self._refresh()
+
+    def _needs_refresh(self, kid):
+        refreshed = self._refreshed
+        if refreshed is None:
+            return True
+        age = time.monotonic() - refreshed
+        return age >= self._refresh_interval or (kid not in self._keys and age >= self._min_refresh_interval)
+
+    def _refresh(self):
+        # called with the lock held, so concurrent lookups of unknown kids wait for one fetch rather than each fetching
+        jwks = self._fetch()
+        keys = {}
+        jwk_dicts = {}
+        for jwk_dict in jwks.get('keys', []):
+            kid = jwk_dict.get('kid')
+            if not kid:
+                continue
+            jwk_dicts[kid] = jwk_dict
+            # keys which haven't changed keep their materialized key
+            if self._jwks.get(kid) == jwk_dict:
+                keys[kid] = self._keys[kid]
+                continue
+            key = _materialize(JsonWebKey.from_dict(jwk_dict))
+            if key is not None:
+                keys[kid] = key
+
+        changed = jwk_dicts != self._jwks
+        self._keys = keys
+        self._jwks = jwk_dicts
+        self._refreshed = time.monotonic()
+        self.refreshes += 1
+        if changed:
+            self.version += 1
+
+
+class JwsVerifier(object):
+    # verifies compact jws tokens against the keys in a JwksCache. the results of recent verifications are kept in an
+    # lru cache keyed by the kid, algorithm, signing input hash and signature, so a repeated token doesn't need a public
+    # key operation. the result cache is cleared whenever the jwks changes
+    def __init__(self, jwks, result_cache_size=10000, algorithms=DEFAULT_ALGORITHMS):
+        self._jwks = jwks
+        self._algorithms = frozenset(algorithms)
+        self._results = LruCache(result_cache_size)
+        self._jwks_version = jwks.version
+        self._started = time.monotonic()
+        self._lock = threading.Lock()
+        self.verified = 0
+        self.failed = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def verify(self, token):
+        # returns the header and payload of the token, raises InvalidSignature if the signature isn't valid
+        header, payload, signature, signing_input = parse_jws(token)
+
+        alg = header.get('alg')
+        if alg not in self._algorithms:
+            raise ValueError('unsupported algorithm %s' % alg)
+
+        kid = header.get('kid')
+        key = self._jwks.get(kid)
+        if key is None:
+            with self._lock:
+                self.failed += 1
+            raise InvalidSignature('unknown kid %s' % kid)
+
+        with self._lock:
+            if self._jwks.version != self._jwks_version:
+                self._jwks_version = self._jwks.version
+                self._results.clear()
+
+        cache_key = (kid, alg, hashlib.sha256(signing_input).digest(), signature)
+        hit = [True]
+
+        def verify_signature():
+            hit[0] = False
+            return _verify_signature(key, alg, signature, signing_input)
+
+        valid = self._results.get_or_add(cache_key, verify_signature)
+        # the counters are updated together under the lock as verify is called from many threads
+        with self._lock:
+            if hit[0]:
+                self.cache_hits += 1
+            else:
+                self.cache_misses += 1
+            if valid:
+                self.verified += 1
+            else:
+                self.failed += 1
+
+        if not valid:
+            raise InvalidSignature()
+        return header, payload
+
+    def decode_jwt(self, token, leeway=0):
+        # verifies the token and returns its claims, raising ValueError if the token has expired or isn't yet valid
+        _, payload = self.verify(token)
+        claims = json.loads(payload.decode('utf-8'))
+        if not isinstance(claims, dict):
+            raise ValueError('invalid jwt claims')
+
+        now = time.time()
+        if 'exp' in claims and now > claims['exp'] + leeway:
+            raise ValueError('jwt has expired')
+        if 'nbf' in claims and now < claims['nbf'] - leeway:
+            raise ValueError('jwt is not yet valid')
+        return claims
+
+    def stats(self):
+        elapsed = time.monotonic() - self._started
+        with self._lock:
+            verified, failed, cache_hits, cache_misses = self.verified, self.failed, self.cache_hits, self.cache_misses
+        lookups = cache_hits + cache_misses
+        return {
+            'verified': verified,
+            'failed': failed,
+            'tokens_per_sec': (verified + failed) / elapsed if elapsed else 0.0,
+            'cache_hits': cache_hits,
+            'cache_misses': cache_misses,
+            'cache_hit_rate': float(cache_hits) / lookups if lookups else 0.0,
+            'cache_size': len(self._results),
+            'jwks_refreshes': self._jwks.refreshes
+        }
+
+
+def _verify_signature(key, alg, signature, signing_input):
+    # keys raise ValueError for an algorithm they don't support, such as an ecdsa algorithm for a different curve
+    try:
+        key.verify(signature, signing_input, algorithm=alg)
+        return True
+    except (InvalidSignature, ValueError):
+        return False
@@ -1,6 +1,21 @@
 from abc import ABCMeta, abstractmethod
 from six import with_metaclass
 from .algorithm import Algorithm
+from ._cache import LruCache
+from ._parallel import pairs
+
+
+_ALGORITHM_CACHE_SIZE = 16
+
+# maps each operation to the names of the default and supported algorithm properties for the operation
+_OPERATION_ALGORITHMS = {
+    'encrypt': ('default_encryption_algorithm', 'supported_encryption_algorithms'),
+    'decrypt': ('default_encryption_algorithm', 'supported_encryption_algorithms'),
+    'wrapKey': ('default_key_wrap_algorithm', 'supported_key_wrap_algorithms'),
+    'unwrapKey': ('default_key_wrap_algorithm', 'supported_key_wrap_algorithms'),
+    'sign': ('default_signature_algorithm', 'supported_signature_algorithms'),
+    'verify': ('default_signature_algorithm', 'supported_signature_algorithms')
+}
 
 
 class Key(with_metaclass(ABCMeta, object)):
@@ -60,20 +75,43 @@ class Key(with_metaclass(ABCMeta, object)):
     def verify(self, digest, signature, **kwargs):
         raise NotImplementedError()
 
+    # batch variants of sign and verify, the results are reported per item rather than raised. sign_many returns a list
+    # with the exception in place of any signature which failed and verify_many returns a bytearray of 1 for each valid
+    # signature and 0 otherwise, raising ValueError if signatures and data differ in length. implementations which hold
+    # the key locally override these to spread the work out
+    def sign_many(self, data, **kwargs):
+        signatures = []
+        for item in data:
+            try:
+                signatures.append(self.sign(item, **kwargs))
+            except Exception as e:
+                signatures.append(e)
+        return signatures
+
+    def verify_many(self, signatures, data, **kwargs):
+        flags = bytearray()
+        for signature, item in pairs(signatures, data):
+            try:
+                flags.append(self.verify(signature, item, **kwargs) is not False)
+            except Exception:
+                flags.append(0)
+        return flags
+
     def _get_algorithm(self, op, **kwargs):
-        default_algorithm, supported_alogrithms = {
-            'encrypt': (self.default_encryption_algorithm, self.supported_encryption_algorithms),
-            'decrypt': (self.default_encryption_algorithm, self.supported_encryption_algorithms),
-            'wrapKey': (self.default_key_wrap_algorithm, self._supported_key_wrap_algorithms),
-            'unwrapKey': (self.default_key_wrap_algorithm, self._supported_key_wrap_algorithms),
-            'sign': (self.default_signature_algorithm, self.supported_signature_algorithms),
-            'verify': (self.default_signature_algorithm, self.supported_signature_algorithms)
-        }[op]
+        default_property, supported_property = _OPERATION_ALGORITHMS[op]
 
-        algorithm = kwargs.get('algorithm', default_algorithm)
+        algorithm = kwargs.get('algorithm') or getattr(self, default_property)
+        if not algorithm:
+            raise ValueError('invalid algorithm')
 
         if not isinstance(algorithm, Algorithm):
-            algorithm = Algorithm.resolve(algorithm)
+            # resolved algorithms are cached on the key so they, and any state they cache, are reused across operations
+            cache = getattr(self, '_algorithm_cache', None)
+            if cache is None:
+                cache = self._algorithm_cache = LruCache(_ALGORITHM_CACHE_SIZE)
+            algorithm = cache.get_or_add(algorithm, lambda: Algorithm.resolve(algorithm))
 
-        if not algorithm or algorithm.name() not in supported_alogrithms:
+        if algorithm.name() not in getattr(self, supported_property):
             raise ValueError('invalid algorithm')
+
+        return algorithm
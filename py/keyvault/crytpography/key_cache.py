@@ -0,0 +1,111 @@
+import hashlib
+import struct
+import threading
+import time
+from collections import OrderedDict
+
+
+def _cache_key(kid, algorithm, encrypted_key):
+    digest = hashlib.sha256()
+    for part in (kid or '').encode('utf-8'), (algorithm or '').encode('utf-8'), bytes(encrypted_key):
+        digest.update(struct.pack('>I', len(part)))
+        digest.update(part)
+    return digest.digest()
+
+
+def _clear(key):
+    key[:] = bytes(len(key))
+
+
+class UnwrappedKeyCache(object):
+    # a thread safe cache of unwrapped keys, indexed by a hash of the kid, algorithm and wrapped key bytes. holds at
+    # most capacity keys, evicting the least recently used, and keys expire ttl seconds after they were unwrapped.
+    # the cache's own copies are stored in bytearrays which are zeroed when they're evicted, expired or cleared. this
+    # is best effort only: lookups return a bytes copy owned by the caller, and the unwrap result, the algorithms'
+    # cached contexts and the underlying cipher objects all hold their own copies which are never zeroed
+    def __init__(self, capacity=1024, ttl=300):
+        self._capacity = capacity
+        self._ttl = ttl
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def unwrap_key(self, key, encrypted_key, algorithm=None):
+        # unwraps encrypted_key with key, a Key implementation, returning the cached value if there is one
+        algorithm = algorithm or key.default_key_wrap_algorithm
+        return self.get_or_unwrap(key.kid, algorithm, encrypted_key,
+                                  lambda: key.unwrap_key(encrypted_key, algorithm=algorithm))
+
+    def get_or_unwrap(self, kid, algorithm, encrypted_key, unwrap):
+        cache_key = _cache_key(kid, algorithm, encrypted_key)
+        value = self._get(cache_key)
+        if value is not None:
+            return value
+
+        # unwrap outside of the lock as it's likely a slow asymmetric operation or a remote call
+        value = unwrap()
+        self._put(cache_key, value)
+        return value
+
+    def get(self, kid, algorithm, encrypted_key):
+        return self._get(_cache_key(kid, algorithm, encrypted_key))
+
+    def put(self, kid, algorithm, encrypted_key, key):
+        self._put(_cache_key(kid, algorithm, encrypted_key), key)
+
+    def purge(self):
+        # removes all expired keys
+        now = time.monotonic()
+        with self._lock:
+            for cache_key in [k for k, (_, expires) in self._items.items() if expires <= now]:
+                self._evict(cache_key)
+
+    def clear(self):
+        with self._lock:
+            for value, _ in self._items.values():
+                _clear(value)
+            self._items.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._items),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': float(self.hits) / lookups if lookups else 0.0
+            }
+
+    def _get(self, cache_key):
+        with self._lock:
+            item = self._items.get(cache_key)
+            if item is not None and item[1] <= time.monotonic():
+                self._evict(cache_key)
+                item = None
+
+            if item is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._items.move_to_end(cache_key)
+            return bytes(item[0])
+
+    def _put(self, cache_key, key):
+        with self._lock:
+            if cache_key in self._items:
+                _clear(self._items.pop(cache_key)[0])
+            self._items[cache_key] = (bytearray(key), time.monotonic() + self._ttl)
+            while len(self._items) > self._capacity:
+                self._evict(next(iter(self._items)))
+
+    def _evict(self, cache_key):
+        value, _ = self._items.pop(cache_key)
+        _clear(value)
+        self.evictions += 1
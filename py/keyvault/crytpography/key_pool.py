@@ -0,0 +1,205 @@
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric.rsa import generate_private_key
+from .rsa_key import RsaKey
+
+
+# after a size fails to generate its refill is retried after a delay which doubles with each consecutive failure
+_MIN_RETRY_DELAY = 0.1
+_MAX_RETRY_DELAY = 30.0
+
+
+def _generate_der(size, e):
+    key = generate_private_key(public_exponent=e, key_size=size, backend=default_backend())
+    return key.private_bytes(serialization.Encoding.DER, serialization.PrivateFormat.PKCS8,
+                             serialization.NoEncryption())
+
+
+def _load_der(der):
+    # the keys were generated by the pool's own workers so the expensive key validation can be skipped
+    try:
+        return serialization.load_der_private_key(der, password=None, backend=default_backend(),
+                                                  unsafe_skip_rsa_key_validation=True)
+    except TypeError:
+        return serialization.load_der_private_key(der, password=None, backend=default_backend())
+
+
+class RsaKeyPool(object):
+    # keeps depth pre-generated rsa keys for each of the (size, exponent) pairs in sizes, refilled in the background
+    # by max_workers worker processes. generate takes a key from the pool, falling back to generating the key inline
+    # when the pool for the requested size is empty or the size isn't pooled. if the workers fail to generate a size
+    # its refill backs off and the failure is reported by stats, a broken executor, such as one whose worker was
+    # killed, is replaced when the refill is retried
+    def __init__(self, sizes=((2048, 65537),), depth=8, max_workers=None):
+        self._depth = depth
+        self._lock = threading.Lock()
+        self._keys = dict((tuple(size), deque()) for size in sizes)
+        self._pending = dict((tuple(size), 0) for size in sizes)
+        self._errors = {}
+        self._failures = {}
+        self._retry_at = {}
+        self._max_workers = max_workers
+        self._executor = ProcessPoolExecutor(max_workers)
+        self._broken = False
+        self._closed = False
+        self._started = time.monotonic()
+        self.generated = 0
+        self.hits = 0
+        self.misses = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+        # work is submitted to the workers from a background thread so generate never waits on the executor
+        self._refill_needed = threading.Event()
+        self._refill_needed.set()
+        self._refill_thread = threading.Thread(target=self._run_refill, name='RsaKeyPool-refill')
+        self._refill_thread.daemon = True
+        self._refill_thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def generate(self, kid=None, kty='RSA', size=2048, e=65537):
+        start = time.perf_counter()
+        pool = self._keys.get((size, e))
+        rsa_impl = None
+        if pool is not None:
+            with self._lock:
+                rsa_impl = pool.popleft() if pool else None
+            self._refill_needed.set()
+
+        if rsa_impl is None:
+            key = RsaKey.generate(kid=kid, kty=kty, size=size, e=e)
+        else:
+            key = RsaKey()
+            key.kid = kid or str(uuid.uuid4())
+            key.kty = kty
+            key.key_ops = RsaKey.PRIVATE_KEY_DEFAULT_OPS
+            key._rsa_impl = rsa_impl
+
+        wait = time.perf_counter() - start
+        with self._lock:
+            if rsa_impl is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            self._wait_total += wait
+            self._wait_max = max(self._wait_max, wait)
+        return key
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+        self._refill_needed.set()
+        self._refill_thread.join()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self):
+        elapsed = time.monotonic() - self._started
+        with self._lock:
+            depth = dict(('%d/%d' % size, len(keys)) for size, keys in self._keys.items())
+            errors = dict(('%d/%d' % size, repr(error)) for size, error in self._errors.items())
+            generated, hits, misses = self.generated, self.hits, self.misses
+            wait_total, wait_max = self._wait_total, self._wait_max
+        requests = hits + misses
+        return {
+            'depth': depth,
+            'errors': errors,
+            'generated': generated,
+            'refill_per_sec': generated / elapsed if elapsed else 0.0,
+            'hits': hits,
+            'misses': misses,
+            'wait_avg_us': wait_total / requests * 1e6 if requests else 0.0,
+            'wait_max_us': wait_max * 1e6
+        }
+
+    def _run_refill(self):
+        timeout = None
+        while True:
+            self._refill_needed.wait(timeout)
+            self._refill_needed.clear()
+
+            with self._lock:
+                broken, self._broken = self._broken, False
+            if broken:
+                self._replace_executor()
+
+            # sizes which are backing off after a failure are skipped, waking again when the first is due a retry
+            timeout = None
+            now = time.monotonic()
+            for size in self._keys:
+                with self._lock:
+                    if self._closed:
+                        return
+                    retry_at = self._retry_at.get(size, now)
+                    if retry_at > now:
+                        timeout = min(timeout, retry_at - now) if timeout is not None else retry_at - now
+                        continue
+                    needed = max(self._depth - len(self._keys[size]) - self._pending[size], 0)
+                    self._pending[size] += needed
+
+                for i in range(needed):
+                    try:
+                        future = self._executor.submit(_generate_der, *size)
+                    except Exception as e:
+                        # a broken or shut down executor, the keys which weren't submitted are no longer pending
+                        with self._lock:
+                            self._pending[size] -= needed - i
+                            self._record_failure(size, e)
+                        self._refill_needed.set()
+                        break
+                    future.add_done_callback(lambda f, size=size: self._on_generated(size, f))
+
+    def _replace_executor(self):
+        # only the refill thread submits work, so the executor can be swapped without holding the lock
+        executor = self._executor
+        self._executor = ProcessPoolExecutor(self._max_workers)
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _on_generated(self, size, future):
+        # keys are deserialized on the callback thread so generate only has to take a ready key from the pool
+        if future.cancelled():
+            with self._lock:
+                self._pending[size] -= 1
+            return
+
+        error = future.exception()
+        rsa_impl = None
+        if error is None:
+            try:
+                rsa_impl = _load_der(future.result())
+            except Exception as e:
+                error = e
+
+        with self._lock:
+            self._pending[size] -= 1
+            if rsa_impl is not None:
+                self._keys[size].append(rsa_impl)
+                self.generated += 1
+                self._errors.pop(size, None)
+                self._failures.pop(size, None)
+                self._retry_at.pop(size, None)
+                return
+
+            self._record_failure(size, error)
+
+        # wake the refill thread so it waits for the retry rather than resubmitting
+        self._refill_needed.set()
+
+    def _record_failure(self, size, error):
+        # called with the lock held, the failures of keys submitted together only extend the backoff once
+        self._errors[size] = error
+        if isinstance(error, BrokenExecutor):
+            self._broken = True
+        now = time.monotonic()
+        if self._retry_at.get(size, now) <= now:
+            failures = self._failures[size] = self._failures.get(size, 0) + 1
+            self._retry_at[size] = now + min(_MIN_RETRY_DELAY * 2 ** (failures - 1), _MAX_RETRY_DELAY)
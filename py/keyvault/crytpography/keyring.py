@@ -0,0 +1,248 @@
+import hashlib
+import mmap
+import os
+import struct
+import threading
+from .jwk import JsonWebKey
+from .rsa_key import RsaKey
+from .ec_key import EcKey
+from .symmetric_key import SymmetricKey
+
+
+# a key ring is a pair of files
+#
+#   data file:   magic (4) | version (1) | records
+#   record:      kid length (2) | kid | jwk length (4) | jwk json
+#
+#   index file:  magic (4) | version (1) | entry count (4) | entries
+#   entry:       kid hash (16) | record offset (8) | record length (4)
+#
+# records are only ever appended to the data file. the index entries are sorted by the truncated sha256 of the kid
+# so lookups are a binary search over the memory mapped index, the index is rewritten and atomically replaced
+# whenever records are added so concurrent readers keep a consistent view. when a kid is added more than once the
+# index points at the latest record, kids whose hashes collide each keep their own entry
+_DATA_MAGIC = b'KVKR'
+_INDEX_MAGIC = b'KVKI'
+_VERSION = 1
+_HEADER_FORMAT = '>4sB'
+_INDEX_HEADER_FORMAT = '>4sBI'
+_ENTRY_FORMAT = '>16sQI'
+_HASH_SIZE = 16
+
+# materializes a key from its jwk, keyed by the jwk kty
+_KEY_TYPES = {
+    'RSA': RsaKey.from_jwk,
+    'RSA-HSM': RsaKey.from_jwk,
+    'EC': EcKey.from_jwk,
+    'EC-HSM': EcKey.from_jwk,
+    'oct': SymmetricKey.from_jwk,
+    'oct-HSM': SymmetricKey.from_jwk
+}
+
+
+def _index_path(path):
+    return path + '.idx'
+
+
+def _kid_hash(kid):
+    return hashlib.sha256(kid.encode('utf-8')).digest()[:_HASH_SIZE]
+
+
+def _check_header(view, fmt, magic, path):
+    if len(view) < struct.calcsize(fmt) or struct.unpack_from(fmt, view, 0)[:2] != (magic, _VERSION):
+        raise ValueError('%s is not a valid key ring file' % path)
+
+
+class KeyRingWriter(object):
+    # appends keys to the key ring at path, creating it if it doesn't exist, and rewrites the index on close. only
+    # one writer should be open on a key ring at a time, readers may be open concurrently
+    def __init__(self, path):
+        self._path = path
+        self._entries = {}
+        self._data = open(path, 'ab')
+        try:
+            if self._data.tell() == 0:
+                self._data.write(struct.pack(_HEADER_FORMAT, _DATA_MAGIC, _VERSION))
+            self._load_index()
+        except Exception:
+            self._data.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def add(self, key, include_private=True):
+        # key is either a JsonWebKey, or a Key which can be exported with to_jwk
+        jwk = key if isinstance(key, JsonWebKey) else key.to_jwk(include_private=include_private)
+        if not jwk.kid:
+            raise ValueError('keys added to a key ring must have a kid')
+
+        kid = jwk.kid.encode('utf-8')
+        data = jwk.to_json().encode('utf-8')
+        record = struct.pack('>H', len(kid)) + kid + struct.pack('>I', len(data)) + data
+
+        offset = self._data.tell()
+        self._data.write(record)
+        self._entries[jwk.kid] = (offset, len(record))
+
+    def close(self):
+        if self._data.closed:
+            return
+        self._data.flush()
+        os.fsync(self._data.fileno())
+        self._data.close()
+        self._write_index()
+
+    def _load_index(self):
+        path = _index_path(self._path)
+        if not os.path.exists(path):
+            return
+        with open(path, 'rb') as f:
+            index = f.read()
+        _check_header(index, _INDEX_HEADER_FORMAT, _INDEX_MAGIC, path)
+        _, _, count = struct.unpack_from(_INDEX_HEADER_FORMAT, index, 0)
+        start = struct.calcsize(_INDEX_HEADER_FORMAT)
+        entries = index[start:start + count * struct.calcsize(_ENTRY_FORMAT)]
+
+        # the index only holds the kid hashes, the entries are keyed by the kids read from their records
+        with open(self._path, 'rb') as data:
+            for _, offset, length in struct.iter_unpack(_ENTRY_FORMAT, entries):
+                data.seek(offset)
+                header = data.read(2)
+                kid_length = struct.unpack('>H', header)[0] if len(header) == 2 else 0
+                kid = data.read(kid_length)
+                if not kid or len(kid) != kid_length or 2 + kid_length + 4 > length:
+                    raise ValueError('%s has an index entry outside of the data file' % self._path)
+                self._entries[kid.decode('utf-8')] = (offset, length)
+
+    def _write_index(self):
+        path = _index_path(self._path)
+        temp_path = path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(struct.pack(_INDEX_HEADER_FORMAT, _INDEX_MAGIC, _VERSION, len(self._entries)))
+            f.write(b''.join(struct.pack(_ENTRY_FORMAT, *entry)
+                             for entry in sorted((_kid_hash(kid), offset, length)
+                                                 for kid, (offset, length) in self._entries.items())))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+
+
+class KeyRing(object):
+    # read only access to a key ring, both files are memory mapped so opening a key ring doesn't read or parse the
+    # keys, and several processes can share the pages. keys are materialized on first use and cached
+    def __init__(self, path):
+        self._path = path
+        self._lock = threading.Lock()
+        self._keys = {}
+        self._data = self._index = None
+        try:
+            # the index is mapped first, a writer only replaces it after its records are appended to the data file so
+            # every record the mapped index refers to is then within the data mapping
+            self._index = self._map(_index_path(path), _INDEX_HEADER_FORMAT, _INDEX_MAGIC)
+            self._data = self._map(path, _HEADER_FORMAT, _DATA_MAGIC)
+        except Exception:
+            self.close()
+            raise
+
+        _, _, self._count = struct.unpack_from(_INDEX_HEADER_FORMAT, self._index, 0)
+        self._entries_offset = struct.calcsize(_INDEX_HEADER_FORMAT)
+        self._entry_size = struct.calcsize(_ENTRY_FORMAT)
+        if len(self._index) < self._entries_offset + self._count * self._entry_size:
+            self.close()
+            raise ValueError('%s is not a valid key ring index' % _index_path(path))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __len__(self):
+        return self._count
+
+    def __contains__(self, kid):
+        return self._find(kid) is not None
+
+    def get(self, kid):
+        key = self._keys.get(kid)
+        if key is None:
+            jwk = self.get_jwk(kid)
+            if jwk is None:
+                return None
+
+            materialize = _KEY_TYPES.get(jwk.kty)
+            if not materialize:
+                raise ValueError('unsupported key type %s' % jwk.kty)
+
+            with self._lock:
+                key = self._keys.get(kid)
+                if key is None:
+                    key = self._keys[kid] = materialize(jwk)
+        return key
+
+    def get_jwk(self, kid):
+        record = self._find(kid)
+        return JsonWebKey.from_json(record.decode('utf-8')) if record is not None else None
+
+    def kids(self):
+        for i in range(self._count):
+            pos = self._entries_offset + i * self._entry_size
+            _, offset, length = struct.unpack_from(_ENTRY_FORMAT, self._index, pos)
+            yield self._record(offset, length)[0].decode('utf-8')
+
+    def close(self):
+        for mapped in (self._data, self._index):
+            if mapped is not None:
+                mapped.close()
+        self._data = self._index = None
+
+    def _map(self, path, fmt, magic):
+        with open(path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            _check_header(mapped, fmt, magic, path)
+        except Exception:
+            mapped.close()
+            raise
+        return mapped
+
+    def _find(self, kid):
+        # binary search the index for the first entry with the kid hash, then check the kid of each matching record
+        kid_hash = _kid_hash(kid)
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            pos = self._entries_offset + mid * self._entry_size
+            if self._index[pos:pos + _HASH_SIZE] < kid_hash:
+                lo = mid + 1
+            else:
+                hi = mid
+
+        kid = kid.encode('utf-8')
+        while lo < self._count:
+            entry_hash, offset, length = struct.unpack_from(_ENTRY_FORMAT, self._index,
+                                                            self._entries_offset + lo * self._entry_size)
+            if entry_hash != kid_hash:
+                break
+            record_kid, record = self._record(offset, length)
+            if record_kid == kid:
+                return record
+            lo += 1
+
+        return None
+
+    def _record(self, offset, length):
+        # returns the kid and jwk of the record at offset, checking it lies within the data file so a corrupt index,
+        # or one written for a longer data file, can't read past the mapping
+        data = self._data
+        if length < 6 or offset + length > len(data):
+            raise ValueError('%s has an index entry outside of the data file' % self._path)
+        kid_length, = struct.unpack_from('>H', data, offset)
+        kid_end = offset + 2 + kid_length
+        if kid_end + 4 > offset + length:
+            raise ValueError('%s has an invalid record at offset %d' % (self._path, offset))
+        return data[offset + 2:kid_end], data[kid_end + 4:offset + length]
@@ -0,0 +1,254 @@
+import functools
+import json
+import threading
+import types
+import weakref
+from time import perf_counter_ns
+
+
+# latencies are recorded in power of two nanosecond buckets, bucket i counts latencies in [2^(i-1), 2^i) ns
+_BUCKET_COUNT = 64
+
+# the instrumented methods of each base class and the index of the argument holding the input data, if any
+_TRANSFORM_METHODS = {
+    'transform': 0,
+    'update': 0,
+    'finalize': None,
+    'update_into': 0,
+    'finalize_into': None,
+    'sign': 0,
+    'verify': 1,
+    'sign_digest': 0,
+    'verify_digest': 1
+}
+
+# the factory methods of the algorithms, the transforms they create are labeled with the algorithm and operation
+_FACTORY_OPERATIONS = {
+    'create_encryptor': 'encrypt',
+    'create_decryptor': 'decrypt',
+    'create_signature_transform': None
+}
+
+_lock = threading.Lock()
+_enabled = False
+_patched = []
+_local = threading.local()
+
+# the stats of each live thread which has recorded metrics keyed by id, when a thread exits its stats are folded into
+# _retired and dropped so threads which come and go don't accumulate
+_stores = {}
+_retired = {}
+
+
+def is_enabled():
+    return _enabled
+
+
+def enable():
+    # instruments the transform, algorithm and key classes, classes defined while metrics are enabled are
+    # instrumented when they're created. when metrics are disabled the original methods are restored so there's no
+    # overhead other than a flag check when a new class is defined
+    global _enabled
+    from .algorithm import Algorithm
+    from .key import Key
+    from .transform import CryptoTransform, SignatureTransform
+
+    with _lock:
+        if _enabled:
+            return
+        _enabled = True
+        for base in (CryptoTransform, SignatureTransform, Algorithm):
+            for cls in _subclasses(base):
+                _instrument_class(cls)
+        _patch(Key, '_get_algorithm', _wrap_get_algorithm)
+
+
+def disable():
+    global _enabled
+    with _lock:
+        _enabled = False
+        while _patched:
+            cls, name, original = _patched.pop()
+            setattr(cls, name, original)
+
+
+def reset():
+    with _lock:
+        for store in _stores.values():
+            store.clear()
+        _retired.clear()
+
+
+def snapshot():
+    # merges the per thread stats into a list of dicts, one for each algorithm, operation and method, sorted by
+    # the total time spent
+    merged = {}
+    with _lock:
+        stores = list(_stores.values())
+        _merge(merged, _retired)
+    for store in stores:
+        _merge(merged, store)
+
+    results = []
+    for (algorithm, operation, method), (count, errors, data_bytes, total_ns, buckets) in merged.items():
+        results.append({
+            'algorithm': algorithm,
+            'operation': operation,
+            'method': method,
+            'count': count,
+            'errors': errors,
+            'bytes': data_bytes,
+            'total_us': total_ns / 1e3,
+            'mean_us': total_ns / count / 1e3 if count else 0.0,
+            'p50_us': _percentile_us(buckets, count, 0.5),
+            'p99_us': _percentile_us(buckets, count, 0.99),
+            'histogram_ns': dict((2 ** i, n) for i, n in enumerate(buckets) if n)
+        })
+    results.sort(key=lambda r: r['total_us'], reverse=True)
+    return results
+
+
+def to_json():
+    return json.dumps(snapshot())
+
+
+def _instrument_class(cls):
+    # called for every new transform and algorithm class so the check must be cheap when metrics are disabled
+    if not _enabled:
+        return
+    for name in _TRANSFORM_METHODS:
+        _patch(cls, name, _wrap_transform_method)
+    for name in _FACTORY_OPERATIONS:
+        _patch(cls, name, _wrap_factory)
+
+
+def _subclasses(cls):
+    pending = [cls]
+    while pending:
+        cls = pending.pop()
+        yield cls
+        pending.extend(cls.__subclasses__())
+
+
+def _patch(cls, name, wrap):
+    func = cls.__dict__.get(name)
+    if not isinstance(func, types.FunctionType) or getattr(func, '__isabstractmethod__', False):
+        return
+    _patched.append((cls, name, func))
+    setattr(cls, name, wrap(func, name))
+
+
+def _merge(total, stats):
+    for label, stat in list(stats.items()):
+        merged = total.get(label)
+        if merged is None:
+            merged = total[label] = [0, 0, 0, 0, [0] * _BUCKET_COUNT]
+        for i in range(4):
+            merged[i] += stat[i]
+        merged[4] = [a + b for a, b in zip(merged[4], stat[4])]
+
+
+def _thread_state():
+    state = getattr(_local, 'state', None)
+    if state is None:
+        state = _local.state = _ThreadState()
+        with _lock:
+            _stores[id(state.stats)] = state.stats
+        # the thread local state is released when the thread exits
+        weakref.finalize(state, _retire, state.stats)
+    return state
+
+
+def _retire(stats):
+    with _lock:
+        if _stores.pop(id(stats), None) is not None:
+            _merge(_retired, stats)
+
+
+def _record(stats, label, elapsed, data_bytes, failed):
+    stat = stats.get(label)
+    if stat is None:
+        stat = stats[label] = [0, 0, 0, 0, [0] * _BUCKET_COUNT]
+    stat[0] += 1
+    stat[1] += failed
+    stat[2] += data_bytes
+    stat[3] += elapsed
+    stat[4][min(elapsed.bit_length(), _BUCKET_COUNT - 1)] += 1
+
+
+class _ThreadState(object):
+    # the stats recorded by a thread, active is set while an instrumented method is running
+    __slots__ = ('stats', 'active', '__weakref__')
+
+    def __init__(self):
+        self.stats = {}
+        self.active = False
+
+
+def _percentile_us(buckets, count, p):
+    # the upper bound of the bucket holding the percentile
+    target = count * p
+    seen = 0
+    for i, n in enumerate(buckets):
+        seen += n
+        if n and seen >= target:
+            return 2 ** i / 1e3
+    return 0.0
+
+
+def _wrap_transform_method(func, name):
+    data_index = _TRANSFORM_METHODS[name]
+
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        # transforms which implement one instrumented method with another, such as transform calling update and
+        # finalize, are only recorded once for the outermost call
+        state = _thread_state()
+        if state.active:
+            return func(self, *args, **kwargs)
+
+        failed = True
+        state.active = True
+        start = perf_counter_ns()
+        try:
+            result = func(self, *args, **kwargs)
+            failed = False
+            return result
+        finally:
+            elapsed = perf_counter_ns() - start
+            state.active = False
+            algorithm, operation = getattr(self, '_metrics_labels', None) or (type(self).__name__, name)
+            data_bytes = len(args[data_index]) if data_index is not None and len(args) > data_index else 0
+            _record(state.stats, (algorithm, operation or name, name), elapsed, data_bytes, failed)
+
+    return wrapper
+
+
+def _wrap_factory(func, name):
+    operation = _FACTORY_OPERATIONS[name]
+
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        transform = func(self, *args, **kwargs)
+        transform._metrics_labels = (self._name, operation)
+        return transform
+
+    return wrapper
+
+
+def _wrap_get_algorithm(func, name):
+    @functools.wraps(func)
+    def wrapper(self, op, **kwargs):
+        failed = True
+        algorithm = None
+        start = perf_counter_ns()
+        try:
+            algorithm = func(self, op, **kwargs)
+            failed = False
+            return algorithm
+        finally:
+            elapsed = perf_counter_ns() - start
+            label = algorithm.name() if algorithm else str(kwargs.get('algorithm'))
+            _record(_thread_state().stats, (label, op, name), elapsed, 0, failed)
+
+    return wrapper
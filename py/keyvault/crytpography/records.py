@@ -0,0 +1,46 @@
+from array import array
+from collections import namedtuple
+from itertools import accumulate
+
+
+# the bulk record apis return the records packed into a single buffer, record i is data[offsets[i]:offsets[i + 1]].
+# offsets is an array of len(records) + 1 unsigned 64 bit integers, which numpy can wrap with frombuffer. the ivs and
+# tags of encrypted records are packed fixed width, record i's iv is ivs[i * iv_size:(i + 1) * iv_size]
+Records = namedtuple('Records', ['data', 'offsets'])
+
+EncryptedRecords = namedtuple('EncryptedRecords', ['data', 'offsets', 'ivs', 'tags'])
+
+
+def _record_list(records, record_size=None):
+    # returns the records as a list of bytes like objects. records is either a sequence of bytes like objects, a
+    # Records, a buffer of fixed width records of record_size bytes, or a numpy array where each row, or each item of a
+    # fixed width bytes array, is a record. numpy arrays are only accessed through the buffer protocol so numpy
+    # isn't required
+    if isinstance(records, (Records, EncryptedRecords)):
+        view = memoryview(records.data)
+        offsets = records.offsets
+        return [view[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)]
+
+    shape = getattr(records, 'shape', None)
+    if shape is not None and record_size is None:
+        if not shape[0]:
+            return []
+        record_size = records.nbytes // shape[0]
+
+    if record_size is not None:
+        view = memoryview(records).cast('B')
+        if not record_size or len(view) % record_size:
+            raise ValueError('records must be a multiple of record_size')
+        return [view[i:i + record_size] for i in range(0, len(view), record_size)]
+
+    return records if isinstance(records, list) else list(records)
+
+
+def _pack(chunks, sizes):
+    # joins chunks into a single buffer returning it along with the offsets of each chunk
+    return b''.join(chunks), array('Q', accumulate(sizes, initial=0))
+
+
+def _split(packed, size):
+    # splits packed fixed width values, such as ivs or tags, into a list
+    return [packed[i:i + size] for i in range(0, len(packed), size)]
@@ -0,0 +1,268 @@
+import json
+import os
+import struct
+import time
+from concurrent.futures import ProcessPoolExecutor
+from .algorithm import Algorithm
+from .key import Key
+from ._parallel import bounded_map, default_window, chunks
+
+
+# a wrapped key file is a sequence of records, each a big endian length (4) followed by that many bytes of wrapped
+# key. a record of length 0 marks a key which failed to rotate when errors are skipped
+_LENGTH_FORMAT = '>I'
+_LENGTH_SIZE = struct.calcsize(_LENGTH_FORMAT)
+
+DEFAULT_BATCH_SIZE = 1024
+
+# the checkpoint is only written this often, as it requires the output to be synced to disk
+DEFAULT_CHECKPOINT_INTERVAL = 5.0
+
+
+def write_wrapped_keys(path, wrapped_keys):
+    with open(path, 'wb') as f:
+        for wrapped_key in wrapped_keys:
+            f.write(struct.pack(_LENGTH_FORMAT, len(wrapped_key)))
+            f.write(wrapped_key)
+
+
+def read_wrapped_keys(source):
+    # yields the wrapped keys in source, a path or binary file in the wrapped key file format
+    if isinstance(source, (str, bytes, os.PathLike)):
+        with open(source, 'rb') as f:
+            for wrapped_key in read_wrapped_keys(f):
+                yield wrapped_key
+        return
+
+    for _, wrapped_key in _read_records(source):
+        yield wrapped_key
+
+
+def _read_records(f):
+    # yields each record along with the offset of the record which follows it
+    offset = f.tell()
+    while True:
+        header = f.read(_LENGTH_SIZE)
+        if not header:
+            return
+        if len(header) != _LENGTH_SIZE:
+            raise ValueError('truncated wrapped key file')
+        length, = struct.unpack(_LENGTH_FORMAT, header)
+        wrapped_key = f.read(length)
+        if len(wrapped_key) != length:
+            raise ValueError('truncated wrapped key file')
+        offset += _LENGTH_SIZE + length
+        yield offset, wrapped_key
+
+
+def _default_algorithm(kek):
+    # keks are either a Key or the bytes of an AES key encryption key
+    if isinstance(kek, Key):
+        return kek.default_key_wrap_algorithm
+    return 'A%dKW' % (len(kek) * 8)
+
+
+def _portable_kek(kek):
+    # keys are sent to the worker processes as their jwk and rebuilt there
+    if isinstance(kek, Key):
+        return type(kek), kek.to_jwk(include_private=True)
+    return None, bytes(kek)
+
+
+def _create_transform(portable_kek, algorithm, unwrap):
+    key_type, material = portable_kek
+    if key_type is None:
+        algorithm = Algorithm.resolve(algorithm)
+        transform = algorithm.create_decryptor(material) if unwrap else algorithm.create_encryptor(material)
+        return transform.transform
+
+    kek = key_type.from_jwk(material)
+    if unwrap:
+        return lambda wrapped_key: kek.unwrap_key(wrapped_key, algorithm=algorithm)
+    return lambda key: kek.wrap_key(key, algorithm=algorithm)
+
+
+# the unwrap and wrap functions used by a worker process, set once by _init_worker when the process starts
+_worker_state = None
+
+
+def _init_worker(old_kek, old_algorithm, new_kek, new_algorithm):
+    global _worker_state
+    _worker_state = (_create_transform(old_kek, old_algorithm, True), _create_transform(new_kek, new_algorithm, False))
+
+
+def _worker_rotate(chunk):
+    unwrap, wrap = _worker_state
+    return _rotate_chunk(unwrap, wrap, chunk)
+
+
+def _rotate_chunk(unwrap, wrap, chunk):
+    # the unwrapped keys never leave the process, failures are returned in place of the rewrapped key
+    results = []
+    for wrapped_key in chunk:
+        try:
+            results.append(wrap(unwrap(wrapped_key)))
+        except Exception as e:
+            results.append(e)
+    return results
+
+
+class KekRotation(object):
+    # re-wraps the keys in a wrapped key file, or any iterable of wrapped keys, from old_kek to new_kek. keks are a Key
+    # or the bytes of an AES key encryption key, the algorithms default to the keks' default key wrap algorithms.
+    # batches of batch_size keys are spread across max_workers processes, defaulting to the number of cpus, and the
+    # rotated keys are written in order to the output file. progress is recorded in the json checkpoint file so a run
+    # which is interrupted resumes after the last checkpoint, truncating any output written after it
+    def __init__(self, old_kek, new_kek, checkpoint_path, old_algorithm=None, new_algorithm=None, max_workers=None,
+                 batch_size=DEFAULT_BATCH_SIZE, checkpoint_interval=DEFAULT_CHECKPOINT_INTERVAL, skip_errors=False):
+        self._old_kek = old_kek
+        self._new_kek = new_kek
+        self._old_algorithm = old_algorithm or _default_algorithm(old_kek)
+        self._new_algorithm = new_algorithm or _default_algorithm(new_kek)
+        self._checkpoint_path = checkpoint_path
+        self._max_workers = max_workers or os.cpu_count() or 1
+        self._batch_size = batch_size
+        self._checkpoint_interval = checkpoint_interval
+        self._skip_errors = skip_errors
+        self._started = None
+        self.resumed = 0
+        self.processed = 0
+        self.failed = 0
+
+    # rotates the keys in source, a path, binary file or iterable of wrapped keys, writing them to output_path.
+    # progress, if specified, is called with stats() after each batch. returns stats() once all keys are rotated.
+    # unless skip_errors is set a key which fails to rotate raises ValueError, after checkpointing the keys before it,
+    # otherwise it's written as an empty record and counted as failed
+    def run(self, source, output_path, progress=None):
+        checkpoint = self._load_checkpoint()
+        if checkpoint.get('complete'):
+            self._started = None
+            self.resumed = checkpoint['records']
+            self.processed = 0
+            self.failed = checkpoint.get('failed', 0)
+            return self.stats()
+
+        if isinstance(source, (str, bytes, os.PathLike)):
+            with open(source, 'rb') as f:
+                return self._run(f, output_path, checkpoint, progress)
+        return self._run(source, output_path, checkpoint, progress)
+
+    def stats(self):
+        elapsed = time.monotonic() - self._started if self._started is not None else 0.0
+        return {
+            'resumed': self.resumed,
+            'processed': self.processed,
+            'failed': self.failed,
+            'total': self.resumed + self.processed,
+            'elapsed': elapsed,
+            'keys_per_sec': self.processed / elapsed if elapsed else 0.0
+        }
+
+    def _run(self, source, output_path, checkpoint, progress):
+        self._started = time.monotonic()
+        self.resumed = checkpoint.get('records', 0)
+        self.processed = 0
+        self.failed = checkpoint.get('failed', 0)
+
+        records = self._resume_source(source, checkpoint.get('input_offset'))
+        output_offset = checkpoint.get('output_offset', 0)
+        with open(output_path, 'r+b' if os.path.exists(output_path) else 'wb') as output:
+            if os.fstat(output.fileno()).st_size < output_offset:
+                raise ValueError('%s is shorter than its checkpoint' % output_path)
+            output.truncate(output_offset)
+            output.seek(output_offset)
+
+            input_offset = checkpoint.get('input_offset')
+            last_checkpoint = time.monotonic()
+            for batch, results in self._rotate(records):
+                failure = None
+                for (offset, _), result in zip(batch, results):
+                    if isinstance(result, Exception):
+                        if not self._skip_errors:
+                            failure = result
+                            break
+                        self.failed += 1
+                        result = b''
+                    output.write(struct.pack(_LENGTH_FORMAT, len(result)))
+                    output.write(result)
+                    self.processed += 1
+                    input_offset = offset
+
+                if failure is not None:
+                    self._checkpoint(output, input_offset)
+                    raise ValueError('failed to rotate wrapped key %d: %r' % (self.resumed + self.processed, failure))
+
+                if time.monotonic() - last_checkpoint >= self._checkpoint_interval:
+                    self._checkpoint(output, input_offset)
+                    last_checkpoint = time.monotonic()
+                if progress is not None:
+                    progress(self.stats())
+
+            self._checkpoint(output, input_offset, complete=True)
+        return self.stats()
+
+    def _resume_source(self, source, input_offset):
+        # yields (input offset, wrapped key) for the keys after the checkpoint. files are read from the checkpointed
+        # offset, other iterables have the keys already rotated skipped
+        if hasattr(source, 'read'):
+            if input_offset is not None:
+                source.seek(input_offset)
+            return _read_records(source)
+
+        records = ((None, wrapped_key) for wrapped_key in source)
+        for _ in range(self.resumed):
+            if next(records, None) is None:
+                break
+        return records
+
+    def _rotate(self, records):
+        # yields each batch of records along with its results, in order
+        if self._max_workers == 1:
+            unwrap = _create_transform(_portable_kek(self._old_kek), self._old_algorithm, True)
+            wrap = _create_transform(_portable_kek(self._new_kek), self._new_algorithm, False)
+            for batch in chunks(records, self._batch_size):
+                yield batch, _rotate_chunk(unwrap, wrap, [wrapped_key for _, wrapped_key in batch])
+            return
+
+        initargs = (_portable_kek(self._old_kek), self._old_algorithm, _portable_kek(self._new_kek),
+                    self._new_algorithm)
+        batches = []
+
+        def args():
+            # the batches are remembered so their offsets can be matched up with the results, which come back in order
+            for batch in chunks(records, self._batch_size):
+                batches.append(batch)
+                yield ([wrapped_key for _, wrapped_key in batch],)
+
+        with ProcessPoolExecutor(self._max_workers, initializer=_init_worker, initargs=initargs) as executor:
+            for results in bounded_map(executor, _worker_rotate, args(), default_window(executor)):
+                yield batches.pop(0), results
+
+    def _load_checkpoint(self):
+        if not os.path.exists(self._checkpoint_path):
+            return {}
+        with open(self._checkpoint_path) as f:
+            checkpoint = json.load(f)
+        if not isinstance(checkpoint, dict) or not isinstance(checkpoint.get('records'), int):
+            raise ValueError('%s is not a valid checkpoint' % self._checkpoint_path)
+        return checkpoint
+
+    def _checkpoint(self, output, input_offset, complete=False):
+        # the output is synced before the checkpoint is atomically replaced, so the checkpoint never refers to output
+        # which could be lost
+        output.flush()
+        os.fsync(output.fileno())
+        checkpoint = {
+            'records': self.resumed + self.processed,
+            'failed': self.failed,
+            'input_offset': input_offset,
+            'output_offset': output.tell(),
+            'complete': complete
+        }
+
+        temp_path = self._checkpoint_path + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(checkpoint, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self._checkpoint_path)
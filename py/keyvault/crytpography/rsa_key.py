@@ -1,58 +1,89 @@
+import hashlib
+import os
 import uuid
-import codecs
 import json
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives import serialization
 from cryptography.hazmat.primitives.asymmetric.rsa import RSAPrivateNumbers, RSAPublicNumbers, \
     generate_private_key, rsa_crt_dmp1, rsa_crt_dmq1, rsa_crt_iqmp, RSAPrivateKey
 from .key import Key
-from .algorithms import RsaOaep, Rs256
+from .algorithm import Algorithm, _sign_chunk, _verify_chunk
+from ._parallel import bounded_map, default_window, chunks, pairs
+from ._cache import LruCache
+from .jwk import JsonWebKey, _b64_encode, _bytes_to_int, _int_to_bytes
+from .hashing import DEFAULT_HASH_CHUNK_SIZE
+
+
+# the algorithms are referred to by name so they're only loaded when first used
+_RSA_OAEP = 'RSA-OAEP'
+_RS256 = 'RS256'
+
+# the number of keys sent to a batch worker at a time
+_BATCH_CHUNK_SIZE = 64
+
+# process wide cache of backend keys constructed from jwks, public keys are keyed by their thumbprint and private keys
+# by a digest of all their key material, as a jwk pairing a cached key's n and e with other private values must not
+# get back the cached private key
+_BACKEND_KEY_CACHE_SIZE = 1024
+_backend_key_cache = LruCache(_BACKEND_KEY_CACHE_SIZE)
 
 
 class RsaKey(Key):
     PUBLIC_KEY_DEFAULT_OPS = ['encrypt', 'wrapKey', 'verify']
     PRIVATE_KEY_DEFAULT_OPS = ['encrypt', 'decrypt', 'wrapKey', 'unwrapKey', 'verify', 'sign']
 
-    _supported_encryption_algorithms = [RsaOaep.name()]
-    _supported_key_wrap_algorithms = [RsaOaep.name()]
-    _supported_signature_algorithms = [Rs256.name()]
+    _supported_encryption_algorithms = [_RSA_OAEP]
+    _supported_key_wrap_algorithms = [_RSA_OAEP]
+    _supported_signature_algorithms = [_RS256]
 
     def __init__(self):
-        self.kid = None
+        self._kid = None
         self.kty = None
         self.key_ops = None
         self._rsa_impl = None
+        self._key_material = {}
+        self._thumbprint = None
+
+    @property
+    def kid(self):
+        return self._kid
+
+    @kid.setter
+    def kid(self, value):
+        self._kid = value
 
     @property
     def n(self):
-        return _int_to_bytes(self._public_key_material().n)
+        return self._material('n')
 
     @property
     def e(self):
-        return _int_to_bytes(self._public_key_material().e)
+        return self._material('e')
 
     @property
-    def q(self):
-        return _int_to_bytes(self._private_key_material().q) if self.is_private_key() else None
+    def p(self):
+        return self._material('p')
 
     @property
-    def b(self):
-        return _int_to_bytes(self._private_key_material().b) if self.is_private_key() else None
+    def q(self):
+        return self._material('q')
 
     @property
     def d(self):
-        return _int_to_bytes(self._private_key_material().d) if self.is_private_key() else None
+        return self._material('d')
 
     @property
     def dq(self):
-        return _int_to_bytes(self._private_key_material().dmq1) if self.is_private_key() else None
+        return self._material('dq')
 
     @property
     def dp(self):
-        return _int_to_bytes(self._private_key_material().dmp1) if self.is_private_key() else None
+        return self._material('dp')
 
     @property
     def qi(self):
-        return _int_to_bytes(self._private_key_material().iqmp) if self.is_private_key() else None
+        return self._material('qi')
 
     @property
     def private_key(self):
@@ -95,37 +126,22 @@ class RsaKey(Key):
         rsa_key.kty = jwk.kty
         rsa_key.key_ops = jwk.key_ops
 
-        pub = RSAPublicNumbers(n=_bytes_to_int(jwk.n), e=_bytes_to_int(jwk.e))
-
-        # if the private key values are specified construct a private key
-        # only the secret primes and private exponent are needed as other fields can be calculated
-        if jwk.p and jwk.q and jwk.d:
-            # convert the values of p, q, and d from bytes to int
-            p = _bytes_to_int(jwk.p)
-            q = _bytes_to_int(jwk.q)
-            d = _bytes_to_int(jwk.d)
-
-            # convert or compute the remaining private key numbers
-            dmp1 = _bytes_to_int(jwk.dp) if jwk.dp else rsa_crt_dmp1(private_exponent=d, p=p)
-            dmq1 = _bytes_to_int(jwk.dq) if jwk.dq else rsa_crt_dmq1(private_exponent=d, p=q)
-            iqmp = _bytes_to_int(jwk.qi) if jwk.qi else rsa_crt_iqmp(p=p, q=q)
-
-            # create the private key from the jwk key values
-            priv = RSAPrivateNumbers(p=p, q=q, d=d, dmp1=dmp1, dmq1=dmq1, iqmp=iqmp, public_numbers=pub)
-            key_impl = priv.private_key(default_backend())
-
-        # if the necessary private key values are not specified create the public key
-        else:
-            key_impl = pub.public_key(default_backend())
-
-        rsa_key._rsa_impl = key_impl
+        # the backend key is cached process wide, so importing the same key material again reuses the already
+        # constructed key and its computed material rather than rebuilding it, which takes ~40ms for a private key.
+        # private keys are cached by a digest of every private value, so a cached key always matches the jwk
+        private = bool(jwk.p and jwk.q and jwk.d)
+        thumbprint = _thumbprint(jwk.e, jwk.n)
+        cache_key = (_private_digest(jwk), True) if private else (thumbprint, False)
+        rsa_key._rsa_impl, rsa_key._key_material = _backend_key_cache.get_or_add(
+            cache_key, lambda: (_create_backend_key(jwk, private), {}))
+        rsa_key._thumbprint = thumbprint
 
         return rsa_key
 
     def to_jwk(self, include_private=False):
         jwk = JsonWebKey(kid=self.kid,
                          kty=self.kty,
-                         key_ops=self.key_ops if include_private else _RsaKey.PUBLIC_KEY_DEFAULT_OPS,
+                         key_ops=self.key_ops if include_private else RsaKey.PUBLIC_KEY_DEFAULT_OPS,
                          n=self.n,
                          e=self.e)
 
@@ -139,22 +155,30 @@ class RsaKey(Key):
 
         return jwk
 
+    def to_jwk_str(self, include_private=False):
+        return self.to_jwk(include_private).to_json()
+
+    # the RFC 7638 jwk thumbprint of the public key
+    def thumbprint(self):
+        if self._thumbprint is None:
+            self._thumbprint = _thumbprint(self.e, self.n)
+        return self._thumbprint
 
     @property
     def default_encryption_algorithm(self):
-        return RsaOaep.name()
+        return _RSA_OAEP
 
     @property
     def default_key_wrap_algorithm(self):
-        return RsaOaep.name()
+        return _RSA_OAEP
 
     @property
     def default_signature_algorithm(self):
-        return Rs256.name()
+        return _RS256
 
     def encrypt(self, plain_text, **kwargs):
         algorithm = self._get_algorithm('encrypt', **kwargs)
-        encryptor = algorithm.create_encryptor(self._rsa_impl)
+        encryptor = algorithm.create_encryptor(self.public_key)
         return encryptor.transform(plain_text, **kwargs)
 
     def decrypt(self, cipher_text, **kwargs):
@@ -162,9 +186,83 @@ class RsaKey(Key):
             raise NotImplementedError('The current RsaKey does not support decrypt')
 
         algorithm = self._get_algorithm('decrypt', **kwargs)
-        decryptor = algorithm.create_encryptor(self._rsa_impl)
+        decryptor = algorithm.create_decryptor(self._rsa_impl)
         return decryptor.transform(cipher_text, **kwargs)
 
+    def wrap_key(self, key, **kwargs):
+        algorithm = self._get_algorithm('wrapKey', **kwargs)
+        encryptor = algorithm.create_encryptor(self.public_key)
+        return encryptor.transform(key)
+
+    def unwrap_key(self, encrypted_key, **kwargs):
+        if not self.is_private_key():
+            raise NotImplementedError('The current RsaKey does not support unwrapKey')
+
+        algorithm = self._get_algorithm('unwrapKey', **kwargs)
+        decryptor = algorithm.create_decryptor(self._rsa_impl)
+        return decryptor.transform(encrypted_key)
+
+    # wrap_keys and unwrap_keys return an iterator of the results in the order of the specified keys, when a key
+    # can't be transformed its exception is yielded in place of the result rather than raised, so one bad key doesn't
+    # abort the batch. the arguments are validated when called, the work is spread across max_workers processes,
+    # defaulting to the number of cpus, each of which loads the key and creates the transform once
+    def wrap_keys(self, keys, max_workers=None, **kwargs):
+        algorithm = self._get_algorithm('wrapKey', **kwargs)
+        return self._iter_batch(keys, algorithm, 'wrapKey', max_workers)
+
+    def unwrap_keys(self, encrypted_keys, max_workers=None, **kwargs):
+        if not self.is_private_key():
+            raise NotImplementedError('The current RsaKey does not support unwrapKey')
+
+        algorithm = self._get_algorithm('unwrapKey', **kwargs)
+        return self._iter_batch(encrypted_keys, algorithm, 'unwrapKey', max_workers)
+
+    def sign_many(self, data, max_workers=None, **kwargs):
+        if not self.is_private_key():
+            raise NotImplementedError('The current RsaKey does not support sign')
+
+        algorithm = self._get_algorithm('sign', **kwargs)
+        signatures = []
+        for results in self._run_batch(data, algorithm, 'sign', max_workers):
+            signatures.extend(results)
+        return signatures
+
+    def verify_many(self, signatures, data, max_workers=None, **kwargs):
+        algorithm = self._get_algorithm('verify', **kwargs)
+        flags = bytearray()
+        for results in self._run_batch(pairs(signatures, data), algorithm, 'verify', max_workers):
+            flags.extend(results)
+        return flags
+
+    def _iter_batch(self, items, algorithm, op, max_workers):
+        for results in self._run_batch(items, algorithm, op, max_workers):
+            for result in results:
+                yield result
+
+    def _run_batch(self, items, algorithm, op, max_workers):
+        # yields the results for each chunk of items
+        max_workers = max_workers or os.cpu_count() or 1
+        private = op in ('unwrapKey', 'sign')
+        args = ((chunk,) for chunk in chunks(items, _BATCH_CHUNK_SIZE))
+
+        if max_workers == 1:
+            transform = _create_batch_transform(algorithm, self._rsa_impl if private else self.public_key, op)
+            for chunk, in args:
+                yield _apply_batch_op(transform, op, chunk)
+            return
+
+        if private:
+            der = self._rsa_impl.private_bytes(serialization.Encoding.DER, serialization.PrivateFormat.PKCS8,
+                                               serialization.NoEncryption())
+        else:
+            der = self.public_key.public_bytes(serialization.Encoding.DER,
+                                               serialization.PublicFormat.SubjectPublicKeyInfo)
+
+        with ProcessPoolExecutor(max_workers, initializer=_init_batch_worker,
+                                 initargs=(algorithm.name(), der, private, op)) as executor:
+            for results in bounded_map(executor, _batch_worker_apply, args, default_window(executor)):
+                yield results
+
     def sign(self, data, **kwargs):
         if not self.is_private_key():
             raise NotImplementedError('The current RsaKey does not support sign')
@@ -175,31 +273,131 @@ class RsaKey(Key):
 
     def verify(self, signature, data, **kwargs):
         algorithm = self._get_algorithm('verify', **kwargs)
-        signer = algorithm.create_signature_transform(self._rsa_impl)
+        signer = algorithm.create_signature_transform(self.public_key)
         return signer.verify(signature, data)
 
-    def is_private_key(self):
-        return isinstance(self._rsa_impl, RSAPrivateKey)
-
-    def _public_key_material(self):
-        self.public_key.public_numbers()
+    # sign_stream and verify_stream hash source, a path, file like object or iterable of chunks, incrementally and
+    # sign the digest, so large artifacts are signed without being read into memory
+    def sign_stream(self, source, chunk_size=DEFAULT_HASH_CHUNK_SIZE, **kwargs):
+        if not self.is_private_key():
+            raise NotImplementedError('The current RsaKey does not support sign')
 
-    def _private_key_material(self):
-        self.private_key.private_numbers() if self.private_key else None
+        algorithm = self._get_algorithm('sign', **kwargs)
+        signer = algorithm.create_signature_transform(self._rsa_impl)
+        return signer.sign_stream(source, chunk_size)
 
+    def verify_stream(self, signature, source, chunk_size=DEFAULT_HASH_CHUNK_SIZE, **kwargs):
+        algorithm = self._get_algorithm('verify', **kwargs)
+        signer = algorithm.create_signature_transform(self.public_key)
+        return signer.verify_stream(signature, source, chunk_size)
 
-def _bytes_to_int(b):
-    return int(codecs.encode(b, 'hex'), 16)
+    # sign_streams and verify_streams hash the sources across max_workers threads, defaulting to the number of cpus,
+    # which overlap reading and hashing as both release the gil. results are as for sign_many and verify_many
+    def sign_streams(self, sources, max_workers=None, chunk_size=DEFAULT_HASH_CHUNK_SIZE, **kwargs):
+        if not self.is_private_key():
+            raise NotImplementedError('The current RsaKey does not support sign')
 
+        algorithm = self._get_algorithm('sign', **kwargs)
+        with ThreadPoolExecutor(max_workers or os.cpu_count() or 1) as executor:
+            return algorithm.sign_streams(self._rsa_impl, sources, executor, chunk_size)
 
-def _int_to_bytes(i):
-    h = hex(i)
-    if len(h) > 1 and h[0:2] == '0x':
-        h = h[2:]
+    def verify_streams(self, signatures, sources, max_workers=None, chunk_size=DEFAULT_HASH_CHUNK_SIZE, **kwargs):
+        algorithm = self._get_algorithm('verify', **kwargs)
+        with ThreadPoolExecutor(max_workers or os.cpu_count() or 1) as executor:
+            return algorithm.verify_streams(self.public_key, signatures, sources, executor, chunk_size)
 
-    # need to strip L in python 2.x
-    h = h.strip('L')
+    def is_private_key(self):
+        return isinstance(self._rsa_impl, RSAPrivateKey)
 
-    if len(h) % 2:
-        h = '0' + h
-    return codecs.decode(h, 'hex')
\ No newline at end of file
+    def _material(self, name):
+        # the key numbers are converted to bytes once and cached as the key material can't change, the cached dict
+        # may be shared with other keys imported from the same jwk so it's only ever updated with a complete set
+        material = self._key_material
+        if not material:
+            if self.is_private_key():
+                numbers = self._rsa_impl.private_numbers()
+                public_numbers = numbers.public_numbers
+                values = dict(p=numbers.p, q=numbers.q, d=numbers.d, dp=numbers.dmp1, dq=numbers.dmq1,
+                              qi=numbers.iqmp)
+            else:
+                public_numbers = self._rsa_impl.public_numbers()
+                values = {}
+            values.update(n=public_numbers.n, e=public_numbers.e)
+            material.update((k, _int_to_bytes(v)) for k, v in values.items())
+        return material.get(name)
+
+
+# the transform and operation used by a batch worker process, set once by _init_batch_worker when the process starts
+_batch_worker_state = None
+
+
+def _create_batch_transform(algorithm, key_impl, op):
+    if op in ('sign', 'verify'):
+        return algorithm.create_signature_transform(key_impl)
+    return algorithm.create_decryptor(key_impl) if op == 'unwrapKey' else algorithm.create_encryptor(key_impl)
+
+
+def _init_batch_worker(algorithm_name, der, private, op):
+    global _batch_worker_state
+    if private:
+        key_impl = serialization.load_der_private_key(der, password=None, backend=default_backend())
+    else:
+        key_impl = serialization.load_der_public_key(der, backend=default_backend())
+    _batch_worker_state = (_create_batch_transform(Algorithm.resolve(algorithm_name), key_impl, op), op)
+
+
+def _batch_worker_apply(chunk):
+    transform, op = _batch_worker_state
+    return _apply_batch_op(transform, op, chunk)
+
+
+def _apply_batch_op(transform, op, chunk):
+    if op == 'sign':
+        return _sign_chunk(transform, chunk)
+    if op == 'verify':
+        return _verify_chunk(transform, chunk)
+
+    results = []
+    for item in chunk:
+        try:
+            results.append(transform.transform(item))
+        except Exception as e:
+            results.append(e)
+    return results
+
+
+def _thumbprint(e, n):
+    # the members are serialized in lexicographic order without whitespace as required by RFC 7638
+    s = '{"e":"%s","kty":"RSA","n":"%s"}' % (_b64_encode(e), _b64_encode(n))
+    return hashlib.sha256(s.encode('ascii')).digest()
+
+
+def _private_digest(jwk):
+    # a digest over the full canonical private jwk, the members in lexicographic order as for the thumbprint
+    values = ((name, getattr(jwk, name)) for name in ('d', 'dp', 'dq', 'e', 'n', 'p', 'q', 'qi'))
+    s = '{%s}' % ','.join('"%s":"%s"' % (name, _b64_encode(value or b'')) for name, value in values)
+    return hashlib.sha256(s.encode('ascii')).digest()
+
+
+def _create_backend_key(jwk, private):
+    pub = RSAPublicNumbers(n=_bytes_to_int(jwk.n), e=_bytes_to_int(jwk.e))
+
+    # if the private key values are specified construct a private key
+    # only the secret primes and private exponent are needed as other fields can be calculated
+    if private:
+        # convert the values of p, q, and d from bytes to int
+        p = _bytes_to_int(jwk.p)
+        q = _bytes_to_int(jwk.q)
+        d = _bytes_to_int(jwk.d)
+
+        # convert or compute the remaining private key numbers
+        dmp1 = _bytes_to_int(jwk.dp) if jwk.dp else rsa_crt_dmp1(private_exponent=d, p=p)
+        dmq1 = _bytes_to_int(jwk.dq) if jwk.dq else rsa_crt_dmq1(private_exponent=d, q=q)
+        iqmp = _bytes_to_int(jwk.qi) if jwk.qi else rsa_crt_iqmp(p=p, q=q)
+
+        # create the private key from the jwk key values
+        priv = RSAPrivateNumbers(p=p, q=q, d=d, dmp1=dmp1, dmq1=dmq1, iqmp=iqmp, public_numbers=pub)
+        return priv.private_key(default_backend())
+
+    # if the necessary private key values are not specified create the public key
+    return pub.public_key(default_backend())
@@ -0,0 +1,174 @@
+import hashlib
+import json
+import os
+import uuid
+from cryptography.exceptions import InvalidSignature, InvalidTag
+from .algorithm import AuthenticatedSymmetricEncryptionAlgorithm
+from .key import Key
+from .jwk import JsonWebKey, _b64_encode
+
+
+# the encryption and key wrap algorithms supported by each key size in bytes, the first of each is the default. the
+# algorithms are named rather than resolved so only the modules of algorithms which are used get imported
+_ALGORITHMS = {
+    16: (['A128GCM', 'A128CBC'], ['A128KW']),
+    24: (['A192GCM', 'A192CBC'], ['A192KW']),
+    32: (['A256GCM', 'A128CBC-HS256', 'A256CBC'], ['A256KW']),
+    48: (['A192CBC-HS384'], []),
+    64: (['A256CBC-HS512'], [])
+}
+
+
+class SymmetricKey(Key):
+    DEFAULT_OPS = ['encrypt', 'decrypt', 'wrapKey', 'unwrapKey']
+
+    def __init__(self):
+        self._kid = None
+        self.kty = None
+        self.key_ops = None
+        self._k = None
+        self._thumbprint = None
+        self._supported_encryption_algorithms = []
+        self._supported_key_wrap_algorithms = []
+
+    @property
+    def kid(self):
+        return self._kid
+
+    @kid.setter
+    def kid(self, value):
+        self._kid = value
+
+    @property
+    def k(self):
+        return self._k
+
+    @staticmethod
+    def generate(kid=None, kty='oct', size=256):
+        if size % 8 or size // 8 not in _ALGORITHMS:
+            raise ValueError('size must be one of %s bits' % ', '.join(str(s * 8) for s in sorted(_ALGORITHMS)))
+
+        key = SymmetricKey()
+        key.kid = kid or str(uuid.uuid4())
+        key.kty = kty
+        key.key_ops = SymmetricKey.DEFAULT_OPS
+        key._set_key(os.urandom(size // 8))
+        return key
+
+    @staticmethod
+    def from_jwk_str(s):
+        jwk_dict = json.loads(s)
+        jwk = JsonWebKey.from_dict(jwk_dict)
+        return SymmetricKey.from_jwk(jwk)
+
+    @staticmethod
+    def from_jwk(jwk):
+        if not isinstance(jwk, JsonWebKey):
+            raise TypeError('The specified jwk must be a JsonWebKey')
+
+        if jwk.kty != 'oct' and jwk.kty != 'oct-HSM':
+            raise ValueError('The specified jwk must have a key type of "oct" or "oct-HSM"')
+
+        if not jwk.k or len(jwk.k) not in _ALGORITHMS:
+            raise ValueError('Invalid oct jwk, k must be %s bytes' % ', '.join(str(s) for s in sorted(_ALGORITHMS)))
+
+        key = SymmetricKey()
+        key.kid = jwk.kid
+        key.kty = jwk.kty
+        key.key_ops = jwk.key_ops
+        key._set_key(bytes(jwk.k))
+        return key
+
+    # there's no public part to a symmetric key, so k is only included with the private material
+    def to_jwk(self, include_private=False):
+        jwk = JsonWebKey(kid=self.kid,
+                         kty=self.kty,
+                         key_ops=self.key_ops)
+
+        if include_private:
+            jwk.k = self.k
+
+        return jwk
+
+    def to_jwk_str(self, include_private=False):
+        return self.to_jwk(include_private).to_json()
+
+    # the RFC 7638 jwk thumbprint of the key
+    def thumbprint(self):
+        if self._thumbprint is None:
+            s = '{"k":"%s","kty":"oct"}' % _b64_encode(self._k)
+            self._thumbprint = hashlib.sha256(s.encode('ascii')).digest()
+        return self._thumbprint
+
+    @property
+    def default_encryption_algorithm(self):
+        return self._supported_encryption_algorithms[0]
+
+    @property
+    def default_key_wrap_algorithm(self):
+        return self._supported_key_wrap_algorithms[0] if self._supported_key_wrap_algorithms else None
+
+    # encrypt returns the iv, cipher text and, for authenticated algorithms, the tag concatenated, which decrypt takes
+    # back along with the same algorithm and auth_data. a random iv is generated unless one is specified. decrypt raises
+    # InvalidSignature whenever an authenticated cipher text fails to authenticate, whichever algorithm was used
+    def encrypt(self, plain_text, iv=None, auth_data=b'', **kwargs):
+        algorithm = self._get_algorithm('encrypt', **kwargs)
+        iv_size = _iv_size(algorithm)
+        if iv is None:
+            iv = os.urandom(iv_size)
+        elif len(iv) != iv_size:
+            raise ValueError('iv must be %d bytes' % iv_size)
+
+        if isinstance(algorithm, AuthenticatedSymmetricEncryptionAlgorithm):
+            encryptor = algorithm.create_encryptor(self._k, iv, auth_data)
+            cipher_text = encryptor.transform(plain_text)
+            return b''.join((iv, cipher_text, bytes(encryptor.tag())))
+
+        return b''.join((iv, algorithm.create_encryptor(self._k, iv).transform(plain_text)))
+
+    def decrypt(self, cipher_text, auth_data=b'', **kwargs):
+        algorithm = self._get_algorithm('decrypt', **kwargs)
+        view = memoryview(cipher_text)
+        iv_size = _iv_size(algorithm)
+
+        if isinstance(algorithm, AuthenticatedSymmetricEncryptionAlgorithm):
+            tag_size = algorithm.tag_size_in_bytes
+            if len(view) < iv_size + tag_size:
+                raise InvalidSignature()
+            decryptor = algorithm.create_decryptor(self._k, view[:iv_size].tobytes(), auth_data,
+                                                   view[len(view) - tag_size:].tobytes())
+            try:
+                return decryptor.transform(view[iv_size:len(view) - tag_size])
+            except InvalidTag:
+                raise InvalidSignature()
+
+        if len(view) < iv_size:
+            raise ValueError('cipher_text must start with a %d byte iv' % iv_size)
+        return algorithm.create_decryptor(self._k, view[:iv_size].tobytes()).transform(view[iv_size:])
+
+    def wrap_key(self, key, **kwargs):
+        algorithm = self._get_algorithm('wrapKey', **kwargs)
+        return algorithm.create_encryptor(self._k).transform(key)
+
+    def unwrap_key(self, encrypted_key, **kwargs):
+        algorithm = self._get_algorithm('unwrapKey', **kwargs)
+        return algorithm.create_decryptor(self._k).transform(encrypted_key)
+
+    def sign(self, data, **kwargs):
+        raise NotImplementedError('The current SymmetricKey does not support sign')
+
+    def verify(self, signature, data, **kwargs):
+        raise NotImplementedError('The current SymmetricKey does not support verify')
+
+    def is_private_key(self):
+        return True
+
+    def _set_key(self, k):
+        self._k = k
+        self._thumbprint = None
+        self._supported_encryption_algorithms, self._supported_key_wrap_algorithms = _ALGORITHMS[len(k)]
+
+
+def _iv_size(algorithm):
+    # the cbc algorithms don't define an iv size, their iv is a single block
+    return getattr(algorithm, 'iv_size_in_bytes', None) or algorithm.block_size_in_bytes
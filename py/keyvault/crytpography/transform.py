@@ -1,9 +1,69 @@
+import io
 from abc import ABCMeta, abstractmethod
 from six import with_metaclass
+from . import metrics as _metrics
+from .hashing import hash_stream, DEFAULT_HASH_CHUNK_SIZE
+
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+def _iter_chunks(source, chunk_size):
+    # file like objects are read in chunk_size pieces, any other iterable is assumed to yield chunks of data
+    # which are re-sliced so that no more than chunk_size bytes are handed to the transform at a time. sources
+    # supporting readinto are read into a single reused buffer so each chunk must be consumed before the next
+    readinto = getattr(source, 'readinto', None)
+    read = getattr(source, 'read', None)
+    if readinto:
+        buffer = bytearray(chunk_size)
+        view = memoryview(buffer)
+        n = readinto(buffer)
+        while n:
+            yield view[:n]
+            n = readinto(buffer)
+    elif read:
+        chunk = read(chunk_size)
+        while chunk:
+            yield chunk
+            chunk = read(chunk_size)
+    else:
+        for chunk in source:
+            view = memoryview(chunk)
+            for i in range(0, len(view), chunk_size):
+                yield view[i:i + chunk_size]
+
+
+def _fileno(source):
+    # the file descriptor of a seekable source, or None for sources without a real descriptor, such as io.BytesIO
+    # whose fileno raises, which can only be read through
+    try:
+        fileno = source.fileno()
+        return fileno if source.seekable() else None
+    except (AttributeError, io.UnsupportedOperation, OSError):
+        return None
+
+
+def _seekable(source):
+    # whether source is a file like object which can be rewound and read again
+    try:
+        return bool(source.seekable())
+    except (AttributeError, ValueError):
+        return False
+
+
+def _chunk_writer(sink, zero_copy):
+    # the write function for output held in a reused buffer, which is copied unless the sink consumes it in place
+    if zero_copy:
+        return sink.write
+    return lambda view: sink.write(bytes(view))
 
 
 class CryptoTransform(with_metaclass(ABCMeta, object)):
 
+    def __init_subclass__(cls, **kwargs):
+        super(CryptoTransform, cls).__init_subclass__(**kwargs)
+        _metrics._instrument_class(cls)
+
     def __enter__(self):
         return self
 
@@ -31,6 +91,40 @@ class BlockCryptoTransform(CryptoTransform):
     def finalize(self, data):
         raise NotImplementedError()
 
+    # update_into and finalize_into write the output into out_buffer, rather than returning it, and return the number
+    # of bytes written. as with cryptography's update_into out_buffer must be at least len(data) + 2 * block size - 1
+    # bytes. transforms which can write directly into out_buffer override these to avoid copying the output
+    def update_into(self, data, out_buffer):
+        out = self.update(data)
+        memoryview(out_buffer)[:len(out)] = out
+        return len(out)
+
+    def finalize_into(self, out_buffer):
+        out = self.finalize()
+        memoryview(out_buffer)[:len(out)] = out
+        return len(out)
+
+    def transform_stream(self, source, sink, chunk_size=DEFAULT_CHUNK_SIZE, zero_copy=False):
+        # transforms the data from source, a file like object or an iterable of chunks, writing the output to sink
+        # one chunk at a time so the memory used is bounded by chunk_size rather than the size of the input. each
+        # write is a new bytes object unless zero_copy is set, in which case the output of every chunk is written as a
+        # memoryview of the same reused buffer, saving a copy per chunk, so sink.write must consume the data before
+        # returning, as file objects do, rather than keep a reference to it
+        write = _chunk_writer(sink, zero_copy)
+        out = bytearray(chunk_size + 2 * (self.block_size // 8))
+        view = memoryview(out)
+        written = 0
+        for chunk in _iter_chunks(source, chunk_size):
+            n = self.update_into(chunk, out)
+            if n:
+                write(view[:n])
+                written += n
+        n = self.finalize_into(out)
+        if n:
+            write(view[:n])
+            written += n
+        return written
+
 
 class AuthenticatedCryptoTransform(with_metaclass(ABCMeta, object)):
 
@@ -41,10 +135,39 @@ class AuthenticatedCryptoTransform(with_metaclass(ABCMeta, object)):
 
 class SignatureTransform(with_metaclass(ABCMeta, object)):
 
+    def __init_subclass__(cls, **kwargs):
+        super(SignatureTransform, cls).__init_subclass__(**kwargs)
+        _metrics._instrument_class(cls)
+
     @abstractmethod
     def sign(self, data):
         raise NotImplementedError()
 
     @abstractmethod
     def verify(self, signature, data):
-        raise NotImplementedError()
\ No newline at end of file
+        raise NotImplementedError()
+
+    # transforms which hash the data before signing it expose the hash algorithm and support signing a digest computed
+    # elsewhere, which lets large inputs be hashed incrementally without holding them in memory
+    @property
+    def hash_algorithm(self):
+        return None
+
+    def sign_digest(self, digest):
+        raise NotImplementedError()
+
+    def verify_digest(self, signature, digest):
+        raise NotImplementedError()
+
+    # sign_stream and verify_stream hash source, a path, file like object or iterable of chunks, with hash_stream
+    def sign_stream(self, source, chunk_size=DEFAULT_HASH_CHUNK_SIZE):
+        return self.sign_digest(hash_stream(source, self._stream_hash_algorithm(), chunk_size))
+
+    def verify_stream(self, signature, source, chunk_size=DEFAULT_HASH_CHUNK_SIZE):
+        return self.verify_digest(signature, hash_stream(source, self._stream_hash_algorithm(), chunk_size))
+
+    def _stream_hash_algorithm(self):
+        hash_algorithm = self.hash_algorithm
+        if hash_algorithm is None:
+            raise NotImplementedError('%s does not support signing a digest' % type(self).__name__)
+        return hash_algorithm
@@ -0,0 +1,142 @@
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from keyvault.crytpography import Algorithm
+
+IV = os.urandom(16)
+
+
+def _algorithm(name='A256CBC'):
+    return Algorithm.resolve(name)
+
+
+@pytest.mark.parametrize('name', ['A128CBC', 'A192CBC', 'A256CBC'])
+@pytest.mark.parametrize('size', [0, 1, 15, 16, 17, 1000])
+def test_round_trip(name, size):
+    algorithm = _algorithm(name)
+    key = os.urandom(algorithm.key_size_in_bytes)
+    plain_text = os.urandom(size)
+
+    cipher_text = algorithm.create_encryptor(key, IV).transform(plain_text)
+
+    assert len(cipher_text) == (size // 16 + 1) * 16
+    assert algorithm.create_decryptor(key, IV).transform(cipher_text) == plain_text
+
+
+def test_update_into_finalize_into():
+    algorithm = _algorithm()
+    key = os.urandom(32)
+    plain_text = os.urandom(1000)
+    out = bytearray(1000 + 32)
+
+    encryptor = algorithm.create_encryptor(key, IV)
+    n = encryptor.update_into(plain_text[:500], out)
+    n += encryptor.update_into(plain_text[500:], memoryview(out)[n:])
+    n += encryptor.finalize_into(memoryview(out)[n:])
+    cipher_text = bytes(out[:n])
+
+    decryptor = algorithm.create_decryptor(key, IV)
+    n = decryptor.update_into(cipher_text, out)
+    n += decryptor.finalize_into(memoryview(out)[n:])
+
+    assert cipher_text == algorithm.create_encryptor(key, IV).transform(plain_text)
+    assert bytes(out[:n]) == plain_text
+
+
+@pytest.mark.parametrize('last_block', [bytes(16), b'\x11' * 16, b'\x01' * 14 + b'\x03\x02'])
+def test_invalid_padding(last_block):
+    algorithm = _algorithm()
+    key = os.urandom(32)
+
+    # encrypt a final block without cbc padding so it decrypts to last_block
+    cipher_text = algorithm.create_encryptor(key, IV).update(last_block)
+
+    with pytest.raises(ValueError):
+        algorithm.create_decryptor(key, IV).transform(cipher_text)
+    decryptor = algorithm.create_decryptor(key, IV)
+    decryptor.update(cipher_text)
+    with pytest.raises(ValueError):
+        decryptor.finalize()
+
+
+class _ListSink(object):
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(data)
+
+
+@pytest.mark.parametrize('name', ['A256CBC', 'A128CBC-HS256', 'A256GCM'])
+def test_transform_stream(name):
+    algorithm = _algorithm(name)
+    key = os.urandom(algorithm.key_size_in_bytes)
+    args = (IV[:algorithm.iv_size_in_bytes], b'') if hasattr(algorithm, 'tag_size_in_bytes') else (IV,)
+    plain_text = os.urandom(100000)
+
+    encryptor = algorithm.create_encryptor(key, *args)
+    sink = io.BytesIO()
+    n = encryptor.transform_stream(io.BytesIO(plain_text), sink, chunk_size=4096)
+
+    assert n == len(sink.getvalue())
+    expected = algorithm.create_encryptor(key, *args).transform(plain_text)
+    assert sink.getvalue() == expected
+
+
+def test_transform_stream_sink_may_keep_chunks():
+    algorithm = _algorithm()
+    key = os.urandom(32)
+    plain_text = os.urandom(100000)
+    chunks = [plain_text[i:i + 3000] for i in range(0, len(plain_text), 3000)]
+
+    sink = _ListSink()
+    algorithm.create_encryptor(key, IV).transform_stream(chunks, sink, chunk_size=4096)
+
+    # each write is its own object, so a sink holding on to them sees the output it was given
+    assert all(isinstance(chunk, bytes) for chunk in sink.chunks)
+    assert b''.join(sink.chunks) == algorithm.create_encryptor(key, IV).transform(plain_text)
+
+
+def test_transform_stream_zero_copy():
+    algorithm = _algorithm()
+    key = os.urandom(32)
+    plain_text = os.urandom(100000)
+    sink = io.BytesIO()
+
+    algorithm.create_encryptor(key, IV).transform_stream(io.BytesIO(plain_text), sink, 4096, zero_copy=True)
+
+    assert sink.getvalue() == algorithm.create_encryptor(key, IV).transform(plain_text)
+
+
+@pytest.mark.parametrize('size', [0, 1000, 3 * 1024 * 1024 + 5])
+def test_transform_parallel(size):
+    algorithm = _algorithm()
+    key = os.urandom(32)
+    plain_text = os.urandom(size)
+    cipher_text = algorithm.create_encryptor(key, IV).transform(plain_text)
+
+    assert algorithm.create_decryptor(key, IV).transform_parallel(cipher_text, max_workers=4) == plain_text
+    with ThreadPoolExecutor(2) as executor:
+        assert algorithm.create_decryptor(key, IV).transform_parallel(cipher_text, executor) == plain_text
+
+
+def test_transform_parallel_invalid_length():
+    algorithm = _algorithm()
+    key = os.urandom(32)
+    cipher_text = algorithm.create_encryptor(key, IV).transform(os.urandom(3 * 1024 * 1024))
+
+    with pytest.raises(ValueError):
+        algorithm.create_decryptor(key, IV).transform_parallel(cipher_text[:-1], max_workers=4)
+    with pytest.raises(ValueError):
+        algorithm.create_decryptor(os.urandom(32), IV).transform_parallel(cipher_text, max_workers=4)
+
+
+def test_context_reused_for_key():
+    algorithm = _algorithm()
+    key = os.urandom(32)
+
+    assert algorithm._get_context(key) is algorithm._get_context(bytearray(key))
+    assert algorithm._get_context(key) is not algorithm._get_context(os.urandom(32))
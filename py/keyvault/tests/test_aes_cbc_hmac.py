@@ -0,0 +1,192 @@
+import io
+import os
+
+import pytest
+from cryptography.exceptions import InvalidSignature
+
+from keyvault.crytpography import Algorithm
+
+KEY = os.urandom(32)
+IV = os.urandom(16)
+AUTH_DATA = b'auth data'
+
+
+def _encrypt(plain_text):
+    encryptor = Algorithm.resolve('A128CBC-HS256').create_encryptor(KEY, IV, AUTH_DATA)
+    cipher_text = encryptor.transform(plain_text)
+    return cipher_text, bytes(encryptor.tag())
+
+
+def _decryptor(tag):
+    return Algorithm.resolve('A128CBC-HS256').create_decryptor(KEY, IV, AUTH_DATA, tag)
+
+
+@pytest.mark.parametrize('size', [0, 1, 16, 100000])
+def test_round_trip(size):
+    plain_text = os.urandom(size)
+    cipher_text, tag = _encrypt(plain_text)
+
+    assert _decryptor(tag).transform(cipher_text) == plain_text
+
+
+def test_tampered_cipher_text():
+    cipher_text, tag = _encrypt(b'plain text')
+
+    with pytest.raises(InvalidSignature):
+        _decryptor(tag).transform(b'\0' + cipher_text[1:])
+
+
+class _Stream(object):
+    # a file like object without a buffer or descriptor, seekable or not
+    def __init__(self, data, seekable):
+        self._f = io.BytesIO(data)
+        self._seekable = seekable
+
+    def read(self, n):
+        return self._f.read(n)
+
+    def seekable(self):
+        return self._seekable
+
+    def seek(self, offset):
+        return self._f.seek(offset)
+
+    def tell(self):
+        return self._f.tell()
+
+
+def _tampered(cipher_text):
+    return cipher_text[:-1] + bytes([cipher_text[-1] ^ 1])
+
+
+@pytest.mark.parametrize('source', [io.BytesIO, lambda data: _Stream(data, True)])
+def test_transform_stream_verifies_before_writing(source):
+    plain_text = os.urandom(100000)
+    cipher_text, tag = _encrypt(plain_text)
+    sink = io.BytesIO()
+
+    # BytesIO has a fileno method which raises, so it's read through its buffer rather than mapped
+    n = _decryptor(tag).transform_stream(source(cipher_text), sink, chunk_size=4096)
+    assert n == len(plain_text) and sink.getvalue() == plain_text
+
+    sink = io.BytesIO()
+    with pytest.raises(InvalidSignature):
+        _decryptor(tag).transform_stream(source(_tampered(cipher_text)), sink, chunk_size=4096)
+    assert sink.getvalue() == b''
+
+
+def test_transform_stream_from_bytes_io_position():
+    plain_text = os.urandom(5000)
+    cipher_text, tag = _encrypt(plain_text)
+    source = io.BytesIO(b'header' + cipher_text)
+    source.seek(len(b'header'))
+    sink = io.BytesIO()
+
+    _decryptor(tag).transform_stream(source, sink, chunk_size=4096)
+
+    assert sink.getvalue() == plain_text
+    assert source.tell() == len(b'header' + cipher_text)
+    # the buffer is released so the source can still be written to
+    source.write(b'more')
+
+
+@pytest.mark.parametrize('source', [lambda data: _Stream(data, False), lambda data: [data]])
+def test_transform_stream_unverifiable_source(source):
+    plain_text = os.urandom(100000)
+    cipher_text, tag = _encrypt(plain_text)
+
+    with pytest.raises(ValueError):
+        _decryptor(tag).transform_stream(source(cipher_text), io.BytesIO())
+
+    sink = io.BytesIO()
+    _decryptor(tag).transform_stream(source(cipher_text), sink, chunk_size=4096, allow_unverified=True)
+    assert sink.getvalue() == plain_text
+    with pytest.raises(InvalidSignature):
+        _decryptor(tag).transform_stream(source(_tampered(cipher_text)), io.BytesIO(), allow_unverified=True)
+
+
+def test_transform_stream_from_file(tmp_path):
+    plain_text = os.urandom(100000)
+    cipher_text, tag = _encrypt(plain_text)
+    path = tmp_path / 'cipher_text'
+    path.write_bytes(cipher_text)
+    sink = io.BytesIO()
+
+    with open(path, 'rb') as f:
+        n = _decryptor(tag).transform_stream(f, sink, chunk_size=4096)
+        assert f.tell() == len(cipher_text)
+
+    assert n == len(plain_text)
+    assert sink.getvalue() == plain_text
+
+
+def test_transform_file_starts_at_current_position(tmp_path):
+    plain_text = os.urandom(5000)
+    cipher_text, tag = _encrypt(plain_text)
+    path = tmp_path / 'cipher_text'
+    path.write_bytes(b'header' + cipher_text)
+    sink = io.BytesIO()
+
+    with open(path, 'rb') as f:
+        f.seek(len(b'header'))
+        _decryptor(tag).transform_file(f, sink)
+
+    assert sink.getvalue() == plain_text
+
+
+def test_transform_file_writes_nothing_when_tampered(tmp_path):
+    cipher_text, tag = _encrypt(os.urandom(5000))
+    path = tmp_path / 'cipher_text'
+    path.write_bytes(cipher_text[:-1] + bytes([cipher_text[-1] ^ 1]))
+    sink = io.BytesIO()
+
+    with open(path, 'rb') as f:
+        with pytest.raises(InvalidSignature):
+            _decryptor(tag).transform_file(f, sink)
+
+    assert sink.getvalue() == b''
+
+
+def test_transform_file_rejects_empty_input(tmp_path):
+    path = tmp_path / 'empty'
+    path.write_bytes(b'')
+
+    with open(path, 'rb') as f:
+        with pytest.raises(InvalidSignature):
+            _decryptor(b'\0' * 16).transform_file(f, io.BytesIO())
+
+
+@pytest.mark.parametrize('size', [16, 3 * 1024 * 1024 + 5])
+def test_transform_parallel(size):
+    plain_text = os.urandom(size)
+    cipher_text, tag = _encrypt(plain_text)
+
+    assert _decryptor(tag).transform_parallel(cipher_text, max_workers=4) == plain_text
+    with pytest.raises(InvalidSignature):
+        _decryptor(tag).transform_parallel(cipher_text[:-16] + bytes(16), max_workers=4)
+
+
+def test_encrypt_transform_stream():
+    plain_text = os.urandom(100000)
+    expected, expected_tag = _encrypt(plain_text)
+    encryptor = Algorithm.resolve('A128CBC-HS256').create_encryptor(KEY, IV, AUTH_DATA)
+    sink = io.BytesIO()
+
+    encryptor.transform_stream(io.BytesIO(plain_text), sink, chunk_size=4096)
+
+    assert sink.getvalue() == expected
+    assert bytes(encryptor.tag()) == expected_tag
+
+
+def test_context_reused_for_key_and_auth_data():
+    algorithm = Algorithm.resolve('A128CBC-HS256')
+
+    assert algorithm._get_context(KEY, AUTH_DATA) is algorithm._get_context(bytearray(KEY), AUTH_DATA)
+    assert algorithm._get_context(KEY, AUTH_DATA) is not algorithm._get_context(KEY, b'other')
+
+    # each transform starts from a copy of the primed hmac, so messages sharing a context get their own tags
+    first, first_tag = _encrypt(b'first')
+    second, second_tag = _encrypt(b'second')
+    assert first_tag != second_tag
+    assert _decryptor(first_tag).transform(first) == b'first'
+    assert _decryptor(second_tag).transform(second) == b'second'
@@ -0,0 +1,62 @@
+import os
+
+import pytest
+from cryptography.exceptions import InvalidTag
+
+from keyvault.crytpography import Algorithm
+
+
+@pytest.mark.parametrize('name', ['A128GCM', 'A192GCM', 'A256GCM'])
+@pytest.mark.parametrize('size', [0, 1, 16, 1000])
+def test_round_trip(name, size):
+    algorithm = Algorithm.resolve(name)
+    key = os.urandom(algorithm.key_size_in_bytes)
+    iv = os.urandom(12)
+    plain_text = os.urandom(size)
+
+    encryptor = algorithm.create_encryptor(key, iv, b'aad')
+    cipher_text = encryptor.transform(plain_text)
+
+    assert len(cipher_text) == algorithm.cipher_text_size(size) == size
+    decryptor = algorithm.create_decryptor(key, iv, b'aad', bytes(encryptor.tag()))
+    assert decryptor.transform(cipher_text) == plain_text
+
+
+def test_known_answer():
+    # test case 2 of the gcm specification
+    encryptor = Algorithm.resolve('A128GCM').create_encryptor(bytes(16), bytes(12), b'')
+
+    assert encryptor.transform(bytes(16)).hex() == '0388dace60b6a392f328c2b971b2fe78'
+    assert bytes(encryptor.tag()).hex() == 'ab6e47d42cec13bdf53a67b21257bddf'
+
+
+def test_tampered():
+    algorithm = Algorithm.resolve('A256GCM')
+    key, iv = os.urandom(32), os.urandom(12)
+    encryptor = algorithm.create_encryptor(key, iv, b'aad')
+    cipher_text = encryptor.transform(b'plain text')
+    tag = bytes(encryptor.tag())
+
+    with pytest.raises(InvalidTag):
+        algorithm.create_decryptor(key, iv, b'aad', tag).transform(b'\0' + cipher_text[1:])
+    with pytest.raises(InvalidTag):
+        algorithm.create_decryptor(key, iv, b'other', tag).transform(cipher_text)
+
+
+def test_invalid_input():
+    algorithm = Algorithm.resolve('A256GCM')
+
+    with pytest.raises(ValueError):
+        algorithm.create_encryptor(os.urandom(16), os.urandom(12), b'')
+    with pytest.raises(ValueError):
+        algorithm.create_encryptor(os.urandom(32), os.urandom(16), b'')
+    with pytest.raises(ValueError):
+        algorithm.create_decryptor(os.urandom(32), os.urandom(12), b'', b'')
+
+
+def test_context_reused_for_key():
+    algorithm = Algorithm.resolve('A128GCM')
+    key = os.urandom(16)
+
+    assert algorithm._get_context(key) is algorithm._get_context(bytearray(key))
+    assert algorithm._get_context(key) is not algorithm._get_context(os.urandom(16))
@@ -0,0 +1,92 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pytest
+from cryptography.exceptions import InvalidSignature
+
+from keyvault.crytpography import AsyncKey, EcKey, RsaKey
+
+
+@pytest.fixture(scope='module')
+def key():
+    return RsaKey.generate(size=2048)
+
+
+class _SlowKey(object):
+    # records the peak number of operations running at once
+    def __init__(self):
+        self.running = self.peak = 0
+        self._lock = threading.Lock()
+
+    def sign(self, data):
+        with self._lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        time.sleep(0.05)
+        with self._lock:
+            self.running -= 1
+        return data
+
+
+def test_round_trip(key):
+    async def run(async_key):
+        signature = await async_key.sign(b'data')
+        await async_key.verify(signature, b'data')
+        wrapped = await async_key.wrap_key(b'k' * 32)
+        return await async_key.unwrap_key(wrapped)
+
+    assert asyncio.run(run(AsyncKey(key))) == b'k' * 32
+    with ThreadPoolExecutor(2) as threads:
+        assert asyncio.run(run(AsyncKey(key, executor=threads, max_concurrency=2))) == b'k' * 32
+
+
+def test_process_pool_loads_key_once(key):
+    async def run(async_key):
+        signatures = await asyncio.gather(*(async_key.sign(b'data') for _ in range(8)))
+        for signature in signatures:
+            key.verify(signature, b'data')
+
+    with AsyncKey(key, processes=2, max_concurrency=4) as async_key:
+        asyncio.run(run(async_key))
+
+
+def test_shared_process_pool(key):
+    async def run(async_key):
+        return await async_key.sign(b'data')
+
+    with ProcessPoolExecutor(1) as processes:
+        key.verify(asyncio.run(run(AsyncKey(key, executor=processes))), b'data')
+
+
+def test_executor_and_processes_are_exclusive(key):
+    with ThreadPoolExecutor(1) as threads:
+        with pytest.raises(ValueError):
+            AsyncKey(key, executor=threads, processes=1)
+
+
+def test_cancel_keeps_slot_until_work_finishes():
+    slow_key = _SlowKey()
+
+    async def run(async_key):
+        tasks = [asyncio.ensure_future(async_key.sign(b'data')) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        for task in tasks:
+            task.cancel()
+
+        # the cancelled operations are still running, the new ones must wait for their slots
+        await asyncio.gather(*(async_key.sign(b'data') for _ in range(4)))
+
+    with ThreadPoolExecutor(8) as threads:
+        asyncio.run(run(AsyncKey(slow_key, executor=threads, max_concurrency=2)))
+
+    assert slow_key.peak == 2
+
+
+def test_errors_propagate():
+    async def run(async_key):
+        await async_key.verify(b'x' * 64, b'data')
+
+    with pytest.raises(InvalidSignature):
+        asyncio.run(run(AsyncKey(EcKey.generate())))
@@ -0,0 +1,88 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from cryptography.exceptions import InvalidSignature
+
+from keyvault.crytpography import Algorithm, EcKey, RsaKey
+
+
+@pytest.fixture(scope='module')
+def key():
+    return RsaKey.generate(size=2048)
+
+
+@pytest.fixture(scope='module')
+def public_key(key):
+    return RsaKey.from_jwk(key.to_jwk())
+
+
+@pytest.mark.parametrize('max_workers', [1, 2])
+def test_wrap_unwrap_keys(key, max_workers):
+    keys = [os.urandom(32) for _ in range(100)]
+
+    wrapped = list(key.wrap_keys(keys, max_workers=max_workers))
+
+    assert list(key.unwrap_keys(wrapped, max_workers=max_workers)) == keys
+
+
+def test_unwrap_keys_yields_failures_in_place(key):
+    wrapped = list(key.wrap_keys([b'a' * 32, b'b' * 32], max_workers=1))
+
+    results = list(key.unwrap_keys([wrapped[0], b'invalid', wrapped[1]], max_workers=1))
+
+    assert results[0] == b'a' * 32 and results[2] == b'b' * 32
+    assert isinstance(results[1], Exception)
+
+
+def test_batch_wrap_validates_when_called(key, public_key):
+    # the errors are raised by the call itself rather than when the results are first iterated
+    with pytest.raises(NotImplementedError):
+        public_key.unwrap_keys([b'wrapped'])
+    with pytest.raises(KeyError):
+        key.wrap_keys([b'key'], algorithm='RSA1_5')
+
+
+@pytest.mark.parametrize('max_workers', [1, 2])
+def test_sign_verify_many(key, public_key, max_workers):
+    data = [os.urandom(64) for _ in range(100)]
+
+    signatures = key.sign_many(data, max_workers=max_workers)
+    signatures[3] = signatures[4]
+
+    flags = public_key.verify_many(signatures, data, max_workers=max_workers)
+    assert flags == bytearray(1 if i != 3 else 0 for i in range(100))
+
+
+def test_verify_many_rejects_length_mismatch(key):
+    data = [b'a', b'b']
+    signatures = key.sign_many(data, max_workers=1)
+
+    with pytest.raises(ValueError):
+        key.verify_many(signatures, data + [b'c'], max_workers=1)
+    with pytest.raises(ValueError):
+        key.verify_many(iter(signatures), iter(data[:1]), max_workers=1)
+
+
+def test_algorithm_sign_verify_many(key):
+    algorithm = Algorithm.resolve('RS256')
+    data = [os.urandom(64) for _ in range(10)]
+
+    with ThreadPoolExecutor(2) as executor:
+        signatures = algorithm.sign_many(key.private_key, data, executor)
+        assert algorithm.verify_many(key.public_key, signatures, data, executor) == bytearray([1] * 10)
+        with pytest.raises(ValueError):
+            algorithm.verify_many(key.public_key, signatures, data[1:], executor)
+
+
+def test_key_verify_many_default():
+    # EcKey uses the per item implementation on Key
+    key = EcKey.generate()
+    data = [b'a', b'b']
+    signatures = key.sign_many(data)
+
+    assert key.verify_many(signatures, [b'a', b'c']) == bytearray([1, 0])
+    with pytest.raises(ValueError):
+        key.verify_many(signatures, data[:1])
+    with pytest.raises(InvalidSignature):
+        key.verify(signatures[0], b'c')
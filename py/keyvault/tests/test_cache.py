@@ -0,0 +1,48 @@
+import pytest
+
+from keyvault.crytpography import Algorithm, RsaKey, SymmetricKey
+from keyvault.crytpography._cache import LruCache
+
+
+def test_lru_cache():
+    cache = LruCache(2)
+    created = []
+
+    def factory(value):
+        return lambda: created.append(value) or value
+
+    assert cache.get_or_add('a', factory(1)) == 1
+    assert cache.get_or_add('b', factory(2)) == 2
+    assert cache.get_or_add('a', factory(3)) == 1
+    # b is now the least recently used
+    cache.get_or_add('c', factory(4))
+    assert cache.get_or_add('a', factory(5)) == 1
+    assert cache.get_or_add('b', factory(6)) == 6
+    assert len(cache) == 2 and created == [1, 2, 4, 6]
+
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_key_reuses_resolved_algorithms():
+    key = SymmetricKey.generate(size=256)
+
+    algorithm = key._get_algorithm('encrypt')
+    assert key._get_algorithm('encrypt') is algorithm
+    assert key._get_algorithm('decrypt', algorithm='A256GCM') is algorithm
+    assert key._get_algorithm('encrypt', algorithm='A256CBC') is not algorithm
+
+
+def test_key_accepts_resolved_algorithm():
+    key = SymmetricKey.generate(size=256)
+    algorithm = Algorithm.resolve('A256CBC')
+
+    assert key._get_algorithm('encrypt', algorithm=algorithm) is algorithm
+    assert key.decrypt(key.encrypt(b'data', algorithm=algorithm), algorithm='A256CBC') == b'data'
+
+
+def test_key_rejects_unsupported_algorithm():
+    key = RsaKey.generate(size=2048)
+
+    with pytest.raises(ValueError):
+        key._get_algorithm('sign', algorithm='A256GCM')
@@ -0,0 +1,116 @@
+import io
+import mmap
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from cryptography.exceptions import InvalidSignature
+
+from keyvault.crytpography import SegmentedReader, container, decrypt_segmented, encrypt_segmented
+
+KEY = os.urandom(64)
+SEGMENT_SIZE = 1000
+
+
+def _container(plain_text, algorithm='A256CBC-HS512'):
+    sink = io.BytesIO()
+    encrypt_segmented(plain_text, sink, KEY, algorithm=algorithm, segment_size=SEGMENT_SIZE)
+    return sink.getvalue()
+
+
+@pytest.mark.parametrize('algorithm', ['A256CBC-HS512', 'A256GCM'])
+@pytest.mark.parametrize('size', [0, 1, SEGMENT_SIZE, 10 * SEGMENT_SIZE + 7])
+def test_round_trip(algorithm, size):
+    plain_text = os.urandom(size)
+    sink = io.BytesIO()
+
+    with ThreadPoolExecutor(2) as executor:
+        decrypt_segmented(_container(plain_text, algorithm), sink, KEY, executor=executor)
+
+    assert sink.getvalue() == plain_text
+
+
+def test_encrypt_from_file_object():
+    plain_text = os.urandom(3 * SEGMENT_SIZE)
+    sink = io.BytesIO()
+    encrypt_segmented(io.BytesIO(plain_text), sink, KEY, segment_size=SEGMENT_SIZE)
+
+    with SegmentedReader(sink.getvalue(), KEY) as reader:
+        assert reader.read() == plain_text
+
+
+def test_random_access_reads():
+    plain_text = os.urandom(10 * SEGMENT_SIZE + 7)
+
+    with SegmentedReader(_container(plain_text), KEY) as reader:
+        assert len(reader) == len(plain_text)
+        assert reader.read(1500, 2000) == plain_text[1500:3500]
+        assert reader.read(len(plain_text) - 3) == plain_text[-3:]
+        assert reader.read(len(plain_text) + 10) == b''
+        assert reader.read_segment(10) == plain_text[10 * SEGMENT_SIZE:]
+        with pytest.raises(IndexError):
+            reader.read_segment(11)
+
+
+def test_reader_over_bytes_io():
+    plain_text = os.urandom(3 * SEGMENT_SIZE)
+
+    # BytesIO has a fileno method which raises, so it's read rather than mapped
+    with SegmentedReader(io.BytesIO(_container(plain_text)), KEY) as reader:
+        assert reader.read() == plain_text
+
+
+def test_reader_starts_at_file_position(tmp_path):
+    plain_text = os.urandom(3 * SEGMENT_SIZE)
+    path = tmp_path / 'container'
+    path.write_bytes(b'prefix' + _container(plain_text))
+
+    with open(path, 'rb') as f:
+        f.seek(len(b'prefix'))
+        with SegmentedReader(f, KEY) as reader:
+            assert reader.read(500, 1000) == plain_text[500:1500]
+
+
+def test_tampered_segment():
+    container = bytearray(_container(os.urandom(3 * SEGMENT_SIZE)))
+    container[-1] ^= 1
+
+    with SegmentedReader(bytes(container), KEY) as reader:
+        reader.read_segment(0)
+        with pytest.raises(InvalidSignature):
+            reader.read_segment(2)
+
+
+def test_invalid_containers(tmp_path):
+    with pytest.raises(ValueError):
+        SegmentedReader(b'not a container', KEY)
+
+    path = tmp_path / 'empty'
+    path.write_bytes(b'')
+    with open(path, 'rb') as f:
+        with pytest.raises(ValueError):
+            SegmentedReader(f, KEY)
+
+
+def test_short_key():
+    with pytest.raises(ValueError):
+        encrypt_segmented(b'data', io.BytesIO(), KEY[:16])
+
+
+def test_reader_closes_mapping_on_invalid_key(tmp_path, monkeypatch):
+    mapped = []
+    real_mmap = mmap.mmap
+
+    def _mmap(*args, **kwargs):
+        mapped.append(real_mmap(*args, **kwargs))
+        return mapped[-1]
+
+    monkeypatch.setattr(container.mmap, 'mmap', _mmap)
+    path = tmp_path / 'container'
+    path.write_bytes(_container(b'data'))
+    with open(path, 'rb') as f:
+        with pytest.raises(ValueError):
+            SegmentedReader(f, KEY[:16])
+
+    assert len(mapped) == 1
+    assert mapped[0].closed
@@ -0,0 +1,82 @@
+import io
+
+import pytest
+from cryptography.exceptions import InvalidSignature
+
+from keyvault.crytpography import EcKey, JsonWebKey
+
+
+@pytest.mark.parametrize('crv,size,alg', [('P-256', 32, 'ES256'), ('P-384', 48, 'ES384'), ('P-521', 66, 'ES512')])
+def test_sign_verify(crv, size, alg):
+    key = EcKey.generate(crv=crv)
+
+    signature = key.sign(b'data')
+
+    assert key.default_signature_algorithm == alg
+    assert len(signature) == 2 * size
+    key.verify(signature, b'data')
+    with pytest.raises(InvalidSignature):
+        key.verify(signature, b'other')
+
+
+def test_jwk_round_trip():
+    key = EcKey.generate(crv='P-384')
+
+    imported = EcKey.from_jwk_str(key.to_jwk_str(include_private=True))
+    public = EcKey.from_jwk_str(key.to_jwk_str())
+
+    assert imported.is_private_key() and not public.is_private_key()
+    assert (imported.x, imported.y, imported.d) == (key.x, key.y, key.d)
+    assert len(imported.x) == len(imported.y) == len(imported.d) == 48
+    assert public.d is None
+    assert imported.thumbprint() == public.thumbprint() == key.thumbprint()
+    public.verify(imported.sign(b'data'), b'data')
+
+
+def test_stream_signature_matches_sign():
+    key = EcKey.generate()
+    data = b'x' * 100000
+
+    key.verify(key.sign_stream(io.BytesIO(data)), data)
+    key.verify_stream(key.sign(data), io.BytesIO(data))
+
+
+def test_from_jwk_rejects_invalid_jwks():
+    with pytest.raises(ValueError):
+        EcKey.from_jwk(JsonWebKey(kty='RSA', crv='P-256', x=b'\x01', y=b'\x01'))
+    with pytest.raises(ValueError):
+        EcKey.from_jwk(JsonWebKey(kty='EC', crv='P-192', x=b'\x01', y=b'\x01'))
+    with pytest.raises(ValueError):
+        EcKey.from_jwk(JsonWebKey(kty='EC', crv='P-256', x=b'\x01'))
+    with pytest.raises(ValueError):
+        EcKey.generate(crv='secp256k1')
+
+
+def test_verify_rejects_signature_of_wrong_length():
+    key = EcKey.generate()
+
+    with pytest.raises(ValueError):
+        key.verify(key.sign(b'data')[:-1], b'data')
+
+
+def test_public_key_cannot_sign():
+    public = EcKey.from_jwk(EcKey.generate().to_jwk())
+
+    with pytest.raises(NotImplementedError):
+        public.sign(b'data')
+
+
+def test_private_import_not_served_from_cache():
+    victim = EcKey.generate()
+    EcKey.from_jwk(victim.to_jwk(include_private=True))
+    EcKey.from_jwk(victim.to_jwk())
+
+    # a jwk pairing the victim's public point with another private value must not get back the victim's key
+    with pytest.raises(ValueError):
+        EcKey.from_jwk(JsonWebKey(kty='EC', crv='P-256', x=victim.x, y=victim.y, d=b'\x01' * 32))
+
+
+def test_public_import_reuses_cached_backend_key():
+    jwk = EcKey.generate().to_jwk()
+
+    assert EcKey.from_jwk(jwk).public_key is EcKey.from_jwk(jwk).public_key
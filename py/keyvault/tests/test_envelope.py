@@ -0,0 +1,74 @@
+import pytest
+from cryptography.exceptions import InvalidSignature
+
+from keyvault.crytpography import EnvelopeDecryptor, EnvelopeEncryptor, SymmetricKey
+
+
+@pytest.fixture
+def kek():
+    return SymmetricKey.generate(kid='kek')
+
+
+@pytest.mark.parametrize('algorithm', ['A256CBC-HS512', 'A128CBC-HS256', 'A256GCM'])
+def test_round_trip(kek, algorithm):
+    wrapped_keys = {}
+    encryptor = EnvelopeEncryptor(kek, wrapped_keys, algorithm=algorithm)
+    decryptor = EnvelopeDecryptor(kek, wrapped_keys)
+
+    messages = [encryptor.encrypt(b'message %d' % i, auth_data=b'aad') for i in range(3)]
+
+    assert [decryptor.decrypt(m, auth_data=b'aad') for m in messages] == [b'message %d' % i for i in range(3)]
+    assert len(wrapped_keys) == 1
+
+
+def test_rotation_limits(kek):
+    wrapped_keys = {}
+    encryptor = EnvelopeEncryptor(kek, wrapped_keys, max_messages=2, max_bytes=None, max_age=None)
+    decryptor = EnvelopeDecryptor(lambda kid: {'kek': kek}[kid], wrapped_keys)
+
+    messages = [encryptor.encrypt(b'x') for _ in range(5)]
+
+    assert encryptor.rotations == 3
+    assert len(wrapped_keys) == 3
+    assert all(decryptor.decrypt(m) == b'x' for m in messages)
+
+
+def test_tampered_message(kek):
+    wrapped_keys = {}
+    message = bytearray(EnvelopeEncryptor(kek, wrapped_keys).encrypt(b'message'))
+    message[-1] ^= 1
+
+    with pytest.raises(InvalidSignature):
+        EnvelopeDecryptor(kek, wrapped_keys).decrypt(bytes(message))
+    with pytest.raises(ValueError):
+        EnvelopeDecryptor(kek, wrapped_keys).decrypt(b'junk')
+
+
+def test_decryptor_reuses_algorithm(kek):
+    wrapped_keys = {}
+    encryptor = EnvelopeEncryptor(kek, wrapped_keys, algorithm='A256GCM')
+    decryptor = EnvelopeDecryptor(kek, wrapped_keys)
+
+    decryptor.decrypt(encryptor.encrypt(b'a'))
+    algorithm = decryptor._algorithms.get_or_add('A256GCM', lambda: None)
+    decryptor.decrypt(encryptor.encrypt(b'b'))
+
+    assert algorithm is not None
+    assert decryptor._algorithms.get_or_add('A256GCM', lambda: None) is algorithm
+
+
+def test_unknown_algorithm(kek):
+    wrapped_keys = {}
+    message = bytearray(EnvelopeEncryptor(kek, wrapped_keys, algorithm='A256GCM').encrypt(b'a'))
+    start = message.index(b'A256GCM')
+    message[start:start + 7] = b'X256GCM'
+
+    with pytest.raises(ValueError, match='invalid envelope header'):
+        EnvelopeDecryptor(kek, wrapped_keys).decrypt(bytes(message))
+
+
+def test_unknown_data_key(kek):
+    message = EnvelopeEncryptor(kek, {}, algorithm='A256GCM').encrypt(b'a')
+
+    with pytest.raises(ValueError, match='invalid envelope header'):
+        EnvelopeDecryptor(kek, {}).decrypt(message)
@@ -0,0 +1,92 @@
+import hashlib
+import io
+import os
+
+import pytest
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import hashes
+
+from keyvault.crytpography import Algorithm, RsaKey, hash_stream
+
+DATA = os.urandom(3 * 1024 * 1024 + 7)
+
+
+@pytest.fixture(scope='module')
+def key():
+    return RsaKey.generate(size=2048)
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = tmp_path / 'data'
+    path.write_bytes(DATA)
+    return str(path)
+
+
+class _Unbuffered(object):
+    # a file like object with only read, as a socket or pipe wrapper might have
+    def __init__(self, data):
+        self._f = io.BytesIO(data)
+
+    def read(self, n):
+        return self._f.read(n)
+
+
+@pytest.mark.parametrize('hash_algorithm', [hashes.SHA256(), hashes.SHA512(), hashes.SHA3_256()])
+def test_hash_stream_sources(path, hash_algorithm):
+    expected = hashlib.new(hash_algorithm.name, DATA).digest()
+
+    assert hash_stream(path, hash_algorithm) == expected
+    with open(path, 'rb') as f:
+        assert hash_stream(f, hash_algorithm, chunk_size=100000) == expected
+    assert hash_stream(io.BytesIO(DATA), hash_algorithm, chunk_size=100000) == expected
+    assert hash_stream(_Unbuffered(DATA), hash_algorithm, chunk_size=100000) == expected
+    assert hash_stream([DATA[:10], DATA[10:]], hash_algorithm) == expected
+
+
+def test_hash_stream_from_file_position(path):
+    with open(path, 'rb') as f:
+        f.seek(4096)
+        assert hash_stream(f, hashes.SHA256()) == hashlib.sha256(DATA[4096:]).digest()
+        f.seek(5)
+        assert hash_stream(f, hashes.SHA256()) == hashlib.sha256(DATA[5:]).digest()
+
+
+def test_hash_stream_read_errors_raised():
+    class _Failing(object):
+        def read(self, n):
+            raise IOError('read failed')
+
+    with pytest.raises(IOError):
+        hash_stream(_Failing(), hashes.SHA256())
+
+
+def test_sign_stream(key, path):
+    signature = key.sign_stream(path)
+
+    key.verify(signature, DATA)
+    key.verify_stream(signature, io.BytesIO(DATA))
+    with pytest.raises(InvalidSignature):
+        key.verify_stream(signature, [DATA[1:]])
+
+
+def test_sign_verify_streams(key, path):
+    sources = [path, io.BytesIO(DATA[:100]), [b'chunk', b'ed']]
+
+    signatures = key.sign_streams(sources, max_workers=2)
+
+    key.verify(signatures[2], b'chunked')
+    flags = key.verify_streams(signatures, [path, io.BytesIO(DATA[:100]), [b'other']], max_workers=2)
+    assert flags == bytearray([1, 1, 0])
+    with pytest.raises(ValueError):
+        key.verify_streams(signatures, [path], max_workers=2)
+
+
+def test_signature_transform_stream(key):
+    algorithm = Algorithm.resolve('RS256')
+    signer = algorithm.create_signature_transform(key._rsa_impl)
+
+    signature = signer.sign_stream(io.BytesIO(DATA))
+
+    assert signature == signer.sign(DATA)
+    algorithm.create_signature_transform(key.public_key).verify_stream(signature, [DATA])
@@ -0,0 +1,69 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from keyvault.crytpography import Algorithm
+from keyvault.crytpography.algorithm import _ALGORITHM_MODULES, _load_all
+
+# importing the package eagerly took ~79ms, almost all of it importing cryptography, and lazily takes ~2ms. the limit
+# is well above the lazy time so a loaded machine doesn't fail the test, and well below the eager time
+MAX_IMPORT_MS = 30.0
+
+_TIMED = """
+import sys, time
+start = time.perf_counter()
+%s
+print((time.perf_counter() - start) * 1000.0)
+print(' '.join(m for m in sys.modules if m.startswith(('keyvault.', 'cryptography'))))
+"""
+
+
+def _run(statement):
+    # runs statement in a fresh interpreter, returning the milliseconds it took and the modules it loaded
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [root, os.environ.get('PYTHONPATH')])))
+    output = subprocess.run([sys.executable, '-c', _TIMED % statement], env=env, check=True, stdout=subprocess.PIPE,
+                            universal_newlines=True).stdout
+    elapsed, modules = output.splitlines()
+    return float(elapsed), set(modules.split())
+
+
+def test_package_import_loads_no_submodules():
+    _, modules = _run('import keyvault.crytpography')
+
+    assert modules == {'keyvault.crytpography'}
+
+
+def test_package_import_time():
+    elapsed = min(_run('import keyvault.crytpography')[0] for _ in range(3))
+
+    assert elapsed < MAX_IMPORT_MS
+
+
+def test_algorithm_import_loads_no_helpers():
+    _, modules = _run('import keyvault.crytpography.algorithm')
+
+    assert modules == {'keyvault.crytpography', 'keyvault.crytpography.algorithm'}
+
+
+def test_resolve_loads_only_the_algorithm_module():
+    _, modules = _run('from keyvault.crytpography import Algorithm; Algorithm.resolve("A128CBC")')
+
+    algorithms = set(m for m in modules if m.startswith('keyvault.crytpography.algorithms.'))
+    assert algorithms == {'keyvault.crytpography.algorithms.aes_cbc'}
+
+
+@pytest.mark.parametrize('name', sorted(_ALGORITHM_MODULES))
+def test_resolve(name):
+    assert Algorithm.resolve(name).name() == name
+
+
+def test_resolve_unknown_algorithm():
+    with pytest.raises(KeyError):
+        Algorithm.resolve('A64CBC')
+
+
+def test_load_all_registers_every_algorithm():
+    assert set(_ALGORITHM_MODULES) <= set(_load_all())
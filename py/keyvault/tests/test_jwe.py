@@ -0,0 +1,100 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from cryptography.exceptions import InvalidSignature
+
+from keyvault.crytpography import JweDecoder, JweEncoder, RsaKey, SymmetricKey, UnwrappedKeyCache, parse_jwe
+from keyvault.crytpography.jwk import _b64_decode
+
+# RFC 7516 appendix A.3, A128KW and A128CBC-HS256
+RFC_7516_KEY = _b64_decode('GawgguFyGrWKav7AX4VKUg')
+RFC_7516_TOKEN = ('eyJhbGciOiJBMTI4S1ciLCJlbmMiOiJBMTI4Q0JDLUhTMjU2In0.'
+                  '6KB707dM9YTIgHtLvtgWQ8mKwboJW3of9locizkDTHzBC2IlrT1oOQ.'
+                  'AxY8DCtDaGlsbGljb3RoZQ.'
+                  'KDlTtXchhZTGufMYmOYGS4HffxPSUrfmqCHXaI9wOGY.'
+                  'U0m_YmjN04DJvceFICbCVQ')
+
+
+@pytest.fixture(scope='module')
+def rsa_key():
+    return RsaKey.generate(kid='rsa', size=2048)
+
+
+def test_rfc_7516_example():
+    header, payload = JweDecoder({None: RFC_7516_KEY}).decode(RFC_7516_TOKEN)
+
+    assert header == {'alg': 'A128KW', 'enc': 'A128CBC-HS256'}
+    assert payload == b'Live long and prosper.'
+
+
+@pytest.mark.parametrize('enc', ['A128CBC-HS256', 'A192CBC-HS384', 'A256CBC-HS512', 'A128GCM', 'A256GCM'])
+def test_round_trip(rsa_key, enc):
+    token = JweEncoder(rsa_key, enc=enc).encode('payload')
+
+    header, payload = JweDecoder({'rsa': rsa_key}).decode(token)
+
+    assert header == {'alg': 'RSA-OAEP', 'enc': enc, 'kid': 'rsa'} and payload == b'payload'
+
+
+def test_symmetric_key_encryption_keys():
+    key = SymmetricKey.generate(kid='oct', size=192)
+    kek = os.urandom(32)
+
+    assert JweDecoder({'oct': key}).decode(JweEncoder(key).encode(b'a'))[0]['alg'] == 'A192KW'
+    token = JweEncoder(kek, alg='A256KW', kid='raw').encode(b'b')
+    assert JweDecoder({'raw': kek}).decode(token)[1] == b'b'
+
+
+def test_parse_jwe(rsa_key):
+    header, encrypted_key, iv, cipher_text, tag = parse_jwe(JweEncoder(rsa_key, enc='A128GCM').encode(b'payload'))
+
+    assert header['enc'] == 'A128GCM'
+    assert len(encrypted_key) == 256 and len(iv) == 12 and len(cipher_text) == 7 and len(tag) == 16
+
+
+def test_tampered_token(rsa_key):
+    decoder = JweDecoder({'rsa': rsa_key})
+    parts = JweEncoder(rsa_key).encode(b'payload').split('.')
+
+    # a cek which fails to unwrap surfaces as an authentication failure, as does any other change
+    for i in (1, 3, 4):
+        tampered = list(parts)
+        tampered[i] = parts[i][:-2] + ('AA' if parts[i][-2:] != 'AA' else 'BA')
+        with pytest.raises(InvalidSignature):
+            decoder.decode('.'.join(tampered))
+    assert decoder.failed == 3
+
+
+def test_invalid_tokens(rsa_key):
+    decoder = JweDecoder({'rsa': rsa_key}, algorithms=['A256KW'])
+    token = JweEncoder(rsa_key).encode(b'payload')
+
+    for bad in ('a.b.c', token, JweEncoder(os.urandom(16), alg='A128KW', kid='missing').encode(b'payload')):
+        with pytest.raises(ValueError):
+            decoder.decode(bad)
+    with pytest.raises(ValueError):
+        JweEncoder(rsa_key, enc='A128CBC')
+
+
+def test_rsa_cek_cached(rsa_key):
+    cek_cache = UnwrappedKeyCache()
+    decoder = JweDecoder({'rsa': rsa_key}, cek_cache=cek_cache)
+    token = JweEncoder(rsa_key).encode(b'payload')
+
+    for _ in range(3):
+        decoder.decode(token)
+
+    assert cek_cache.stats()['hits'] == 2
+
+
+def test_decode_many(rsa_key):
+    encoder = JweEncoder(rsa_key)
+    tokens = encoder.encode_many([b'%d' % i for i in range(100)])
+    tokens[5] = tokens[5][:-4] + 'AAAA'
+
+    with ThreadPoolExecutor(4) as executor:
+        results = JweDecoder({'rsa': rsa_key}).decode_many(tokens, executor)
+
+    assert isinstance(results[5], InvalidSignature)
+    assert [payload for _, payload in results[:5] + results[6:]] == [b'%d' % i for i in range(100) if i != 5]
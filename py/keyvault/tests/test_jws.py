@@ -0,0 +1,168 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from cryptography.exceptions import InvalidSignature
+
+from keyvault.crytpography import EcKey, JwksCache, JwsVerifier, RsaKey, parse_jws
+from keyvault.crytpography.jwk import _b64_encode
+
+
+@pytest.fixture(scope='module')
+def keys():
+    return {'rsa': RsaKey.generate(kid='rsa', size=2048), 'ec': EcKey.generate(kid='ec')}
+
+
+def _token(key, alg, payload, kid=None, header_alg=None):
+    header = {'alg': header_alg or alg, 'kid': kid or key.kid}
+    signing_input = '%s.%s' % (_b64_encode(json.dumps(header).encode('utf-8')), _b64_encode(payload))
+    signature = key.sign(signing_input.encode('ascii'), algorithm=alg)
+    return '%s.%s' % (signing_input, _b64_encode(signature))
+
+
+def _claims_token(key, **claims):
+    return _token(key, 'RS256', json.dumps(claims).encode('utf-8'))
+
+
+class _Jwks(object):
+    # a jwks endpoint which counts its fetches
+    def __init__(self, keys):
+        self.keys = list(keys)
+        self.fetches = 0
+
+    def __call__(self):
+        self.fetches += 1
+        return {'keys': [key.to_jwk().to_dict() for key in self.keys]}
+
+
+def test_parse_jws(keys):
+    header, payload, signature, signing_input = parse_jws(_token(keys['rsa'], 'RS256', b'payload'))
+
+    assert header == {'alg': 'RS256', 'kid': 'rsa'} and payload == b'payload'
+    keys['rsa'].verify(signature, signing_input)
+    for token in ('a.b', 'a.b.c.d', '%s.e30.e30' % _b64_encode(b'[]')):
+        with pytest.raises(ValueError):
+            parse_jws(token)
+
+
+def test_verify(keys):
+    verifier = JwsVerifier(JwksCache(_Jwks(keys.values())))
+
+    assert verifier.verify(_token(keys['rsa'], 'RS256', b'rsa')) == ({'alg': 'RS256', 'kid': 'rsa'}, b'rsa')
+    assert verifier.verify(_token(keys['ec'], 'ES256', b'ec'))[1] == b'ec'
+    assert verifier.stats()['verified'] == 2
+
+
+def test_invalid_tokens(keys):
+    verifier = JwsVerifier(JwksCache(_Jwks(keys.values())))
+    header, _, signature = _token(keys['rsa'], 'RS256', b'payload').split('.')
+
+    with pytest.raises(InvalidSignature):
+        verifier.verify('.'.join((header, _b64_encode(b'other'), signature)))
+    with pytest.raises(InvalidSignature):
+        verifier.verify(_token(keys['rsa'], 'RS256', b'payload', kid='missing'))
+    # the ec signature is checked against the rsa key the kid names
+    with pytest.raises(InvalidSignature):
+        verifier.verify(_token(keys['ec'], 'ES256', b'payload', kid='rsa'))
+    with pytest.raises(ValueError):
+        verifier.verify(_token(keys['rsa'], 'RS256', b'payload', header_alg='none'))
+    assert verifier.stats()['failed'] == 3
+
+
+def test_results_cached(keys):
+    verifier = JwsVerifier(JwksCache(_Jwks(keys.values())))
+    token = _token(keys['rsa'], 'RS256', b'payload')
+    header, payload, signature = token.split('.')
+    forged = '.'.join((header, payload, _b64_encode(b'\0' * 256)))
+
+    for _ in range(3):
+        verifier.verify(token)
+        with pytest.raises(InvalidSignature):
+            verifier.verify(forged)
+
+    stats = verifier.stats()
+    assert stats['cache_misses'] == 2 and stats['cache_hits'] == 4
+    assert stats['verified'] == 3 and stats['failed'] == 3
+
+
+def test_jwks_change_clears_results(keys):
+    jwks = _Jwks([keys['rsa']])
+    cache = JwksCache(jwks)
+    verifier = JwsVerifier(cache)
+    token = _token(keys['rsa'], 'RS256', b'payload')
+    verifier.verify(token)
+
+    # a token signed by a key which has been replaced must not be accepted from the result cache
+    jwks.keys = [RsaKey.generate(kid='rsa', size=2048)]
+    cache.refresh()
+
+    with pytest.raises(InvalidSignature):
+        verifier.verify(token)
+    assert verifier.stats()['cache_hits'] == 0
+
+
+def test_jwks_refreshes(keys):
+    jwks = _Jwks([keys['rsa']])
+    cache = JwksCache(jwks, refresh_interval=3600, min_refresh_interval=0)
+
+    rsa_key = cache.get('rsa')
+    assert cache.get('rsa') is rsa_key and jwks.fetches == 1
+
+    # unknown kids refresh the cache, unchanged keys keep their materialized key
+    jwks.keys.append(keys['ec'])
+    assert cache.get('ec') is not None and cache.get('rsa') is rsa_key
+    assert jwks.fetches == 2 and cache.version == 2
+
+
+def test_unknown_kids_rate_limited(keys):
+    jwks = _Jwks([keys['rsa']])
+    cache = JwksCache(jwks, min_refresh_interval=60)
+
+    for _ in range(10):
+        assert cache.get('missing') is None
+    assert jwks.fetches == 1
+
+
+def test_decode_jwt(keys):
+    verifier = JwsVerifier(JwksCache(_Jwks(keys.values())))
+    now = int(time.time())
+
+    assert verifier.decode_jwt(_claims_token(keys['rsa'], sub='a', exp=now + 60)) == {'sub': 'a', 'exp': now + 60}
+    with pytest.raises(ValueError):
+        verifier.decode_jwt(_claims_token(keys['rsa'], exp=now - 60))
+    with pytest.raises(ValueError):
+        verifier.decode_jwt(_claims_token(keys['rsa'], nbf=now + 60))
+    assert verifier.decode_jwt(_claims_token(keys['rsa'], exp=now - 60), leeway=120)['exp'] == now - 60
+
+
+def test_concurrent_unknown_kids_fetch_once(keys):
+    class _SlowJwks(_Jwks):
+        def __call__(self):
+            time.sleep(0.05)
+            return super(_SlowJwks, self).__call__()
+
+    jwks = _SlowJwks([keys['rsa']])
+    cache = JwksCache(jwks, min_refresh_interval=30)
+    barrier = threading.Barrier(20)
+
+    def get():
+        barrier.wait()
+        return cache.get('unknown')
+
+    with ThreadPoolExecutor(20) as executor:
+        assert list(executor.map(lambda _: get(), range(20))) == [None] * 20
+    assert jwks.fetches == 1
+
+
+def test_concurrent_verify_counts(keys):
+    verifier = JwsVerifier(JwksCache(_Jwks(keys.values())))
+    tokens = [_token(keys['ec'], 'ES256', b'%d' % (i % 50)) for i in range(50)] * 40
+
+    with ThreadPoolExecutor(8) as executor:
+        list(executor.map(verifier.verify, tokens))
+
+    stats = verifier.stats()
+    assert stats['verified'] == 2000
+    assert stats['cache_hits'] + stats['cache_misses'] == 2000
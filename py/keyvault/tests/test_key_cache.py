@@ -0,0 +1,66 @@
+import time
+
+from keyvault.crytpography import SymmetricKey, UnwrappedKeyCache
+
+
+def test_unwrap_key_cached():
+    kek = SymmetricKey.generate()
+    wrapped = kek.wrap_key(b'k' * 32)
+    cache = UnwrappedKeyCache()
+
+    assert cache.unwrap_key(kek, wrapped) == b'k' * 32
+    assert cache.unwrap_key(kek, wrapped) == b'k' * 32
+
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['size']) == (1, 1, 1)
+
+
+def test_get_or_unwrap_only_unwraps_once():
+    cache = UnwrappedKeyCache()
+    calls = []
+
+    def unwrap():
+        calls.append(1)
+        return b'key'
+
+    assert cache.get_or_unwrap('kid', 'A256KW', b'wrapped', unwrap) == b'key'
+    assert cache.get_or_unwrap('kid', 'A256KW', b'wrapped', unwrap) == b'key'
+    assert cache.get_or_unwrap('kid', 'A128KW', b'wrapped', unwrap) == b'key'
+    assert len(calls) == 2
+
+
+def test_lookups_return_copies():
+    cache = UnwrappedKeyCache()
+    cache.put('kid', 'A256KW', b'wrapped', b'key')
+
+    value = cache.get('kid', 'A256KW', b'wrapped')
+    assert isinstance(value, bytes)
+
+    # clearing zeroes the cache's own copy, not the value the caller holds
+    cache.clear()
+    assert value == b'key'
+    assert cache.get('kid', 'A256KW', b'wrapped') is None
+
+
+def test_evicts_least_recently_used_and_zeroes():
+    cache = UnwrappedKeyCache(capacity=2)
+    cache.put('a', None, b'1', b'key a')
+    cache.put('b', None, b'2', b'key b')
+    stored = cache._items[next(iter(cache._items))][0]
+    cache.get('b', None, b'2')
+    cache.put('c', None, b'3', b'key c')
+
+    assert cache.get('a', None, b'1') is None
+    assert cache.get('b', None, b'2') == b'key b'
+    assert stored == bytearray(len(b'key a'))
+    assert cache.stats()['evictions'] == 1
+
+
+def test_expired_keys():
+    cache = UnwrappedKeyCache(ttl=0.01)
+    cache.put('kid', None, b'wrapped', b'key')
+    time.sleep(0.02)
+
+    cache.purge()
+    assert len(cache) == 0
+    assert cache.get('kid', None, b'wrapped') is None
@@ -0,0 +1,64 @@
+import os
+import signal
+import time
+
+import pytest
+
+from keyvault.crytpography import RsaKeyPool
+
+
+def _wait_for(condition, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError('timed out')
+        time.sleep(0.01)
+
+
+def test_generate_from_pool():
+    with RsaKeyPool(sizes=[(1024, 65537)], depth=2, max_workers=1) as pool:
+        _wait_for(lambda: pool.stats()['depth']['1024/65537'] == 2)
+
+        key = pool.generate(kid='kid', size=1024)
+        key.verify(key.sign(b'data'), b'data')
+
+        stats = pool.stats()
+        assert key.kid == 'kid' and key.is_private_key()
+        assert stats['hits'] == 1 and stats['misses'] == 0
+        assert stats['generated'] >= 2
+
+
+def test_unpooled_size_generated_inline():
+    with RsaKeyPool(sizes=[(1024, 65537)], depth=1, max_workers=1) as pool:
+        key = pool.generate(size=1024, e=3)
+
+        assert key.public_key.public_numbers().e == 3
+        assert pool.stats()['misses'] == 1
+
+
+def test_failed_generation_backs_off():
+    # keys smaller than 1024 bits can't be generated, the refill must back off rather than resubmitting in a loop
+    with RsaKeyPool(sizes=[(512, 65537)], depth=4, max_workers=1) as pool:
+        _wait_for(lambda: pool.stats()['errors'])
+        time.sleep(0.5)
+
+        assert pool._failures[(512, 65537)] <= 4
+        assert 'ValueError' in pool.stats()['errors']['512/65537']
+        # the pool is empty so the key is generated inline, which fails the same way
+        with pytest.raises(ValueError):
+            pool.generate(size=512)
+
+
+def test_killed_worker_replaced():
+    with RsaKeyPool(sizes=[(1024, 65537)], depth=1, max_workers=1) as pool:
+        _wait_for(lambda: pool.stats()['depth']['1024/65537'] == 1)
+        executor = pool._executor
+        for pid in list(executor._processes):
+            os.kill(pid, signal.SIGKILL)
+
+        # keys are still generated, inline while the pool is empty, and the broken executor is replaced
+        for _ in range(3):
+            key = pool.generate(size=1024)
+            key.verify(key.sign(b'data'), b'data')
+        _wait_for(lambda: pool._executor is not executor)
+        _wait_for(lambda: pool.stats()['depth']['1024/65537'] == 1)
@@ -0,0 +1,99 @@
+import os
+import struct
+
+import pytest
+
+from keyvault.crytpography import EcKey, JsonWebKey, KeyRing, KeyRingWriter, RsaKey, SymmetricKey
+from keyvault.crytpography import keyring
+from keyvault.crytpography.keyring import _INDEX_HEADER_FORMAT, _ENTRY_FORMAT
+
+
+@pytest.fixture(scope='module')
+def keys():
+    return [RsaKey.generate(kid='rsa'), EcKey.generate(kid='ec'), SymmetricKey.generate(kid='oct')]
+
+
+def test_round_trip(tmp_path, keys):
+    path = str(tmp_path / 'keys')
+    with KeyRingWriter(path) as writer:
+        for key in keys:
+            writer.add(key)
+
+    with KeyRing(path) as ring:
+        assert len(ring) == 3
+        assert sorted(ring.kids()) == ['ec', 'oct', 'rsa']
+        assert 'rsa' in ring and 'missing' not in ring
+        assert ring.get('missing') is None
+        assert ring.get('rsa').n == keys[0].n
+        assert ring.get('ec').d == keys[1].d
+        assert ring.get('oct').k == keys[2].k
+        assert ring.get('rsa') is ring.get('rsa')
+
+
+def test_append_replaces_kid(tmp_path, keys):
+    path = str(tmp_path / 'keys')
+    with KeyRingWriter(path) as writer:
+        writer.add(keys[0])
+    replacement = RsaKey.generate(kid='rsa')
+    with KeyRingWriter(path) as writer:
+        writer.add(replacement)
+        writer.add(keys[1])
+
+    with KeyRing(path) as ring:
+        assert len(ring) == 2
+        assert ring.get('rsa').n == replacement.n
+
+
+def test_add_requires_kid(tmp_path):
+    with KeyRingWriter(str(tmp_path / 'keys')) as writer:
+        with pytest.raises(ValueError):
+            writer.add(JsonWebKey(kty='oct', k=os.urandom(32)))
+
+
+def test_invalid_files(tmp_path):
+    path = str(tmp_path / 'keys')
+    with open(path, 'wb') as f:
+        f.write(b'not a key ring')
+    with open(path + '.idx', 'wb') as f:
+        f.write(b'not an index')
+
+    with pytest.raises(ValueError):
+        KeyRing(path)
+
+
+def test_index_entry_beyond_data_file(tmp_path, keys):
+    path = str(tmp_path / 'keys')
+    with KeyRingWriter(path) as writer:
+        writer.add(keys[2])
+
+    # point the only entry past the end of the data file, as an index written for a longer data file would
+    with open(path + '.idx', 'r+b') as f:
+        pos = struct.calcsize(_INDEX_HEADER_FORMAT)
+        f.seek(pos)
+        kid_hash, _, length = struct.unpack(_ENTRY_FORMAT, f.read(struct.calcsize(_ENTRY_FORMAT)))
+        f.seek(pos)
+        f.write(struct.pack(_ENTRY_FORMAT, kid_hash, os.path.getsize(path), length))
+
+    with KeyRing(path) as ring:
+        with pytest.raises(ValueError):
+            ring.get('oct')
+        with pytest.raises(ValueError):
+            list(ring.kids())
+
+
+def test_colliding_kid_hashes(tmp_path, keys, monkeypatch):
+    # every kid gets the same hash, so the kids can only be told apart by the kids in their records
+    monkeypatch.setattr(keyring, '_kid_hash', lambda kid: bytes(16))
+    path = str(tmp_path / 'keys')
+    with KeyRingWriter(path) as writer:
+        writer.add(keys[0])
+        writer.add(keys[1])
+    with KeyRingWriter(path) as writer:
+        writer.add(keys[2])
+
+    with KeyRing(path) as ring:
+        assert len(ring) == 3
+        assert sorted(ring.kids()) == ['ec', 'oct', 'rsa']
+        assert ring.get('rsa').n == keys[0].n
+        assert ring.get('ec').d == keys[1].d
+        assert ring.get('oct').k == keys[2].k
@@ -0,0 +1,91 @@
+import json
+import threading
+
+import pytest
+from cryptography.exceptions import InvalidSignature
+
+from keyvault.crytpography import SymmetricKey, metrics
+from keyvault.crytpography.algorithms.aes_cbc import _AesCbc, _AesCbcEncryptor
+
+
+@pytest.fixture
+def enabled():
+    metrics.reset()
+    metrics.enable()
+    try:
+        yield
+    finally:
+        metrics.disable()
+        metrics.reset()
+
+
+def _stats(algorithm, operation, method):
+    return [s for s in metrics.snapshot() if (s['algorithm'], s['operation'], s['method']) ==
+            (algorithm, operation, method)]
+
+
+def test_transforms_recorded(enabled):
+    key = SymmetricKey.generate(size=256)
+
+    for _ in range(3):
+        key.decrypt(key.encrypt(b'x' * 100, algorithm='A256CBC'), algorithm='A256CBC')
+
+    encrypt, = _stats('A256CBC', 'encrypt', 'transform')
+    assert encrypt['count'] == 3 and encrypt['errors'] == 0 and encrypt['bytes'] == 300
+    assert sum(encrypt['histogram_ns'].values()) == 3
+    assert 0 < encrypt['p50_us'] <= encrypt['p99_us']
+    assert _stats('A256CBC', 'decrypt', 'transform')[0]['bytes'] == 3 * 112
+    assert _stats('A256CBC', 'encrypt', '_get_algorithm')[0]['count'] == 3
+
+
+def test_failures_counted(enabled):
+    key = SymmetricKey.generate(size=256)
+
+    with pytest.raises(InvalidSignature):
+        key.decrypt(bytes(40))
+
+    decrypt, = _stats('A256GCM', 'decrypt', 'transform')
+    assert decrypt['count'] == 1 and decrypt['errors'] == 1
+
+
+def test_snapshot_json(enabled):
+    key = SymmetricKey.generate(size=128)
+    key.encrypt(b'data')
+
+    assert json.loads(metrics.to_json()) == json.loads(json.dumps(metrics.snapshot()))
+
+
+def test_disable_restores_methods():
+    originals = (_AesCbc.create_encryptor, _AesCbcEncryptor.transform)
+
+    metrics.enable()
+    try:
+        assert metrics.is_enabled()
+        assert (_AesCbc.create_encryptor, _AesCbcEncryptor.transform) != originals
+    finally:
+        metrics.disable()
+
+    assert not metrics.is_enabled()
+    assert (_AesCbc.create_encryptor, _AesCbcEncryptor.transform) == originals
+
+
+def test_nothing_recorded_when_disabled():
+    metrics.reset()
+    SymmetricKey.generate(size=256).encrypt(b'data')
+
+    assert metrics.snapshot() == []
+
+
+def test_exited_threads_folded_into_totals(enabled):
+    key = SymmetricKey.generate(size=256)
+    for _ in range(50):
+        thread = threading.Thread(target=key.encrypt, args=(b'data',))
+        thread.start()
+        thread.join()
+
+    # the stores of the exited threads are dropped but their stats are kept
+    assert len(metrics._stores) <= 2
+    assert _stats('A256GCM', 'encrypt', 'transform')[0]['count'] == 50
+
+    metrics.reset()
+    assert metrics.snapshot() == []
@@ -0,0 +1,91 @@
+import os
+
+import pytest
+from cryptography.exceptions import InvalidSignature, InvalidTag
+
+from keyvault.crytpography import Algorithm, Records
+
+ALGORITHMS = ['A128CBC', 'A256CBC', 'A128CBC-HS256', 'A256CBC-HS512', 'A128GCM', 'A256GCM']
+RECORDS = [b'', b'a', os.urandom(15), os.urandom(16), os.urandom(17), os.urandom(100)]
+
+
+def _unpacked(records):
+    return [bytes(records.data[records.offsets[i]:records.offsets[i + 1]]) for i in range(len(records.offsets) - 1)]
+
+
+def _args(algorithm):
+    return () if algorithm.name().endswith('CBC') else (b'aad',)
+
+
+@pytest.mark.parametrize('name', ALGORITHMS)
+def test_round_trip(name):
+    algorithm = Algorithm.resolve(name)
+    key = os.urandom(algorithm.key_size_in_bytes)
+
+    encrypted = algorithm.encrypt_records(key, RECORDS, *_args(algorithm))
+    decrypted = algorithm.decrypt_records(key, encrypted, *_args(algorithm))
+
+    assert isinstance(decrypted, Records)
+    assert len(decrypted.offsets) == len(RECORDS) + 1
+    assert _unpacked(decrypted) == RECORDS
+
+
+@pytest.mark.parametrize('name', ALGORITHMS)
+def test_fixed_width_records(name):
+    algorithm = Algorithm.resolve(name)
+    key = os.urandom(algorithm.key_size_in_bytes)
+    data = os.urandom(8 * 100)
+
+    encrypted = algorithm.encrypt_records(key, data, *_args(algorithm), record_size=8)
+
+    assert _unpacked(algorithm.decrypt_records(key, encrypted, *_args(algorithm))) == \
+        [data[i:i + 8] for i in range(0, len(data), 8)]
+    with pytest.raises(ValueError):
+        algorithm.encrypt_records(key, data[:-1], *_args(algorithm), record_size=8)
+
+
+@pytest.mark.parametrize('name', ALGORITHMS)
+def test_records_get_distinct_ivs(name):
+    algorithm = Algorithm.resolve(name)
+    key = os.urandom(algorithm.key_size_in_bytes)
+
+    encrypted = algorithm.encrypt_records(key, [b'same'] * 2, *_args(algorithm))
+
+    assert _unpacked(encrypted)[0] != _unpacked(encrypted)[1]
+
+
+@pytest.mark.parametrize('name,error', [('A128CBC-HS256', InvalidSignature), ('A128GCM', InvalidTag)])
+def test_tampered_record(name, error):
+    algorithm = Algorithm.resolve(name)
+    key = os.urandom(algorithm.key_size_in_bytes)
+    encrypted = algorithm.encrypt_records(key, RECORDS, b'aad')
+    data = bytearray(encrypted.data)
+    data[-1] ^= 1
+
+    with pytest.raises(error):
+        algorithm.decrypt_records(key, encrypted._replace(data=bytes(data)), b'aad')
+    with pytest.raises(error):
+        algorithm.decrypt_records(key, encrypted, b'other')
+
+
+@pytest.mark.parametrize('name,error', [('A128CBC', ValueError), ('A128CBC-HS256', InvalidSignature),
+                                        ('A128GCM', ValueError)])
+def test_missing_ivs(name, error):
+    algorithm = Algorithm.resolve(name)
+    key = os.urandom(algorithm.key_size_in_bytes)
+    encrypted = algorithm.encrypt_records(key, RECORDS, *_args(algorithm))
+
+    # the cbc hmac tags cover the ivs, so records without their ivs fail to authenticate
+    with pytest.raises(error):
+        algorithm.decrypt_records(key, encrypted._replace(ivs=encrypted.ivs[:-1]), *_args(algorithm))
+
+
+@pytest.mark.parametrize('shift', [-16, 16])
+def test_offsets_outside_data(shift):
+    algorithm = Algorithm.resolve('A128CBC')
+    key = os.urandom(algorithm.key_size_in_bytes)
+    encrypted = algorithm.encrypt_records(key, RECORDS)
+    offsets = [offset + shift for offset in encrypted.offsets]
+
+    with pytest.raises(ValueError, match='offsets must lie within data'):
+        algorithm.decrypt_records(key, encrypted._replace(offsets=offsets))
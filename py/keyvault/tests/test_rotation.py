@@ -0,0 +1,113 @@
+import io
+import json
+import os
+
+import pytest
+
+from keyvault.crytpography import Algorithm, KekRotation, SymmetricKey, read_wrapped_keys, write_wrapped_keys
+
+OLD_KEK = os.urandom(16)
+NEW_KEK = os.urandom(32)
+KEYS = [os.urandom(32) for _ in range(50)]
+
+
+def _wrap(kek, keys):
+    return [Algorithm.resolve('A%dKW' % (len(kek) * 8)).create_encryptor(kek).transform(key) for key in keys]
+
+
+def _unwrap(kek, wrapped_keys):
+    return [Algorithm.resolve('A%dKW' % (len(kek) * 8)).create_decryptor(kek).transform(wrapped_key)
+            for wrapped_key in wrapped_keys]
+
+
+@pytest.fixture
+def paths(tmp_path):
+    source = str(tmp_path / 'old')
+    write_wrapped_keys(source, _wrap(OLD_KEK, KEYS))
+    return source, str(tmp_path / 'new'), str(tmp_path / 'checkpoint')
+
+
+def test_wrapped_key_file(tmp_path):
+    path = str(tmp_path / 'keys')
+    write_wrapped_keys(path, [b'a', b'', b'bc'])
+
+    assert list(read_wrapped_keys(path)) == [b'a', b'', b'bc']
+    with open(path, 'rb') as f:
+        truncated = f.read()[:-1]
+    with pytest.raises(ValueError):
+        list(read_wrapped_keys(io.BytesIO(truncated)))
+
+
+@pytest.mark.parametrize('max_workers', [1, 2])
+def test_rotate(paths, max_workers):
+    source, output, checkpoint = paths
+
+    stats = KekRotation(OLD_KEK, NEW_KEK, checkpoint, max_workers=max_workers, batch_size=8).run(source, output)
+
+    assert stats['processed'] == stats['total'] == len(KEYS) and stats['failed'] == 0
+    assert _unwrap(NEW_KEK, read_wrapped_keys(output)) == KEYS
+    with open(checkpoint) as f:
+        assert json.load(f)['complete']
+
+
+def test_rotate_keys(paths):
+    _, output, checkpoint = paths
+    old_kek = SymmetricKey.generate(size=128)
+    new_kek = SymmetricKey.generate(size=256)
+
+    KekRotation(old_kek, new_kek, checkpoint, max_workers=1).run([old_kek.wrap_key(key) for key in KEYS], output)
+
+    assert [new_kek.unwrap_key(wrapped_key) for wrapped_key in read_wrapped_keys(output)] == KEYS
+
+
+def test_failure_checkpoints_and_resumes(paths):
+    source, output, checkpoint = paths
+    wrapped_keys = _wrap(OLD_KEK, KEYS)
+    wrapped_keys[20] = bytes(40)
+    write_wrapped_keys(source, wrapped_keys)
+
+    with pytest.raises(ValueError):
+        KekRotation(OLD_KEK, NEW_KEK, checkpoint, max_workers=1, batch_size=8).run(source, output)
+    with open(checkpoint) as f:
+        assert json.load(f)['records'] == 20
+
+    # output written past the checkpoint is truncated when the run resumes
+    with open(output, 'ab') as f:
+        f.write(b'partial')
+    wrapped_keys[20] = _wrap(OLD_KEK, KEYS[20:21])[0]
+    write_wrapped_keys(source, wrapped_keys)
+    rotation = KekRotation(OLD_KEK, NEW_KEK, checkpoint, max_workers=1, batch_size=8)
+    stats = rotation.run(source, output)
+
+    assert stats['resumed'] == 20 and stats['processed'] == len(KEYS) - 20
+    assert _unwrap(NEW_KEK, read_wrapped_keys(output)) == KEYS
+
+    # a completed rotation isn't run again
+    assert rotation.run(source, output)['processed'] == 0
+
+
+def test_resume_iterable_source(paths):
+    _, output, checkpoint = paths
+    wrapped_keys = _wrap(OLD_KEK, KEYS)
+    wrapped_keys[30] = bytes(40)
+
+    with pytest.raises(ValueError):
+        KekRotation(OLD_KEK, NEW_KEK, checkpoint, max_workers=1, batch_size=8).run(wrapped_keys, output)
+
+    stats = KekRotation(OLD_KEK, NEW_KEK, checkpoint, max_workers=1).run(_wrap(OLD_KEK, KEYS), output)
+
+    assert stats['resumed'] == 30
+    assert _unwrap(NEW_KEK, read_wrapped_keys(output)) == KEYS
+
+
+def test_skip_errors(paths):
+    source, output, checkpoint = paths
+    wrapped_keys = _wrap(OLD_KEK, KEYS)
+    wrapped_keys[3] = bytes(40)
+    write_wrapped_keys(source, wrapped_keys)
+
+    stats = KekRotation(OLD_KEK, NEW_KEK, checkpoint, max_workers=1, skip_errors=True).run(source, output)
+
+    rotated = list(read_wrapped_keys(output))
+    assert stats['failed'] == 1 and rotated[3] == b''
+    assert _unwrap(NEW_KEK, rotated[:3] + rotated[4:]) == KEYS[:3] + KEYS[4:]
@@ -0,0 +1,68 @@
+import os
+
+import pytest
+from cryptography.exceptions import InvalidSignature
+
+from keyvault.crytpography import JsonWebKey, RsaKey
+from keyvault.crytpography import rsa_key
+
+
+@pytest.fixture(scope='module')
+def key():
+    return RsaKey.generate(size=2048)
+
+
+def test_jwk_round_trip(key):
+    imported = RsaKey.from_jwk_str(key.to_jwk_str(include_private=True))
+
+    assert imported.is_private_key()
+    assert imported.n == key.n and imported.d == key.d
+    assert imported.thumbprint() == key.thumbprint()
+    key.verify(imported.sign(b'data'), b'data')
+
+
+def test_public_jwk_excludes_private_material(key):
+    public = RsaKey.from_jwk(key.to_jwk())
+
+    assert not public.is_private_key()
+    assert public.d is None
+    public.verify(key.sign(b'data'), b'data')
+    with pytest.raises(NotImplementedError):
+        public.sign(b'data')
+
+
+def test_from_jwk_rejects_invalid_jwks():
+    with pytest.raises(TypeError):
+        RsaKey.from_jwk({'kty': 'RSA'})
+    with pytest.raises(ValueError):
+        RsaKey.from_jwk(JsonWebKey(kty='EC', n=b'\x01', e=b'\x01'))
+    with pytest.raises(ValueError):
+        RsaKey.from_jwk(JsonWebKey(kty='RSA', n=b'\x01'))
+
+
+def test_import_reuses_cached_backend_key(key):
+    jwk = key.to_jwk(include_private=True)
+
+    assert RsaKey.from_jwk(jwk).private_key is RsaKey.from_jwk(jwk).private_key
+
+
+def test_cached_private_key_not_returned_for_other_private_values(key):
+    RsaKey.from_jwk(key.to_jwk(include_private=True))
+
+    forged = key.to_jwk(include_private=True)
+    forged.p, forged.q, forged.d = os.urandom(128), os.urandom(128), os.urandom(256)
+    forged.dp = forged.dq = forged.qi = None
+
+    # the forged values aren't a valid key, so rather than the cached key the import fails
+    with pytest.raises(ValueError):
+        RsaKey.from_jwk(forged)
+
+
+@pytest.mark.parametrize('name', ['d', 'dp', 'dq', 'e', 'n', 'p', 'q', 'qi'])
+def test_private_digest_covers_every_value(key, name):
+    # cached private keys are trusted by their digest, so changing any one value must change it
+    jwk = key.to_jwk(include_private=True)
+    changed = key.to_jwk(include_private=True)
+    setattr(changed, name, getattr(changed, name) + b'\x01')
+
+    assert rsa_key._private_digest(changed) != rsa_key._private_digest(jwk)
@@ -0,0 +1,103 @@
+import os
+
+import pytest
+from cryptography.exceptions import InvalidSignature
+
+from keyvault.crytpography import JsonWebKey, SymmetricKey
+from keyvault.crytpography.symmetric_key import _ALGORITHMS
+
+ENCRYPTION_ALGORITHMS = [(size * 8, name) for size, (names, _) in sorted(_ALGORITHMS.items()) for name in names]
+AUTHENTICATED_ALGORITHMS = [(size, name) for size, name in ENCRYPTION_ALGORITHMS if 'GCM' in name or 'HS' in name]
+
+
+@pytest.mark.parametrize('size,name', ENCRYPTION_ALGORITHMS)
+def test_encrypt_round_trip(size, name):
+    key = SymmetricKey.generate(size=size)
+    plain_text = os.urandom(100)
+
+    cipher_text = key.encrypt(plain_text, algorithm=name, auth_data=b'aad')
+
+    assert key.decrypt(cipher_text, algorithm=name, auth_data=b'aad') == plain_text
+
+
+@pytest.mark.parametrize('size', [128, 192, 256, 384, 512])
+def test_default_algorithm(size):
+    key = SymmetricKey.generate(size=size)
+
+    assert key.decrypt(key.encrypt(b'data')) == b'data'
+    assert key.default_encryption_algorithm == _ALGORITHMS[size // 8][0][0]
+
+
+@pytest.mark.parametrize('size,name', [(128, 'A256GCM'), (256, 'A128GCM'), (256, 'A256CBC-HS512'), (512, 'A256GCM')])
+def test_algorithm_not_supported_by_key_size(size, name):
+    with pytest.raises(ValueError):
+        SymmetricKey.generate(size=size).encrypt(b'data', algorithm=name)
+
+
+@pytest.mark.parametrize('size', [128, 192, 256])
+def test_wrap_key(size):
+    key = SymmetricKey.generate(size=size)
+    cek = os.urandom(32)
+
+    assert key.unwrap_key(key.wrap_key(cek)) == cek
+
+
+@pytest.mark.parametrize('size', [384, 512])
+def test_no_key_wrap_algorithm(size):
+    key = SymmetricKey.generate(size=size)
+
+    assert key.default_key_wrap_algorithm is None
+    with pytest.raises(ValueError):
+        key.wrap_key(os.urandom(32))
+    with pytest.raises(ValueError):
+        key.unwrap_key(os.urandom(40))
+
+
+@pytest.mark.parametrize('size', [100, 1024])
+def test_generate_invalid_size(size):
+    with pytest.raises(ValueError):
+        SymmetricKey.generate(size=size)
+
+
+def test_jwk_round_trip():
+    key = SymmetricKey.generate(kid='kid', size=384)
+
+    imported = SymmetricKey.from_jwk_str(key.to_jwk_str(include_private=True))
+
+    assert imported.kid == 'kid' and imported.k == key.k
+    assert imported.thumbprint() == key.thumbprint()
+    assert imported.decrypt(key.encrypt(b'data')) == b'data'
+    assert key.to_jwk().k is None
+
+
+def test_from_jwk_invalid():
+    with pytest.raises(TypeError):
+        SymmetricKey.from_jwk({'kty': 'oct'})
+    with pytest.raises(ValueError):
+        SymmetricKey.from_jwk(JsonWebKey(kty='RSA', k=os.urandom(32)))
+    with pytest.raises(ValueError):
+        SymmetricKey.from_jwk(JsonWebKey(kty='oct', k=os.urandom(20)))
+
+
+@pytest.mark.parametrize('size,name', AUTHENTICATED_ALGORITHMS)
+def test_authentication_failures_raise_invalid_signature(size, name):
+    key = SymmetricKey.generate(size=size)
+    cipher_text = key.encrypt(b'data', algorithm=name, auth_data=b'aad')
+    tampered = bytearray(cipher_text)
+    tampered[-1] ^= 1
+
+    for data, auth_data in ((cipher_text[:10], b'aad'), (bytes(tampered), b'aad'), (cipher_text, b'other')):
+        with pytest.raises(InvalidSignature):
+            key.decrypt(data, algorithm=name, auth_data=auth_data)
+
+
+def test_explicit_iv():
+    key = SymmetricKey.generate(size=256)
+    iv = bytes(12)
+
+    cipher_text = key.encrypt(b'data', iv=iv)
+
+    assert cipher_text.startswith(iv)
+    assert key.decrypt(cipher_text) == b'data'
+    with pytest.raises(ValueError):
+        key.encrypt(b'data', iv=b'')